@@ -0,0 +1,103 @@
+"""
+Canonical job identity for alert job links.
+
+Alert links are click-tracking URLs (Indeed 'rc/clk/dl?...', LinkedIn '/comm/jobs/view/...?trackingId=...')
+that differ between emails for the same job. Each provider embeds a stable job key in them
+(Indeed's `jk` parameter, LinkedIn's numeric job ID), which is stored as JobPosting.canonical_job_id
+and used for deduplication across emails.
+"""
+import re
+from urllib.parse import parse_qs, urlsplit
+
+CANONICAL_JOB_ID_MAX_LENGTH = 64
+
+INDEED_JOB_KEY_RE = re.compile(r'^[0-9A-Za-z]{1,64}$')
+LINKEDIN_JOB_PATH_RE = re.compile(r'/jobs/view/(?:[^/?#]*-)?(\d+)')
+LINKEDIN_JOB_ID_RE = re.compile(r'^\d{1,64}$')
+
+
+def extract_indeed_job_id(job_url):
+    """
+    Returns the `jk` job key of an Indeed job link, or None.
+    """
+    query = parse_qs(urlsplit(job_url).query)
+    for name in ('jk', 'vjk'):
+        for value in query.get(name, []):
+            if INDEED_JOB_KEY_RE.match(value):
+                return value.lower()
+    return None
+
+
+def extract_linkedin_job_id(job_url):
+    """
+    Returns the numeric job ID of a LinkedIn job link, or None.
+    """
+    parts = urlsplit(job_url)
+    match = LINKEDIN_JOB_PATH_RE.search(parts.path)
+    if match:
+        return match.group(1)
+    for value in parse_qs(parts.query).get('currentJobId', []):
+        if LINKEDIN_JOB_ID_RE.match(value):
+            return value
+    return None
+
+
+# Job key extractors by JobPosting.source
+JOB_ID_EXTRACTORS = {
+    "Indeed": extract_indeed_job_id,
+    "LinkedIn": extract_linkedin_job_id,
+}
+# Link hosts (and their subdomains) by JobPosting.source, for jobs saved without a source
+SOURCE_HOSTS = {
+    "indeed.com": "Indeed",
+    "linkedin.com": "LinkedIn",
+}
+
+
+def guess_job_source(job_url):
+    """
+    Returns the source ('Indeed', 'LinkedIn') a job link belongs to, or None.
+    """
+    if not job_url:
+        return None
+    try:
+        hostname = urlsplit(job_url).hostname
+    except ValueError:
+        # Malformed URL (e.g. an invalid IPv6 host)
+        return None
+    labels = (hostname or '').split('.')
+    for index in range(len(labels) - 1):
+        source = SOURCE_HOSTS.get('.'.join(labels[index:]))
+        if source:
+            return source
+    return None
+
+
+def get_canonical_job_id(source, job_url):
+    """
+    Returns the provider's stable job key for a job link, or None if it has none.
+    """
+    extractor = JOB_ID_EXTRACTORS.get(source)
+    if extractor is None or not job_url:
+        return None
+    try:
+        job_id = extractor(job_url)
+    except ValueError:
+        # Malformed URL (e.g. an invalid IPv6 host)
+        return None
+    if job_id and len(job_id) <= CANONICAL_JOB_ID_MAX_LENGTH:
+        return job_id
+    return None
+
+
+def assign_job_identity(job, source=None):
+    """
+    Fills in a ParsedJob's source (from `source` or its link's host, if unset) and canonical_job_id.
+    """
+    if source:
+        job.source = source
+    elif not job.source or job.source == "Unknown":
+        job.source = guess_job_source(job.job_url) or job.source
+    if not job.canonical_job_id:
+        job.canonical_job_id = get_canonical_job_id(job.source, job.job_url)
+    return job
@@ -0,0 +1,342 @@
+"""
+Template fingerprinting and precompiled extraction plans for alert emails.
+
+Indeed and LinkedIn send a handful of template variants. An email's structural skeleton (the
+set of distinct tag/layout-attribute signatures, independent of job count and content) is
+hashed into a fingerprint. The first time a fingerprint is seen it is reported, the email is
+parsed with the generic BeautifulSoup parser, and an extraction plan is compiled for the
+variant: the exact start tags of the card and of each field, matched with precompiled regexes
+over the raw HTML instead of building a tree and scanning it with predicates. Fields are only
+looked for between a card's start tag and its matching end tag. A plan is only
+kept if it reproduces the generic parser's output on that email; later emails with the same
+fingerprint go straight through the plan, and fall back to the generic parser if it finds nothing.
+"""
+import hashlib
+import html
+import logging
+import re
+import threading
+from collections import OrderedDict
+from bs4 import BeautifulSoup
+from gmail_integration.records import ParsedJob
+from gmail_integration.utils import determine_experience_level, determine_job_type
+
+logger = logging.getLogger('gmail_integration')
+
+START_TAG_RE = re.compile(r'<([a-zA-Z][a-zA-Z0-9]*)\b([^>]*)>')
+ATTR_RE = re.compile(r'([a-zA-Z_:][-a-zA-Z0-9_:.]*)\s*=\s*"([^"]*)"')
+TAG_RE = re.compile(r'<[^>]*>')
+# Layout attributes that make up the skeleton; hrefs, ids, alt text etc. vary per email
+SKELETON_ATTRS = frozenset(['class', 'style', 'bgcolor', 'data-test-id', 'role', 'width'])
+# Variants remembered per provider, so a sender that changes its template on every email can't grow memory
+MAX_VARIANTS = 64
+
+
+def compute_fingerprint(html_content):
+    """
+    Returns a short hash of the email's structural skeleton.
+    """
+    signatures = set()
+    for tag, attrs in START_TAG_RE.findall(html_content):
+        layout = sorted((name.lower(), value) for name, value in ATTR_RE.findall(attrs) if name.lower() in SKELETON_ATTRS)
+        signatures.add((tag.lower(), tuple(layout)))
+    return hashlib.sha1(repr(sorted(signatures)).encode('utf-8')).hexdigest()[:16]
+
+
+def fragment_text(fragment, separator=''):
+    # Same as BeautifulSoup's get_text(separator, strip=True) for markup without comments or scripts
+    strings = (html.unescape(string).strip() for string in TAG_RE.split(fragment))
+    return separator.join(string for string in strings if string)
+
+
+def tag_pattern(tag, element=None, attrs=(), capture=None):
+    """
+    Compiles a regex matching a <tag> start tag whose `attrs` have exactly the values they have on
+    `element` (a BeautifulSoup tag), in any attribute order. `capture` names an attribute whose
+    value is captured in a group of the same name.
+    """
+    parts = [f'<{tag}\\b']
+    for name in attrs:
+        value = element.get(name)
+        if isinstance(value, list):
+            value = ' '.join(value)
+        parts.append(f'(?=[^>]*\\s{re.escape(name)}="{re.escape(html.escape(value))}")')
+    if capture:
+        parts.append(f'(?=[^>]*\\s{capture}="(?P<{capture}>[^"]*)")')
+    parts.append('[^>]*>')
+    return re.compile(''.join(parts))
+
+
+class FieldRule:
+    """
+    Locates a field inside a card: each step's start tag is searched for after the previous one,
+    and the field is the text up to the last step's closing tag (or one of its attributes).
+    """
+    __slots__ = ('steps', 'close_tag', 'separator', 'attr')
+
+    def __init__(self, steps, tag, separator='', attr=None):
+        self.steps = steps
+        self.close_tag = f'</{tag}>'
+        self.separator = separator
+        self.attr = attr
+
+    def extract(self, segment):
+        pos = 0
+        match = None
+        for step in self.steps:
+            match = step.search(segment, pos)
+            if match is None:
+                return None
+            pos = match.end()
+        if self.attr:
+            value = match.group(self.attr)
+            return html.unescape(value) if value is not None else None
+        end = segment.find(self.close_tag, pos)
+        if end == -1:
+            return None
+        return fragment_text(segment[pos:end], self.separator)
+
+
+def find_element_end(html_content, tag_re, pos, limit):
+    """
+    Returns the offset of the end tag closing an element whose start tag ends at `pos`, counting
+    nested elements of the same tag (`tag_re` matches their start and end tags), or `limit` if it
+    isn't closed before `limit`.
+    """
+    depth = 1
+    for match in tag_re.finditer(html_content, pos, limit):
+        if match.group(1):
+            depth -= 1
+            if not depth:
+                return match.start()
+        elif not match.group(0).endswith('/>'):
+            depth += 1
+    return limit
+
+
+class ExtractionPlan:
+    """
+    Compiled extraction for one template variant. Cards start at `card_pattern` matches (<`card_tag`>
+    start tags) and end at their matching end tag; `fields` maps field names to FieldRules applied
+    within each card.
+    """
+
+    def __init__(self, card_pattern, card_tag, fields, build_jobs):
+        self.card_pattern = card_pattern
+        self.card_tag_re = re.compile(f'<(/?){card_tag}\\b[^>]*>', re.IGNORECASE)
+        self.fields = fields
+        self.build_jobs = build_jobs
+
+    def extract(self, html_content):
+        starts = list(self.card_pattern.finditer(html_content))
+        records = []
+        for index, start in enumerate(starts):
+            # Never past the next card, even if this one isn't closed
+            limit = starts[index + 1].start() if index + 1 < len(starts) else len(html_content)
+            end = find_element_end(html_content, self.card_tag_re, start.end(), limit)
+            segment = html_content[start.end():end]
+            record = {name: rule.extract(segment) for name, rule in self.fields.items()}
+            if 'href' in self.card_pattern.groupindex and start.group('href') is not None:
+                record['card_url'] = html.unescape(start.group('href'))
+            records.append(record)
+        return self.build_jobs(records)
+
+
+# Indeed
+
+def compile_indeed_plan(html_content):
+    """
+    Builds an ExtractionPlan from the first complete card of an Indeed alert (see parse_indeed_email).
+    """
+    soup = BeautifulSoup(html_content, 'html.parser')
+    for entry in soup.find_all('a', href=lambda href: href and 'rc/clk/dl' in href):
+        h2_tag = entry.find('h2')
+        if not h2_tag or not h2_tag.find('a') or not entry.get('style'):
+            continue
+
+        title_steps = [tag_pattern('h2', h2_tag, ['style'] if h2_tag.get('style') else []), tag_pattern('a')]
+        fields = {'title': FieldRule(title_steps, 'a')}
+
+        company_td = entry.select_one('td[style*="padding:0 12px 0 0"]')
+        if company_td:
+            company_step = tag_pattern('td', company_td, ['style'])
+            fields['company_name'] = FieldRule([company_step], 'td')
+            location_td = company_td.find_next('td', style=lambda v: v and 'font-size:14px;line-height:21px' in v)
+            if location_td:
+                fields['location'] = FieldRule([company_step, tag_pattern('td', location_td, ['style'])], 'td', ' ')
+
+        salary_table = entry.find('table', bgcolor="#f3f2f1")
+        if salary_table and salary_table.find('strong'):
+            fields['salary'] = FieldRule([tag_pattern('table', salary_table, ['bgcolor']), tag_pattern('strong')], 'strong')
+
+        snippet_td = entry.find(
+            'td',
+            style=lambda s: s and "padding:0;color:#767676;font-size:14px;line-height:21px" in s
+        )
+        if snippet_td:
+            fields['job_description_snippet'] = FieldRule([tag_pattern('td', snippet_td, ['style'])], 'td')
+
+        return ExtractionPlan(tag_pattern('a', entry, ['style'], capture='href'), 'a', fields, build_indeed_jobs)
+    return None
+
+
+def build_indeed_jobs(records):
+    jobs = []
+    for record in records:
+        job_url = record.get('card_url')
+        job_title = record.get('title')
+        if not job_url or 'rc/clk/dl' not in job_url or job_title is None:
+            continue
+        location = record.get('location')
+        if location is not None:
+            location = location.replace('•', '').replace('\xa0', ' ').strip()
+        jobs.append(ParsedJob(
+            title=job_title,
+            company_name=record.get('company_name'),
+            location=location,
+            salary=record.get('salary'),
+            job_url=job_url,
+            job_description_snippet=record.get('job_description_snippet'),
+            job_type=determine_job_type(location),
+            experience_level=determine_experience_level(job_title),
+        ))
+    return jobs
+
+
+# LinkedIn
+
+def compile_linkedin_plan(html_content):
+    """
+    Builds an ExtractionPlan from the first complete card of a LinkedIn alert (see parse_linkedin_email).
+    """
+    soup = BeautifulSoup(html_content, 'html.parser')
+    for entry in soup.find_all('td', attrs={'data-test-id': 'job-card'}):
+        job_title_tag = entry.select_one('a.font-bold.text-md')
+        if not job_title_tag or not job_title_tag.has_attr('href'):
+            continue
+
+        title_step = tag_pattern('a', job_title_tag, ['class'], capture='href')
+        fields = {
+            'title': FieldRule([title_step], 'a'),
+            'job_url': FieldRule([title_step], 'a', attr='href'),
+        }
+        company_location_tag = entry.find('p', class_=lambda x: x and 'text-system-gray-100' in x)
+        if company_location_tag:
+            fields['company_location'] = FieldRule([tag_pattern('p', company_location_tag, ['class'])], 'p')
+
+        return ExtractionPlan(tag_pattern('td', entry, ['data-test-id']), 'td', fields, build_linkedin_jobs)
+    return None
+
+
+def build_linkedin_jobs(records):
+    jobs = []
+    for record in records:
+        job_title = record.get('title')
+        job_url = record.get('job_url')
+        if job_title is None or job_url is None:
+            continue
+        # Ensure the URL is absolute
+        if not job_url.startswith('http'):
+            job_url = 'https://www.linkedin.com' + job_url
+
+        company_name = None
+        location = None
+        text = record.get('company_location')
+        if text is not None:
+            company_name = text
+            # Split the text into company and location based on the '·' separator
+            if '·' in text:
+                parts = [part.strip() for part in text.split('·')]
+                company_name = parts[0]
+                location = '·'.join(parts[1:]).strip()
+
+        jobs.append(ParsedJob(
+            title=job_title,
+            company_name=company_name,
+            location=location,
+            job_url=job_url,
+            experience_level=determine_experience_level(job_title),
+            job_type=determine_job_type(location),
+        ))
+    return jobs
+
+
+class PlannedParser:
+    """
+    Alert parser that applies the compiled plan for an email's template variant, learning plans
+    for new variants from the generic parser. Call it like the generic parser.
+    """
+
+    def __init__(self, provider, generic_parser, compile_plan):
+        self.provider = provider
+        self.generic_parser = generic_parser
+        self.compile_plan = compile_plan
+        # fingerprint -> ExtractionPlan, or None if no plan reproduces the generic output; least recently used first
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'planned': 0, 'fallbacks': 0, 'unknown': 0, 'evictions': 0}
+
+    def __call__(self, html_content):
+        fingerprint = compute_fingerprint(html_content)
+        with self._lock:
+            known = fingerprint in self._plans
+            plan = self._plans.get(fingerprint)
+            if known:
+                self._plans.move_to_end(fingerprint)
+
+        if known:
+            if plan is not None:
+                jobs = plan.extract(html_content)
+                if jobs:
+                    self._count('planned')
+                    return jobs
+            # No plan for this variant, or the plan found nothing (possible template drift)
+            self._count('fallbacks')
+            return self.generic_parser(html_content)
+
+        self._count('unknown')
+        logger.warning(f"Unknown {self.provider} alert template {fingerprint}; parsing with the generic parser")
+        jobs = self.generic_parser(html_content)
+        self._learn(fingerprint, html_content, jobs)
+        return jobs
+
+    def _learn(self, fingerprint, html_content, jobs):
+        if not jobs:
+            # Nothing to check a plan against yet; try again on the next email with this template
+            return
+        try:
+            plan = self.compile_plan(html_content)
+            if plan is not None and plan.extract(html_content) != jobs:
+                logger.warning(
+                    f"Compiled plan for {self.provider} template {fingerprint} does not match the "
+                    f"generic parser; emails with this template will use the generic parser"
+                )
+                plan = None
+        except Exception as e:
+            logger.error(f"Could not compile a plan for {self.provider} template {fingerprint}: {e}")
+            plan = None
+
+        with self._lock:
+            self._plans[fingerprint] = plan
+            # Forget the least recently seen variant rather than relearning every new one on each email
+            while len(self._plans) > MAX_VARIANTS:
+                self._plans.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(
+                self._stats,
+                variants=len(self._plans),
+                planned_variants=sum(plan is not None for plan in self._plans.values()),
+            )
+
+    def reset(self):
+        with self._lock:
+            self._plans.clear()
+            for name in self._stats:
+                self._stats[name] = 0
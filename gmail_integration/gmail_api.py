@@ -0,0 +1,262 @@
+import json
+import logging
+import threading
+import time
+from itertools import islice
+import httplib2
+from django.conf import settings
+from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.errors import HttpError
+
+logger = logging.getLogger('gmail_integration')
+
+_discovery_document = None
+_discovery_lock = threading.Lock()
+_thread_local = threading.local()
+
+# Gmail rejects batches larger than 100 calls and starts rate limiting well before that.
+MAX_BATCH_SIZE = 100
+DEFAULT_BATCH_SIZE = 50
+# messages().list() returns at most 500 IDs per page
+MAX_LIST_PAGE_SIZE = 500
+DEFAULT_BATCH_RETRIES = 2
+# Seconds before the first retry of rate limited / failed batch items, doubled on each retry
+DEFAULT_BATCH_RETRY_DELAY = 1.0
+
+
+def get_discovery_document():
+    """
+    Returns the Gmail v1 discovery document, parsed once per process.
+    Uses the static copy bundled with google-api-python-client, so no network call is made.
+    """
+    global _discovery_document
+    if _discovery_document is None:
+        with _discovery_lock:
+            if _discovery_document is None:
+                content = get_static_doc('gmail', 'v1')
+                if content is None:
+                    raise RuntimeError("Static Gmail discovery document is not bundled with googleapiclient")
+                _discovery_document = json.loads(content)
+    return _discovery_document
+
+
+def get_shared_http():
+    """
+    Returns this thread's httplib2.Http, so keep-alive connections to Gmail are reused across
+    requests and tokens. httplib2.Http is not thread safe, so there is one per thread rather than
+    one per process.
+    """
+    http = getattr(_thread_local, 'http', None)
+    if http is None:
+        http = httplib2.Http(timeout=getattr(settings, 'GMAIL_HTTP_TIMEOUT', None))
+        _thread_local.http = http
+    return http
+
+
+def get_gmail_service(access_token):
+    """
+    Returns a Gmail API client for the given access token.
+    Replaces build('gmail', 'v1', credentials=creds): the discovery document is parsed once per
+    process and the per-token client only wraps the shared connection pool with the token.
+    """
+    creds = Credentials(token=access_token)
+    http = AuthorizedHttp(creds, http=get_shared_http())
+    return build_from_document(get_discovery_document(), http=http)
+
+
+def get_batch_size(batch_size=None):
+    """
+    Resolves the batch size to use for Gmail batch requests.
+    Falls back to settings.GMAIL_BATCH_SIZE and clamps to the Gmail limit.
+    """
+    if batch_size is None:
+        batch_size = getattr(settings, 'GMAIL_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    return max(1, min(int(batch_size), MAX_BATCH_SIZE))
+
+
+def is_retryable_error(error):
+    """
+    Rate limiting (429) and Gmail server errors (5xx) are worth retrying; anything else
+    (deleted message, permission error, ...) will fail again.
+    """
+    return isinstance(error, HttpError) and (error.resp.status == 429 or error.resp.status >= 500)
+
+
+def batch_get_messages(service, message_ids, msg_format='full', metadata_headers=None, batch_size=None, http=None,
+                       max_retries=None, retry_delay=None):
+    """
+    Fetches Gmail messages with batch HTTP requests instead of one messages().get() per message.
+    Items that fail with a retryable error (see is_retryable_error) are fetched again in a new
+    batch, with exponential backoff, up to max_retries times.
+    Args:
+        service: Gmail API client (googleapiclient Resource).
+        message_ids (list of str): IDs returned by messages().list().
+        msg_format (str): Gmail message format ('full', 'metadata', 'minimal', 'raw').
+        metadata_headers (list of str): Headers to return when msg_format is 'metadata'.
+        batch_size (int): Max calls per batch request (defaults to settings.GMAIL_BATCH_SIZE).
+        http: Optional httplib2.Http-like transport, mainly for tests (e.g. HttpMockSequence).
+        max_retries (int): Retry rounds for failed items (defaults to settings.GMAIL_BATCH_RETRIES).
+        retry_delay (float): Seconds before the first retry (defaults to settings.GMAIL_BATCH_RETRY_DELAY).
+    Returns:
+        tuple: (list of dict: the fetched messages, in the same order as message_ids,
+                list of str: IDs that could not be fetched, logged and left out of the messages)
+    """
+    # Duplicate request IDs are rejected by the batch, and we only need each message once
+    message_ids = list(dict.fromkeys(message_ids))
+    if not message_ids:
+        return [], []
+
+    batch_size = get_batch_size(batch_size)
+    if max_retries is None:
+        max_retries = getattr(settings, 'GMAIL_BATCH_RETRIES', DEFAULT_BATCH_RETRIES)
+    if retry_delay is None:
+        retry_delay = getattr(settings, 'GMAIL_BATCH_RETRY_DELAY', DEFAULT_BATCH_RETRY_DELAY)
+    fetched = {}
+    errors = {}
+
+    def on_response(request_id, response, exception):
+        if exception is not None:
+            # One bad message (deleted, permission error, etc) should not fail the whole batch
+            errors[request_id] = exception
+            return
+        errors.pop(request_id, None)
+        fetched[request_id] = response
+
+    messages_api = service.users().messages()
+    pending_ids = message_ids
+    for attempt in range(max_retries + 1):
+        if attempt:
+            time.sleep(retry_delay * 2 ** (attempt - 1))
+        for start in range(0, len(pending_ids), batch_size):
+            batch = service.new_batch_http_request(callback=on_response)
+            for message_id in pending_ids[start:start + batch_size]:
+                if msg_format == 'metadata' and metadata_headers:
+                    request = messages_api.get(userId='me', id=message_id, format=msg_format, metadataHeaders=metadata_headers)
+                else:
+                    request = messages_api.get(userId='me', id=message_id, format=msg_format)
+                batch.add(request, request_id=message_id)
+            batch.execute(http=http)
+        pending_ids = [message_id for message_id, error in errors.items() if is_retryable_error(error)]
+        if not pending_ids:
+            break
+        if attempt < max_retries:
+            logger.info(f"Retrying {len(pending_ids)} Gmail messages after rate limiting / server errors")
+
+    failed_ids = [message_id for message_id in message_ids if message_id in errors]
+    for message_id in failed_ids:
+        logger.warning(f"Failed to fetch Gmail message {message_id}: {errors[message_id]}")
+    return [fetched[message_id] for message_id in message_ids if message_id in fetched], failed_ids
+
+
+def build_sender_query(senders, newer_than_days=None):
+    """
+    Builds a single Gmail search query covering all senders, e.g. 'from:(a OR b) newer_than:14d'.
+    """
+    senders = list(senders)
+    if len(senders) == 1:
+        query = f"from:{senders[0]}"
+    else:
+        query = f"from:({' OR '.join(senders)})"
+    if newer_than_days:
+        query += f" newer_than:{int(newer_than_days)}d"
+    return query
+
+
+def iter_message_ids(service, query, limit=None, page_size=None, http=None):
+    """
+    Lazily yields message IDs matching `query`, following nextPageToken as IDs are consumed,
+    so callers can start fetching the first messages before the listing has finished.
+    Args:
+        query (str): Gmail search query (see build_sender_query).
+        limit (int): Stop after this many IDs (None lists every matching message).
+        page_size (int): IDs per messages().list() call (defaults to `limit`, capped at 500).
+    """
+    if page_size is None:
+        page_size = limit or MAX_LIST_PAGE_SIZE
+    page_size = max(1, min(page_size, MAX_LIST_PAGE_SIZE))
+
+    yielded = 0
+    page_token = None
+    while True:
+        if limit is not None:
+            page_size = min(page_size, limit - yielded)
+        response = service.users().messages().list(
+            userId='me',
+            q=query,
+            maxResults=page_size,
+            pageToken=page_token,
+        ).execute(http=http)
+        for message in response.get('messages', []):
+            yield message['id']
+            yielded += 1
+            if limit is not None and yielded >= limit:
+                return
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            return
+
+
+def iter_chunks(iterable, size):
+    """
+    Yields lists of up to `size` items from `iterable` without consuming it ahead of time.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def get_current_history_id(service, http=None):
+    """
+    Returns the mailbox's current historyId (a single, cheap getProfile call).
+    """
+    profile = service.users().getProfile(userId='me').execute(http=http)
+    return profile['historyId']
+
+
+def list_history_message_ids(service, start_history_id, limit=None, http=None):
+    """
+    Lists the IDs of messages added to the mailbox since `start_history_id`.
+    With no new mail this is a single history().list() call.
+    Args:
+        limit (int): Stop listing once this many IDs are collected (None lists the whole delta).
+                     The listing ends on a history record boundary, so a few more IDs may be returned.
+    Returns:
+        tuple: (list of message IDs in the order they were added,
+                historyId to continue from: the mailbox's latest, or the last record listed if the limit cut the listing short)
+    Raises:
+        HttpError: 404 when the cursor is too old for Gmail to answer (see is_history_expired).
+    """
+    message_ids = {}
+    history_id = start_history_id
+    page_token = None
+    while True:
+        response = service.users().history().list(
+            userId='me',
+            startHistoryId=start_history_id,
+            historyTypes='messageAdded',
+            pageToken=page_token,
+        ).execute(http=http)
+        for record in response.get('history', []):
+            if limit is not None and len(message_ids) >= limit:
+                return list(message_ids), history_id
+            for added in record.get('messagesAdded', []):
+                message_ids.setdefault(added['message']['id'])
+            history_id = record['id']
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            return list(message_ids), response.get('historyId', history_id)
+        if limit is not None and len(message_ids) >= limit:
+            return list(message_ids), history_id
+
+
+def is_history_expired(error):
+    """
+    Gmail answers history().list() with a 404 once the startHistoryId is no longer available.
+    """
+    return isinstance(error, HttpError) and error.resp.status == 404
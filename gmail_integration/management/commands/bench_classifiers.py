@@ -0,0 +1,84 @@
+import time
+from django.core.management.base import BaseCommand
+from gmail_integration.sample_emails import COMPANIES, LOCATIONS, TITLES
+from gmail_integration.utils import (
+    EXPERIENCE_LEVEL_MAPPING,
+    determine_experience_level,
+    determine_experience_levels,
+    determine_job_type,
+    determine_job_types,
+    experience_level_classifier,
+    job_type_classifier,
+)
+
+# Titles where substring matching and word-boundary matching disagree
+EDGE_TITLES = [
+    "Internal Communications Specialist",
+    "Team Leader, Warehouse",
+    "Software Engineer Internship",
+    "Headcount Planning Analyst",
+    "Entry-Level Accountant",
+]
+
+
+def legacy_experience_level(job_title):
+    # Linear substring scan the classifier replaced
+    job_title_lower = job_title.lower()
+    for keyword, level in EXPERIENCE_LEVEL_MAPPING:
+        if keyword in job_title_lower:
+            return level
+    return "Unknown"
+
+
+def legacy_job_type(location):
+    if not location or location == "N/A":
+        return "Unknown"
+    location_lower = location.lower()
+    if "hybrid remote" in location_lower:
+        return "Hybrid Remote"
+    if "hybrid" in location_lower:
+        return "Hybrid"
+    if "remote" in location_lower or "work from home" in location_lower or "wfh" in location_lower:
+        return "Remote"
+    if "on-site" in location_lower or "on site" in location_lower or "in-office" in location_lower:
+        return "On-site"
+    return "In Person"
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the compiled experience level / job type classifiers against the old substring loops."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help="Titles and locations to classify.")
+        parser.add_argument('--distinct', type=int, default=5000, help="Distinct strings among them.")
+
+    def handle(self, *args, **options):
+        distinct = range(options['distinct'])
+        title_pool = [f"{TITLES[i % len(TITLES)]} {COMPANIES[i // len(TITLES) % len(COMPANIES)]} {i}" for i in distinct]
+        location_pool = [f"{LOCATIONS[i % len(LOCATIONS)]} {i}" for i in distinct]
+        titles = [title_pool[i % len(title_pool)] for i in range(options['rows'])]
+        locations = [location_pool[i % len(location_pool)] for i in range(options['rows'])]
+
+        experience_level_classifier.cache_clear()
+        job_type_classifier.cache_clear()
+        runs = [
+            ("legacy loop", lambda: ([legacy_experience_level(t) for t in titles], [legacy_job_type(l) for l in locations])),
+            ("compiled (cold cache)", lambda: ([determine_experience_level(t) for t in titles], [determine_job_type(l) for l in locations])),
+            ("compiled (warm cache)", lambda: ([determine_experience_level(t) for t in titles], [determine_job_type(l) for l in locations])),
+            ("compiled batch", lambda: (determine_experience_levels(titles), determine_job_types(locations))),
+        ]
+        results = {}
+        for name, run in runs:
+            started = time.perf_counter()
+            results[name] = run()
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"{name:<22} {2 * len(titles) / elapsed:12.0f} strings/sec")
+
+        differences = sum(
+            a != b
+            for legacy, compiled in zip(results["legacy loop"], results["compiled batch"])
+            for a, b in zip(legacy, compiled)
+        )
+        self.stdout.write(f"{differences} classifications differ from the legacy loop on the sample")
+        for title in EDGE_TITLES:
+            self.stdout.write(f"  {title!r}: {legacy_experience_level(title)} -> {determine_experience_level(title)}")
@@ -0,0 +1,34 @@
+import timeit
+from django.core.management.base import BaseCommand
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build
+from gmail_integration.gmail_api import get_gmail_service
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark: build('gmail', 'v1') per call vs the shared Gmail client factory (no network calls)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200, help="Clients to build per strategy.")
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+
+        def build_per_call():
+            build('gmail', 'v1', credentials=Credentials(token='benchmark-token'))
+
+        def shared_factory():
+            get_gmail_service('benchmark-token')
+
+        # Warm the factory once so the one-off discovery parse is not counted per call
+        shared_factory()
+
+        results = [
+            ("build() per call", timeit.timeit(build_per_call, number=iterations)),
+            ("shared factory", timeit.timeit(shared_factory, number=iterations)),
+        ]
+        baseline = results[0][1]
+        for name, total in results:
+            self.stdout.write(
+                f"{name:<18} {total / iterations * 1000:8.3f} ms/client  ({baseline / total:5.1f}x vs build)"
+            )
@@ -0,0 +1,54 @@
+import time
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from gmail_integration.sample_emails import build_indeed_alert_html, build_linkedin_alert_html
+from gmail_integration.services import (
+    DEFAULT_HTML_PARSER,
+    HTML_PARSER_BACKENDS,
+    get_html_parser,
+    parse_indeed_email,
+    parse_linkedin_email,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Checks that every GMAIL_HTML_PARSER backend extracts the same jobs as 'html.parser' "
+        "on sample alert emails, and reports parsing throughput (emails/sec) per backend."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--emails', type=int, default=20, help="Emails to parse per backend and provider.")
+        parser.add_argument('--jobs', type=int, default=60, help="Job cards per email (~2.5 KB each).")
+
+    def handle(self, *args, **options):
+        corpus = {
+            'indeed': (parse_indeed_email, [build_indeed_alert_html(options['jobs'], seed=i) for i in range(options['emails'])]),
+            'linkedin': (parse_linkedin_email, [build_linkedin_alert_html(options['jobs'], seed=i) for i in range(options['emails'])]),
+        }
+
+        # Reference output from the default backend
+        expected = {}
+        with override_settings(GMAIL_HTML_PARSER=DEFAULT_HTML_PARSER):
+            for provider, (parse, emails) in corpus.items():
+                expected[provider] = [parse(html) for html in emails]
+
+        mismatches = 0
+        for backend in HTML_PARSER_BACKENDS:
+            with override_settings(GMAIL_HTML_PARSER=backend):
+                for provider, (parse, emails) in corpus.items():
+                    started = time.perf_counter()
+                    results = [parse(html) for html in emails]
+                    elapsed = time.perf_counter() - started
+
+                    equivalent = results == expected[provider]
+                    mismatches += not equivalent
+                    used = get_html_parser(nested_links=provider == 'indeed')
+                    self.stdout.write(
+                        f"{backend:<12} {provider:<9} (built with {used:<11}) "
+                        f"{len(emails) / elapsed:8.1f} emails/sec  "
+                        f"{'identical' if equivalent else 'DIFFERENT'} output"
+                    )
+
+        if mismatches:
+            self.stderr.write(f"{mismatches} backend/provider combinations differ from {DEFAULT_HTML_PARSER!r}")
@@ -0,0 +1,89 @@
+import base64
+import time
+import tracemalloc
+from django.core.management.base import BaseCommand
+from gmail_integration.mime import decode_part_body, extract_html_body
+
+
+def encode(text, charset='utf-8'):
+    return base64.urlsafe_b64encode(text.encode(charset)).decode('ascii')
+
+
+def build_alert_payload(html_kb, attachment_kb):
+    """
+    Builds a Gmail 'full' payload shaped like a large alert email:
+    multipart/mixed > [multipart/alternative > [text/plain, text/html], inline attachment, remote attachment].
+    """
+    card = '<tr><td style="padding:0 12px 0 0">Acme Corp — Café</td><td>Senior Engineer</td></tr>'
+    html = '<html><body><table>' + card * (html_kb * 1024 // len(card)) + '</table></body></html>'
+    return {
+        'mimeType': 'multipart/mixed',
+        'body': {'size': 0},
+        'parts': [
+            {
+                'mimeType': 'multipart/alternative',
+                'body': {'size': 0},
+                'parts': [
+                    {
+                        'mimeType': 'text/plain',
+                        'headers': [{'name': 'Content-Type', 'value': 'text/plain; charset="UTF-8"'}],
+                        'body': {'data': encode('Acme Corp - Senior Engineer\n' * (html_kb * 1024 // 28))},
+                    },
+                    {
+                        'mimeType': 'text/html',
+                        'headers': [{'name': 'Content-Type', 'value': 'text/html; charset="ISO-8859-1"'}],
+                        'body': {'data': encode(html.replace('—', '-'), 'iso-8859-1')},
+                    },
+                ],
+            },
+            {
+                'mimeType': 'application/pdf',
+                'filename': 'jobs.pdf',
+                'body': {'data': encode('%PDF' + 'x' * attachment_kb * 1024)},
+            },
+            {
+                'mimeType': 'image/png',
+                'filename': 'logo.png',
+                'body': {'attachmentId': 'ANGjdJ8', 'size': attachment_kb * 1024},
+            },
+        ],
+    }
+
+
+def decode_every_part(payload):
+    """Baseline: decode every inline part with UTF-8, then pick the HTML one."""
+    decoded = {}
+    stack = [payload]
+    while stack:
+        part = stack.pop()
+        stack.extend(part.get('parts', []))
+        data = part.get('body', {}).get('data')
+        if data:
+            decoded[part.get('mimeType')] = base64.urlsafe_b64decode(data).decode('utf-8', errors='replace')
+    return decoded.get('text/html')
+
+
+class Command(BaseCommand):
+    help = "Benchmarks MIME body extraction on large multi-part alert emails (time and peak memory)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--emails', type=int, default=50, help="Emails to extract per strategy.")
+        parser.add_argument('--html-kb', type=int, default=300, help="Size of the HTML part in KB.")
+        parser.add_argument('--attachment-kb', type=int, default=500, help="Size of each attachment in KB.")
+
+    def handle(self, *args, **options):
+        payload = build_alert_payload(options['html_kb'], options['attachment_kb'])
+        html_part = payload['parts'][0]['parts'][1]
+        assert extract_html_body(payload) == decode_part_body(html_part)
+
+        for name, extract in [("decode every part", decode_every_part), ("mime walker", extract_html_body)]:
+            tracemalloc.start()
+            started = time.perf_counter()
+            for _ in range(options['emails']):
+                extract(payload)
+            elapsed = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.stdout.write(
+                f"{name:<18} {elapsed / options['emails'] * 1000:8.2f} ms/email  peak {peak / 1024 / 1024:7.2f} MiB"
+            )
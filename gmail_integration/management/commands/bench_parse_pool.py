@@ -0,0 +1,44 @@
+import os
+import time
+from django.core.management.base import BaseCommand
+from gmail_integration.parse_pool import parse_bodies
+from gmail_integration.sample_emails import build_indeed_alert_html, build_linkedin_alert_html
+
+
+class Command(BaseCommand):
+    help = "Measures parse pool scaling from 1 to N worker processes on a corpus of sample alert emails."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--emails', type=int, default=1000, help="Emails in the corpus.")
+        parser.add_argument('--jobs', type=int, default=10, help="Job cards per email.")
+        parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1, help="Largest pool to try.")
+        parser.add_argument('--unordered', action='store_true', help="Collect results as chunks finish.")
+
+    def handle(self, *args, **options):
+        corpus = []
+        for i in range(options['emails']):
+            if i % 2:
+                corpus.append(("alert@indeed.com", build_indeed_alert_html(options['jobs'], seed=i)))
+            else:
+                corpus.append(("jobalerts-noreply@linkedin.com", build_linkedin_alert_html(options['jobs'], seed=i)))
+
+        worker_counts = sorted({1, *[2 ** n for n in range(1, 8) if 2 ** n < options['max_workers']], options['max_workers']})
+        baseline = None
+        expected = None
+        for workers in worker_counts:
+            # Warm the pool first so process start-up is not counted
+            parse_bodies(corpus[:64], workers=workers, min_pool_batch=0, use_cache=False)
+
+            # Bypass the parse cache, or every run after the first would be answered from it
+            started = time.perf_counter()
+            results = parse_bodies(
+                corpus, workers=workers, ordered=not options['unordered'], min_pool_batch=0, use_cache=False
+            )
+            elapsed = time.perf_counter() - started
+
+            baseline = baseline or elapsed
+            expected = expected or results
+            self.stdout.write(
+                f"{workers:>3} workers  {elapsed:7.2f} s  {len(corpus) / elapsed:8.1f} emails/sec  "
+                f"{baseline / elapsed:5.2f}x{'' if results == expected else '  OUTPUT DIFFERS'}"
+            )
@@ -0,0 +1,46 @@
+import time
+import tracemalloc
+from django.core.management.base import BaseCommand
+from gmail_integration.sample_emails import build_indeed_alert_html, build_linkedin_alert_html
+from gmail_integration.services import parse_indeed_email, parse_linkedin_email
+from gmail_integration.streaming import iter_indeed_jobs, iter_linkedin_jobs
+
+PROVIDERS = [
+    ('indeed', build_indeed_alert_html, parse_indeed_email, iter_indeed_jobs),
+    ('linkedin', build_linkedin_alert_html, parse_linkedin_email, iter_linkedin_jobs),
+]
+
+
+class Command(BaseCommand):
+    help = "Compares the BeautifulSoup parsers with the streaming extractors (time, peak memory, output) by email size."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[20, 200, 1000], help="Job cards per email.")
+
+    def handle(self, *args, **options):
+        for provider, build_html, parse_tree, iter_stream in PROVIDERS:
+            for size in options['sizes']:
+                html = build_html(size)
+                expected = parse_tree(html)
+
+                def consume_stream():
+                    # Records are consumed one by one, as an ingest pipeline would
+                    count = 0
+                    for _ in iter_stream(html):
+                        count += 1
+                    return count
+
+                for name, run in [("tree", lambda: parse_tree(html)), ("streaming", consume_stream)]:
+                    tracemalloc.start()
+                    started = time.perf_counter()
+                    run()
+                    elapsed = time.perf_counter() - started
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+                    self.stdout.write(
+                        f"{provider:<9} {len(html) / 1024:8.0f} KB  {name:<10} "
+                        f"{elapsed * 1000:8.1f} ms  peak {peak / 1024 / 1024:7.2f} MiB"
+                    )
+
+                if list(iter_stream(html)) != expected:
+                    self.stderr.write(f"{provider} ({size} jobs): streaming output differs from the tree parser")
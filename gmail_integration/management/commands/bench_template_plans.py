@@ -0,0 +1,44 @@
+import time
+from django.core.management.base import BaseCommand
+from gmail_integration.fingerprints import compute_fingerprint
+from gmail_integration.sample_emails import build_indeed_alert_html, build_linkedin_alert_html
+from gmail_integration.services import parse_indeed_email, parse_linkedin_email, parser_registry
+
+PROVIDERS = [
+    ('indeed', build_indeed_alert_html, parse_indeed_email),
+    ('linkedin', build_linkedin_alert_html, parse_linkedin_email),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the generic parsers with the template-plan parsers (GMAIL_TEMPLATE_PLANS) on sample "
+        "alert emails: output, throughput (emails/sec) and fingerprint/plan counters."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--emails', type=int, default=20, help="Emails to parse per provider.")
+        parser.add_argument('--jobs', type=int, default=60, help="Job cards per email.")
+
+    def handle(self, *args, **options):
+        for provider, build_html, parse_generic in PROVIDERS:
+            emails = [build_html(options['jobs'], seed=i) for i in range(options['emails'])]
+            planned = parser_registry.get(provider).get_parser('planned')
+            planned.reset()
+
+            started = time.perf_counter()
+            expected = [parse_generic(html) for html in emails]
+            generic_elapsed = time.perf_counter() - started
+
+            started = time.perf_counter()
+            results = [planned(html) for html in emails]
+            planned_elapsed = time.perf_counter() - started
+
+            fingerprints = {compute_fingerprint(html) for html in emails}
+            self.stdout.write(
+                f"{provider:<9} generic {len(emails) / generic_elapsed:8.1f} emails/sec  "
+                f"planned {len(emails) / planned_elapsed:8.1f} emails/sec  "
+                f"({len(fingerprints)} fingerprint(s), {planned.stats()})"
+            )
+            if results != expected:
+                self.stderr.write(f"{provider}: template-plan output differs from the generic parser")
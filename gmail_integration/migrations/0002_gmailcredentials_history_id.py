@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-18 10:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gmail_integration", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="gmailcredentials",
+            name="history_id",
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+        migrations.AddField(
+            model_name="gmailcredentials",
+            name="history_synced_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
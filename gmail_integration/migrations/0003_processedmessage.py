@@ -0,0 +1,62 @@
+# Generated by Django 5.1.4 on 2026-10-18 10:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gmail_integration", "0002_gmailcredentials_history_id"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProcessedMessage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("gmail_message_id", models.CharField(max_length=255)),
+                ("parser_version", models.PositiveIntegerField()),
+                (
+                    "outcome",
+                    models.CharField(
+                        choices=[
+                            ("parsed", "Parsed"),
+                            ("no_jobs", "No jobs found"),
+                            ("no_body", "No body"),
+                            ("failed", "Parsing failed"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("job_count", models.PositiveIntegerField(default=0)),
+                ("processed_at", models.DateTimeField(auto_now=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="processed_gmail_messages",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "gmail_message_id"),
+                        name="unique_processed_message_per_user",
+                    )
+                ],
+            },
+        ),
+    ]
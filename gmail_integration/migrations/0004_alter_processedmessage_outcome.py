@@ -0,0 +1,27 @@
+# Generated by Django 5.1.4 on 2026-10-18 10:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gmail_integration", "0003_processedmessage"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="processedmessage",
+            name="outcome",
+            field=models.CharField(
+                choices=[
+                    ("parsed", "Parsed"),
+                    ("no_jobs", "No jobs found"),
+                    ("no_body", "No body"),
+                    ("failed", "Parsing failed"),
+                    ("skipped", "Skipped (no matching parser)"),
+                ],
+                max_length=20,
+            ),
+        ),
+    ]
@@ -0,0 +1,96 @@
+import base64
+import codecs
+import re
+
+CHARSET_RE = re.compile(r'charset\s*=\s*"?([^";\s]+)', re.IGNORECASE)
+DEFAULT_CHARSET = 'utf-8'
+
+
+def get_part_header(part, name):
+    """
+    Returns the value of a MIME part header (case-insensitive), or None.
+    """
+    name = name.lower()
+    for header in part.get('headers', []):
+        if header['name'].lower() == name:
+            return header['value']
+    return None
+
+
+def get_part_charset(part):
+    """
+    Returns the charset declared in the part's Content-Type header, falling back to UTF-8
+    when it is missing or not a codec Python knows.
+    """
+    content_type = get_part_header(part, 'Content-Type')
+    if content_type:
+        match = CHARSET_RE.search(content_type)
+        if match:
+            try:
+                return codecs.lookup(match.group(1)).name
+            except LookupError:
+                pass
+    return DEFAULT_CHARSET
+
+
+def is_attachment(part):
+    """
+    Attachments carry a filename or an attachmentId (their data is not inlined), or are declared
+    with Content-Disposition: attachment. Their contents are never downloaded or decoded.
+    """
+    if part.get('filename') or part.get('body', {}).get('attachmentId'):
+        return True
+    disposition = get_part_header(part, 'Content-Disposition')
+    return bool(disposition) and disposition.lower().startswith('attachment')
+
+
+def decode_part_body(part):
+    """
+    Decodes the base64url data of a single part with its declared charset.
+    Returns:
+        str or None: The decoded text, or None if the part has no inline data.
+    """
+    data = part.get('body', {}).get('data')
+    if not data:
+        return None
+    # Gmail normally pads its base64url data, but tolerate parts that are not padded
+    padding = -len(data) % 4
+    if padding:
+        data += '=' * padding
+    return base64.urlsafe_b64decode(data).decode(get_part_charset(part), errors='replace')
+
+
+def find_html_part(payload):
+    """
+    Walks the MIME tree depth-first (in document order) and returns the first inline text/html
+    part with data, e.g. inside multipart/alternative nested in multipart/mixed.
+    Attachment subtrees are skipped without being decoded.
+    """
+    stack = [payload]
+    while stack:
+        part = stack.pop()
+        if is_attachment(part):
+            continue
+        mime_type = (part.get('mimeType') or '').lower()
+        if mime_type == 'text/html' and part.get('body', {}).get('data'):
+            return part
+        children = part.get('parts')
+        if children:
+            # Reversed so the first child is popped (visited) first
+            stack.extend(reversed(children))
+    return None
+
+
+def extract_html_body(payload):
+    """
+    Extracts the HTML body of a Gmail message payload, decoding only the selected part.
+    Falls back to the top-level body data for single-part messages.
+    Returns:
+        str or None: The decoded body, or None if the message has no usable body.
+    """
+    part = find_html_part(payload)
+    if part is None and payload.get('body', {}).get('data') and not is_attachment(payload):
+        part = payload
+    if part is None:
+        return None
+    return decode_part_body(part)
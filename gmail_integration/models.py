@@ -6,7 +6,45 @@ User = get_user_model()
 class GmailCredentials(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     refresh_token = models.TextField(null=True, blank=True)
+    # Gmail historyId cursor for incremental sync; null until the first full sync completes
+    history_id = models.CharField(max_length=32, null=True, blank=True)
+    history_synced_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"{self.user.email} - Gmail Credentials"
\ No newline at end of file
+        return f"{self.user.email} - Gmail Credentials"
+
+
+class ProcessedMessage(models.Model):
+    """
+    Ledger of Gmail messages already fetched and parsed for a user.
+    Gmail message IDs are immutable, so a message recorded with the current parser version
+    never needs to be downloaded or parsed again.
+    """
+    OUTCOME_PARSED = "parsed"
+    OUTCOME_NO_JOBS = "no_jobs"
+    OUTCOME_NO_BODY = "no_body"
+    OUTCOME_FAILED = "failed"
+    OUTCOME_SKIPPED = "skipped"
+    OUTCOME_CHOICES = [
+        (OUTCOME_PARSED, "Parsed"),
+        (OUTCOME_NO_JOBS, "No jobs found"),
+        (OUTCOME_NO_BODY, "No body"),
+        (OUTCOME_FAILED, "Parsing failed"),
+        (OUTCOME_SKIPPED, "Skipped (no matching parser)"),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="processed_gmail_messages")
+    gmail_message_id = models.CharField(max_length=255)
+    parser_version = models.PositiveIntegerField()
+    outcome = models.CharField(max_length=20, choices=OUTCOME_CHOICES)
+    job_count = models.PositiveIntegerField(default=0)
+    processed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "gmail_message_id"], name="unique_processed_message_per_user"),
+        ]
+
+    def __str__(self):
+        return f"{self.gmail_message_id} ({self.outcome}, v{self.parser_version})"
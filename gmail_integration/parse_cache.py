@@ -0,0 +1,152 @@
+"""
+Parse result cache for alert email bodies.
+
+The same alert HTML is parsed again on re-fetches, for users on shared digests and on retries.
+Results are keyed by a hash of the decoded body, the parser and a parser code version, and kept
+in a bounded in-process LRU with an optional shared tier on a Django cache alias (any backend,
+including the database cache). The key includes PARSER_VERSION and a digest of the parser
+source files, so changing parser code can never serve stale results.
+"""
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger('gmail_integration')
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_TIMEOUT = 7 * 24 * 60 * 60
+# Modules whose code decides parse output
+PARSER_SOURCE_FILES = ('services.py', 'streaming.py', 'fingerprints.py', 'registry.py', 'records.py', 'canonical.py', 'utils.py')
+
+_code_digest = None
+
+
+def get_parser_code_digest():
+    """
+    Returns a short digest of the parser source files, computed once per process.
+    """
+    global _code_digest
+    if _code_digest is None:
+        digest = hashlib.sha256()
+        package_dir = Path(__file__).resolve().parent
+        for name in PARSER_SOURCE_FILES:
+            digest.update((package_dir / name).read_bytes())
+        _code_digest = digest.hexdigest()[:12]
+    return _code_digest
+
+
+class ParseCache:
+    """
+    Two-tier cache of (jobs, outcome) parse results with hit/miss counters.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, cache_alias=None, timeout=DEFAULT_TIMEOUT):
+        self.max_entries = max_entries
+        self.cache_alias = cache_alias
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0, 'evictions': 0}
+
+    def make_key(self, parser_key, parser_version, body):
+        body_digest = hashlib.sha256(body.encode('utf-8', errors='surrogatepass')).hexdigest()
+        return f"gmail-parse:{parser_key}:v{parser_version}:{get_parser_code_digest()}:{body_digest}"
+
+    def get(self, key):
+        """
+        Returns the cached (jobs, outcome) for `key`, or None.
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self._stats['local_hits'] += 1
+                return _copy_result(value)
+
+        shared = self._shared_cache()
+        if shared is not None:
+            try:
+                value = shared.get(key)
+            except Exception as e:
+                logger.warning(f"Parse cache lookup failed: {e}")
+                value = None
+            if value is not None:
+                self._store_local(key, value)
+                with self._lock:
+                    self._stats['shared_hits'] += 1
+                return _copy_result(value)
+
+        with self._lock:
+            self._stats['misses'] += 1
+        return None
+
+    def set(self, key, value):
+        value = _copy_result(value)
+        self._store_local(key, value)
+        shared = self._shared_cache()
+        if shared is not None:
+            try:
+                shared.set(key, value, self.timeout)
+            except Exception as e:
+                logger.warning(f"Parse cache store failed: {e}")
+
+    def clear(self):
+        """
+        Empties the in-process tier and resets the counters (the shared tier expires on its own).
+        """
+        with self._lock:
+            self._entries.clear()
+            for name in self._stats:
+                self._stats[name] = 0
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, size=len(self._entries), max_entries=self.max_entries)
+        lookups = stats['local_hits'] + stats['shared_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['local_hits'] + stats['shared_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def _store_local(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def _shared_cache(self):
+        return caches[self.cache_alias] if self.cache_alias else None
+
+
+def _copy_result(value):
+    # Callers may modify the jobs they get back, so never hand out the cached ones
+    jobs, outcome = value
+    return [job.copy() for job in jobs], outcome
+
+
+_parse_cache = None
+_parse_cache_lock = threading.Lock()
+
+
+def get_parse_cache():
+    """
+    Returns the process-wide ParseCache configured from settings:
+    GMAIL_PARSE_CACHE_SIZE (LRU entries, 0 disables it), GMAIL_PARSE_CACHE_ALIAS (Django cache
+    alias for the shared tier, None disables it) and GMAIL_PARSE_CACHE_TIMEOUT (seconds).
+    """
+    global _parse_cache
+    if _parse_cache is None:
+        with _parse_cache_lock:
+            if _parse_cache is None:
+                _parse_cache = ParseCache(
+                    max_entries=getattr(settings, 'GMAIL_PARSE_CACHE_SIZE', DEFAULT_MAX_ENTRIES),
+                    cache_alias=getattr(settings, 'GMAIL_PARSE_CACHE_ALIAS', None),
+                    timeout=getattr(settings, 'GMAIL_PARSE_CACHE_TIMEOUT', DEFAULT_TIMEOUT),
+                )
+    return _parse_cache
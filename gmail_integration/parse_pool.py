@@ -0,0 +1,144 @@
+"""
+Process-pool parsing stage for alert email bodies.
+
+Parsing is CPU-bound, so large batches (backfills, multi-user syncs) are sent to a warm pool
+of worker processes instead of running serially in the request thread. Small batches are
+parsed in-process, where pickling bodies across processes would cost more than it saves.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from gmail_integration.models import ProcessedMessage
+from gmail_integration.parse_cache import get_parse_cache
+from gmail_integration.parse_worker import init_worker, parse_chunk
+from gmail_integration.services import PARSER_VERSION, get_parser_key, has_parser, parse_email_body_with_outcome
+
+logger = logging.getLogger('gmail_integration')
+
+DEFAULT_MIN_POOL_BATCH = 16
+DEFAULT_CHUNK_SIZE = 8
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_worker_count(workers=None):
+    if workers is None:
+        workers = getattr(settings, 'GMAIL_PARSE_WORKERS', None) or os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def get_parse_pool(workers=None):
+    """
+    Returns the warm process pool for `workers` processes, creating it on first use.
+    """
+    workers = get_worker_count(workers)
+    pool = _pools.get(workers)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(workers)
+            if pool is None:
+                # Workers are spawned rather than forked, which is unsafe with open DB connections and
+                # the fetch threads, so each one sets Django up again (parse_worker.init_worker)
+                pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=init_worker,
+                )
+                _pools[workers] = pool
+    return pool
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def iter_parsed_bodies(bodies, workers=None, chunksize=None, ordered=True, min_pool_batch=None, use_cache=True):
+    """
+    Parses alert email bodies, in worker processes for large batches.
+    Args:
+        bodies (list of tuple): (from_email, body) pairs.
+        workers (int): Pool size (defaults to settings.GMAIL_PARSE_WORKERS, then the CPU count).
+        chunksize (int): Bodies sent to a worker per task (settings.GMAIL_PARSE_CHUNK_SIZE).
+        ordered (bool): Yield results in input order; otherwise as soon as each chunk finishes.
+        min_pool_batch (int): Batches smaller than this are parsed in-process
+                              (settings.GMAIL_PARSE_POOL_MIN_BATCH).
+        use_cache (bool): Look up and store results in the parse cache (see parse_cache.py).
+    Yields:
+        tuple: (index into `bodies`, list of ParsedJob, ProcessedMessage outcome)
+    """
+    items = [(index, from_email, body) for index, (from_email, body) in enumerate(bodies)]
+    if min_pool_batch is None:
+        min_pool_batch = getattr(settings, 'GMAIL_PARSE_POOL_MIN_BATCH', DEFAULT_MIN_POOL_BATCH)
+    workers = get_worker_count(workers)
+
+    if workers == 1 or len(items) < min_pool_batch:
+        for index, from_email, body in items:
+            yield (index, *parse_email_body_with_outcome(from_email, body, use_cache=use_cache))
+        return
+    if not use_cache:
+        yield from _parse_in_pool(items, workers, chunksize, ordered)
+        return
+
+    # Serve cache hits here so only uncached bodies are shipped to workers
+    cache = get_parse_cache()
+    cache_keys = {}
+    pending = []
+    for index, from_email, body in items:
+        if body and has_parser(from_email):
+            cache_key = cache.make_key(get_parser_key(from_email), PARSER_VERSION, body)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                yield (index, *cached)
+                continue
+            cache_keys[index] = cache_key
+        pending.append((index, from_email, body))
+
+    for index, jobs, outcome in _parse_in_pool(pending, workers, chunksize, ordered):
+        if index in cache_keys and outcome != ProcessedMessage.OUTCOME_FAILED:
+            cache.set(cache_keys[index], (jobs, outcome))
+        yield index, jobs, outcome
+
+
+def _parse_in_pool(items, workers, chunksize, ordered):
+    if not items:
+        return
+    if chunksize is None:
+        chunksize = getattr(settings, 'GMAIL_PARSE_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+    pool = get_parse_pool(workers)
+    chunks = list(_chunks(items, max(1, chunksize)))
+
+    done = set()
+    try:
+        if ordered:
+            for results in pool.map(parse_chunk, chunks):
+                for result in results:
+                    done.add(result[0])
+                    yield result
+        else:
+            futures = [pool.submit(parse_chunk, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                for result in future.result():
+                    done.add(result[0])
+                    yield result
+    except BrokenProcessPool as e:
+        # A worker died; drop the pool so the next batch gets a fresh one, and finish in-process
+        logger.error(f"Parse pool with {workers} workers broke ({e}); parsing the rest in-process")
+        with _pools_lock:
+            _pools.pop(workers, None)
+        yield from parse_chunk([item for item in items if item[0] not in done])
+
+
+def parse_bodies(bodies, **kwargs):
+    """
+    Same as iter_parsed_bodies, but returns a list of (jobs, outcome) in input order.
+    """
+    results = [None] * len(bodies)
+    for index, jobs, outcome in iter_parsed_bodies(bodies, **kwargs):
+        results[index] = (jobs, outcome)
+    return results
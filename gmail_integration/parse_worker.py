@@ -0,0 +1,24 @@
+"""
+Entry points for parse pool worker processes (see parse_pool.py).
+
+Spawned workers import this module before Django is set up, so it must not import models
+(directly or through services) at module level.
+"""
+
+
+def init_worker():
+    import django
+    django.setup()
+
+
+def parse_chunk(chunk):
+    """
+    Parses [(index, from_email, body), ...] and returns [(index, jobs, outcome), ...].
+    The parse cache is checked and filled by the parent process, not by workers.
+    """
+    from gmail_integration.services import parse_email_body_with_outcome
+
+    return [
+        (index, *parse_email_body_with_outcome(from_email, body, use_cache=False))
+        for index, from_email, body in chunk
+    ]
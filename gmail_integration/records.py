@@ -0,0 +1,128 @@
+"""
+ParsedJob: the record a parsed alert job travels in, from the parsers to the JobPosting table.
+
+A slotted class instead of per-job dicts: no per-instance __dict__, attribute access instead
+of .get() lookups, and missing fields are None rather than placeholder strings like "N/A".
+"""
+from django.utils.dateparse import parse_datetime
+
+# Fields the alert parsers fill in; always present in to_dict() output
+PARSED_FIELDS = (
+    'title',
+    'company_name',
+    'location',
+    'salary',
+    'job_url',
+    'job_description_snippet',
+    'job_type',
+    'experience_level',
+    'source',
+    'canonical_job_id',
+)
+# Fields added by the client or the ingest path before saving
+EXTRA_FIELDS = (
+    'company_url',
+    'company_logo_url',
+    'employment_type',
+    'date_posted',
+    'application_deadline',
+    'benefits',
+    'summary',
+    'industries',
+    'skills',
+    'status',
+    'match_score',
+    'gmail_message_id',
+    'gmail_thread_id',
+    'fetched_at',
+)
+DATETIME_FIELDS = ('date_posted', 'application_deadline', 'fetched_at')
+# Derived from job_url on the server (see canonical.assign_job_identity), never taken from clients:
+# a forged canonical_job_id could overwrite another posting of the user
+IDENTITY_FIELDS = ('source', 'canonical_job_id')
+# Placeholders older parsers and clients send for missing values
+PLACEHOLDER_VALUES = frozenset(["N/A", "Description unavailable..."])
+
+
+class ParsedJob:
+    """
+    One job extracted from an alert email. Unknown fields are None.
+    """
+    __slots__ = PARSED_FIELDS + EXTRA_FIELDS
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.pop(name, None))
+        if fields:
+            raise TypeError(f"Unknown ParsedJob fields: {', '.join(sorted(fields))}")
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Builds a record from a JSON job dict (e.g. posted back by the client). Unknown keys and
+        IDENTITY_FIELDS are ignored, placeholders become None and ISO datetimes are parsed (invalid
+        ones, and values that aren't strings, become None).
+        """
+        job = cls.__new__(cls)
+        for name in cls.__slots__:
+            value = data.get(name)
+            if name in IDENTITY_FIELDS:
+                value = None
+            elif name in DATETIME_FIELDS:
+                value = _parse_datetime(value)
+            elif isinstance(value, str) and value in PLACEHOLDER_VALUES:
+                value = None
+            setattr(job, name, value)
+        return job
+
+    def to_dict(self):
+        """
+        Returns a JSON-ready dict: every parsed field, plus the extra fields that are set.
+        """
+        data = {name: getattr(self, name) for name in PARSED_FIELDS}
+        for name in EXTRA_FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                data[name] = value.isoformat() if name in DATETIME_FIELDS else value
+        return data
+
+    def to_model(self, user, **overrides):
+        """
+        Returns an unsaved JobPosting for `user`. `overrides` replace field values.
+        """
+        from job_postings.models import JobPosting
+
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        fields.update(overrides)
+        return JobPosting(user=user, **fields)
+
+    def copy(self):
+        job = ParsedJob.__new__(ParsedJob)
+        for name in self.__slots__:
+            setattr(job, name, getattr(self, name))
+        return job
+
+    def __eq__(self, other):
+        if not isinstance(other, ParsedJob):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    def __repr__(self):
+        return f"<ParsedJob {self.title!r} at {self.company_name!r}>"
+
+
+def _parse_datetime(value):
+    if not isinstance(value, str):
+        return None
+    try:
+        return parse_datetime(value)
+    except ValueError:
+        # Well formed but not a real date, e.g. "2024-02-30T00:00:00Z"
+        return None
@@ -0,0 +1,190 @@
+"""
+Registry of alert email parsers, keyed by sender address or domain.
+
+Each source registers a ParserSpec with its sender addresses and/or domains, a version and one
+callable per parser mode it supports. Lookups go through dicts built at registration time
+(exact address first, then the sender's domain and its parent domains), so adding a source
+never touches the fetch views. Every spec keeps its own counters, so the hot parser shows up in
+ParserRegistry.stats().
+"""
+import bisect
+import threading
+
+PARSER_MODES = ('tree', 'streaming', 'planned')
+DEFAULT_MODE = 'tree'
+# Upper bounds (ms) of the parse time histogram buckets; the last bucket is unbounded
+PARSE_TIME_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+def get_sender_domains(address):
+    """
+    Returns the domain of an address and its parent domains, most specific first
+    ('alerts@mail.glassdoor.com' -> ['mail.glassdoor.com', 'glassdoor.com']).
+    """
+    domain = address.rpartition('@')[2].lower()
+    labels = domain.split('.')
+    return ['.'.join(labels[index:]) for index in range(len(labels) - 1)]
+
+
+def sender_matches(address, senders):
+    """
+    Returns True if `address` is one of `senders`, or its domain (or a parent domain) is.
+    """
+    address = address.lower()
+    return address in senders or any(domain in senders for domain in get_sender_domains(address))
+
+
+class ParserMetrics:
+    """
+    Per-parser counters: invocations, jobs emitted, failures and a parse time histogram.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.invocations = 0
+            self.jobs = 0
+            self.failures = 0
+            self.total_ms = 0.0
+            self.histogram = [0] * (len(PARSE_TIME_BUCKETS_MS) + 1)
+
+    def record(self, elapsed, job_count=0, failed=False):
+        """
+        Records one parser call that took `elapsed` seconds.
+        """
+        elapsed_ms = elapsed * 1000
+        bucket = bisect.bisect_left(PARSE_TIME_BUCKETS_MS, elapsed_ms)
+        with self._lock:
+            self.invocations += 1
+            self.jobs += job_count
+            self.failures += failed
+            self.total_ms += elapsed_ms
+            self.histogram[bucket] += 1
+
+    def snapshot(self):
+        with self._lock:
+            labels = [f"<={bound}ms" for bound in PARSE_TIME_BUCKETS_MS] + [f">{PARSE_TIME_BUCKETS_MS[-1]}ms"]
+            return {
+                'invocations': self.invocations,
+                'jobs': self.jobs,
+                'failures': self.failures,
+                'total_ms': round(self.total_ms, 3),
+                'mean_ms': round(self.total_ms / self.invocations, 3) if self.invocations else 0.0,
+                'parse_time_histogram': dict(zip(labels, self.histogram)),
+            }
+
+
+class ParserSpec:
+    """
+    An alert email source.
+    Args:
+        name (str): Short source name, e.g. 'indeed'.
+        version (int): Bump when this parser's output changes (part of the parse cache key).
+        source (str): JobPosting.source of the jobs it parses, e.g. 'Indeed'.
+        parsers (dict): Parser mode ('tree', 'streaming' or 'planned') -> callable taking the HTML body
+                        and returning (or yielding) ParsedJob records. 'tree' is required.
+        senders (list of str): Sender addresses handled by this source.
+        domains (list of str): Sender domains handled by this source (subdomains included).
+    """
+
+    def __init__(self, name, version, source, parsers, senders=(), domains=()):
+        if DEFAULT_MODE not in parsers:
+            raise ValueError(f"Parser {name!r} must provide a {DEFAULT_MODE!r} parser")
+        unknown_modes = set(parsers) - set(PARSER_MODES)
+        if unknown_modes:
+            raise ValueError(f"Parser {name!r} has unknown modes: {sorted(unknown_modes)}")
+        if not senders and not domains:
+            raise ValueError(f"Parser {name!r} must match at least one sender address or domain")
+        self.name = name
+        self.version = version
+        self.source = source
+        self.parsers = dict(parsers)
+        self.senders = tuple(sender.lower() for sender in senders)
+        self.domains = tuple(domain.lower() for domain in domains)
+        self.capabilities = frozenset(self.parsers)
+        self.metrics = ParserMetrics()
+
+    def get_parser(self, mode=DEFAULT_MODE):
+        """
+        Returns the parser for `mode`, or the tree parser if this source doesn't support it.
+        """
+        return self.parsers.get(mode) or self.parsers[DEFAULT_MODE]
+
+    def get_mode(self, mode=DEFAULT_MODE):
+        return mode if mode in self.capabilities else DEFAULT_MODE
+
+    def __repr__(self):
+        return f"<ParserSpec {self.name} v{self.version}>"
+
+
+class ParserRegistry:
+    """
+    Maps sender addresses and domains to ParserSpecs.
+    """
+
+    def __init__(self):
+        self._specs = {}
+        self._by_sender = {}
+        self._by_domain = {}
+
+    def register(self, spec):
+        """
+        Adds a source. Raises ValueError if its name, or any of its addresses or domains, is taken.
+        """
+        if spec.name in self._specs:
+            raise ValueError(f"A parser named {spec.name!r} is already registered")
+        for sender in spec.senders:
+            if sender in self._by_sender:
+                raise ValueError(f"Sender {sender!r} is already handled by {self._by_sender[sender].name!r}")
+        for domain in spec.domains:
+            if domain in self._by_domain:
+                raise ValueError(f"Domain {domain!r} is already handled by {self._by_domain[domain].name!r}")
+
+        self._specs[spec.name] = spec
+        self._by_sender.update(dict.fromkeys(spec.senders, spec))
+        self._by_domain.update(dict.fromkeys(spec.domains, spec))
+        return spec
+
+    def lookup(self, from_email):
+        """
+        Returns the ParserSpec for a sender address, or None.
+        """
+        if not from_email:
+            return None
+        from_email = from_email.lower()
+        spec = self._by_sender.get(from_email)
+        if spec is None and self._by_domain:
+            for domain in get_sender_domains(from_email):
+                spec = self._by_domain.get(domain)
+                if spec is not None:
+                    break
+        return spec
+
+    def get(self, name):
+        return self._specs[name]
+
+    def specs(self):
+        return list(self._specs.values())
+
+    def sender_patterns(self):
+        """
+        Returns every registered sender address and domain, usable as Gmail 'from:' terms.
+        """
+        return [*self._by_sender, *self._by_domain]
+
+    def stats(self):
+        """
+        Returns each source's version, capabilities and counters, keyed by name.
+        """
+        return {
+            spec.name: {
+                'version': spec.version,
+                'source': spec.source,
+                'capabilities': sorted(spec.capabilities),
+                **spec.metrics.snapshot(),
+            }
+            for spec in self._specs.values()
+        }
@@ -0,0 +1,86 @@
+"""
+Synthetic Indeed and LinkedIn job alert emails shaped like the real templates.
+Used by the benchmark management commands to check and measure the parsers without live Gmail data.
+"""
+
+TITLES = [
+    "Senior Python Developer",
+    "Junior Data Analyst",
+    "Software Engineer Intern",
+    "Lead Backend Engineer",
+    "Product Manager",
+    "Associate Consultant",
+]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Health", "Hooli", "Stark Industries"]
+LOCATIONS = ["Toronto, ON", "Vancouver, BC", "Remote", "Hybrid remote in Calgary, AB", "Montréal, QC", "On-site in Ottawa, ON"]
+
+
+def _pick(values, index):
+    return values[index % len(values)]
+
+
+def build_indeed_alert_html(job_count=20, seed=0):
+    """
+    Returns the HTML body of an Indeed job alert email with `job_count` job cards.
+    """
+    cards = []
+    for i in range(seed, seed + job_count):
+        job_key = f"{i:016x}"
+        url = f"https://ca.indeed.com/rc/clk/dl?jk={job_key}&from=ja&qd=q{i}&rd=r{i}&tk=1ik{i}&alid=3&bb=b{i}"
+        cards.append(
+            f'<tr><td style="padding:0 24px 24px">'
+            f'<a href="{url}" style="color:#2d2d2d;text-decoration:none" target="_blank">'
+            f'<table role="presentation" width="100%" cellpadding="0" cellspacing="0">'
+            f'<tr><td style="padding:0 0 4px"><h2 style="margin:0;font-size:16px;line-height:24px">'
+            f'<a href="{url}" style="color:#2557a7">{_pick(TITLES, i)}</a></h2></td></tr>'
+            f'<tr><td><table role="presentation" cellpadding="0" cellspacing="0"><tr>'
+            f'<td style="padding:0 12px 0 0">{_pick(COMPANIES, i)}</td>'
+            f'</tr></table></td></tr>'
+            f'<tr><td style="padding:0;font-size:14px;line-height:21px;color:#2d2d2d">'
+            f'{_pick(LOCATIONS, i)} &bull;&nbsp;</td></tr>'
+            f'<tr><td style="padding:8px 0 0"><table role="presentation" bgcolor="#f3f2f1" cellpadding="0" cellspacing="0">'
+            f'<tr><td style="padding:4px 8px"><strong>${70 + i % 50},000–${90 + i % 50},000 a year</strong></td></tr>'
+            f'</table></td></tr>'
+            f'<tr><td style="padding:0;color:#767676;font-size:14px;line-height:21px">'
+            f'Design, build and maintain services for job number {i}. Work with product and data teams.</td></tr>'
+            f'</table></a></td></tr>'
+        )
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Indeed</title></head>'
+        '<body style="margin:0;padding:0"><table role="presentation" width="100%" cellpadding="0" cellspacing="0">'
+        '<tr><td style="padding:24px"><img src="https://ca.indeed.com/logo.png" alt="Indeed"></td></tr>'
+        + ''.join(cards)
+        + '<tr><td style="padding:24px;color:#767676;font-size:12px">You are receiving this email because you '
+        'subscribed to job alerts. <a href="https://ca.indeed.com/unsubscribe">Unsubscribe</a></td></tr>'
+        '</table></body></html>'
+    )
+
+
+def build_linkedin_alert_html(job_count=20, seed=0):
+    """
+    Returns the HTML body of a LinkedIn job alert email with `job_count` job cards.
+    """
+    cards = []
+    for i in range(seed, seed + job_count):
+        job_id = 3800000000 + i
+        url = f"https://www.linkedin.com/comm/jobs/view/{job_id}/?trackingId=abc{i}%3D%3D&refId=ref{i}&lipi=urn%3Ali%3Apage"
+        cards.append(
+            f'<tr><td data-test-id="job-card" class="pb-3">'
+            f'<table role="presentation" width="100%"><tr>'
+            f'<td width="48"><img src="https://media.licdn.com/logo{i}.png" alt="{_pick(COMPANIES, i)}" width="48"></td>'
+            f'<td class="pl-1"><a href="{url}" class="font-bold text-md text-color-brand leading-regular">'
+            f'{_pick(TITLES, i)}</a>'
+            f'<p class="text-system-gray-100 text-xs leading-regular mt-0.5">'
+            f'{_pick(COMPANIES, i)} · {_pick(LOCATIONS, i)}</p>'
+            f'<p class="text-system-gray-70 text-xs">Actively recruiting</p></td>'
+            f'</tr></table></td></tr>'
+        )
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>LinkedIn</title></head>'
+        '<body><table role="presentation" width="100%"><tr><td class="p-3">'
+        '<h1 class="text-lg">Your job alert has been created</h1></td></tr>'
+        + ''.join(cards)
+        + '<tr><td class="text-xs text-system-gray-70">This email was intended for you. '
+        '<a href="https://www.linkedin.com/comm/jobs/alerts">Manage job alerts</a></td></tr>'
+        '</table></body></html>'
+    )
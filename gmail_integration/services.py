@@ -1,31 +1,79 @@
+import logging
+import time
+from email.utils import parseaddr
 from bs4 import BeautifulSoup
+from bs4.builder import builder_registry
+from django.conf import settings
 from gmail_integration.utils import determine_experience_level, determine_job_type
+from gmail_integration.models import ProcessedMessage
+from gmail_integration.mime import extract_html_body
+from gmail_integration.streaming import iter_indeed_jobs, iter_linkedin_jobs
+from gmail_integration.parse_cache import get_parse_cache
+from gmail_integration.fingerprints import PlannedParser, compile_indeed_plan, compile_linkedin_plan
+from gmail_integration.registry import ParserRegistry, ParserSpec
+from gmail_integration.records import ParsedJob
+from gmail_integration.canonical import assign_job_identity
+
+logger = logging.getLogger('gmail_integration')
+
+# Bump whenever parser output changes; messages processed by an older version are parsed again
+PARSER_VERSION = 1
+
+# BeautifulSoup tree builders the alert parsers are checked against (see bench_html_parsers)
+HTML_PARSER_BACKENDS = ('html.parser', 'lxml')
+DEFAULT_HTML_PARSER = 'html.parser'
+# Builders that keep an <a> nested inside another <a> as written. lxml closes the outer link instead,
+# which breaks Indeed cards (a card-wide link wrapping the title link).
+NESTED_LINK_SAFE_BACKENDS = ('html.parser',)
+_unavailable_parsers_logged = set()
+
+
+def get_html_parser(nested_links=False):
+    """
+    Returns the BeautifulSoup tree builder selected by settings.GMAIL_HTML_PARSER.
+    Falls back to the pure-Python 'html.parser' if the selected backend is unknown or not installed,
+    or if the markup relies on nested links (`nested_links`) and the backend would rewrite them.
+    """
+    name = getattr(settings, 'GMAIL_HTML_PARSER', DEFAULT_HTML_PARSER)
+    if nested_links and name not in NESTED_LINK_SAFE_BACKENDS:
+        return DEFAULT_HTML_PARSER
+    if name in HTML_PARSER_BACKENDS and builder_registry.lookup(name) is not None:
+        return name
+    if name not in _unavailable_parsers_logged:
+        _unavailable_parsers_logged.add(name)
+        logger.warning(f"HTML parser backend {name!r} is not available; using {DEFAULT_HTML_PARSER!r}")
+    return DEFAULT_HTML_PARSER
+
+
+def make_soup(html_content, nested_links=False):
+    """
+    Builds a BeautifulSoup tree with the configured parser backend (see get_html_parser).
+    """
+    return BeautifulSoup(html_content, get_html_parser(nested_links=nested_links))
+
 
 def parse_indeed_email(html_content):
     """
     Parses the HTML content of an Indeed Job Alert email to extract job details.
     Returns:
-        list of dict: A list of job records with as many fields as we can parse
-                      (title, company_name, location, salary, job_url,
-                       job_description_snippet, job_type, experience_level).
+        list of ParsedJob: A list of job records with as many fields as we can parse
+                           (title, company_name, location, salary, job_url,
+                            job_description_snippet, job_type, experience_level).
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
+    soup = make_soup(html_content, nested_links=True)
     jobs = []
 
     # Find all <a> tags with href containing 'rc/clk/dl' 
     job_entries = soup.find_all('a', href=lambda href: href and 'rc/clk/dl' in href)
 
     for entry in job_entries:
-        job_title = "N/A"
-        job_url = "N/A"
-        company_name = "N/A"
-        location = "N/A"
-        salary = "N/A"
-        job_description_snippet = "Description unavailable..."
-        job_type = "Unknown"
-        experience_level = "Unknown"
-
-        job_url = entry.get('href', 'N/A')  
+        job_title = None
+        company_name = None
+        location = None
+        salary = None
+        job_description_snippet = None
+
+        job_url = entry.get('href')
         
         # Job Title
         h2_tag = entry.find('h2')
@@ -61,24 +109,26 @@ def parse_indeed_email(html_content):
             # Keep it short or store the entire snippet
             job_description_snippet = snippet_text
 
+        if job_title is None or not job_url:
+            continue
+
         # Job Type (remove, onsite, hybrid)
         job_type = determine_job_type(location)
-        print(f'job type from parse indeed email: {job_type}')
+        logger.debug(f'job type from parse indeed email: {job_type}')
         
         # Experience Level (if included in title)
         experience_level = determine_experience_level(job_title)
 
-        if job_title != "N/A" and job_url != "N/A":
-            jobs.append({
-                'title': job_title,
-                'company_name': company_name,
-                'location': location,
-                'salary': salary,
-                'job_url': job_url,
-                'job_description_snippet': job_description_snippet,
-                'job_type': job_type,
-                'experience_level': experience_level,
-            })
+        jobs.append(ParsedJob(
+            title=job_title,
+            company_name=company_name,
+            location=location,
+            salary=salary,
+            job_url=job_url,
+            job_description_snippet=job_description_snippet,
+            job_type=job_type,
+            experience_level=experience_level,
+        ))
 
     return jobs
 
@@ -91,9 +141,10 @@ def parse_linkedin_email(html_content):
         html_content (str): HTML content of the email.
 
     Returns:
-        list of dict: A list containing job details with keys 'title', 'company', 'location', and 'url'.
+        list of ParsedJob: A list of job records with title, company_name, location, job_url,
+                           experience_level and job_type.
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
+    soup = make_soup(html_content)
     jobs = []
 
     # Find all 'td' elements with data-test-id="job-card"
@@ -115,43 +166,218 @@ def parse_linkedin_email(html_content):
  
 
         # Extract Company Name and Location
+        company_name = None
+        location = None
         company_location_tag = entry.find('p', class_=lambda x: x and 'text-system-gray-100' in x)
         if company_location_tag:
             company_location_text = company_location_tag.get_text(strip=True)
+            company_name = company_location_text
 
             # Split the text into company and location based on the '·' separator
             if '·' in company_location_text:
                 parts = [part.strip() for part in company_location_text.split('·')]
-                if len(parts) >= 2:
-                    company_name = parts[0]  # First part is the company name
-                    location = '·'.join(parts[1:]).strip()  # Join remaining parts as location
-                    print(f'location: {location}')
-                else:
-                    # Fallback if separator is present but doesn't split into two parts
-                    company_name = company_location_text
-                    location = "N/A"
-            else:
-                # Fallback if separator is missing
-                company_name = company_location_text
-                location = "N/A"
-        else:
-            company_name = "N/A"
-            location = "N/A"
+                company_name = parts[0]  # First part is the company name
+                location = '·'.join(parts[1:]).strip()  # Join remaining parts as location
+                logger.debug(f'location: {location}')
 
         # Experience Level (if included in title)
         experience_level = determine_experience_level(job_title)
 
         # Job Type (remove, onsite, hybrid)
         job_type = determine_job_type(location)
-        print(f'job type from parse linkedin email: {job_type}')
-
-        jobs.append({
-            'title': job_title,
-            'company_name': company_name,
-            'location': location,
-            'job_url': job_url,
-            'experience_level': experience_level,
-            'job_type': job_type
-        })
-
-    return jobs
\ No newline at end of file
+        logger.debug(f'job type from parse linkedin email: {job_type}')
+
+        jobs.append(ParsedJob(
+            title=job_title,
+            company_name=company_name,
+            location=location,
+            job_url=job_url,
+            experience_level=experience_level,
+            job_type=job_type,
+        ))
+
+    return jobs
+
+
+# Alert sources; add new ones with parser_registry.register(ParserSpec(...))
+parser_registry = ParserRegistry()
+parser_registry.register(ParserSpec(
+    'linkedin',
+    version=1,
+    source="LinkedIn",
+    senders=["jobalerts-noreply@linkedin.com"],
+    parsers={
+        'tree': parse_linkedin_email,
+        # Constant-memory equivalent (see streaming.py)
+        'streaming': iter_linkedin_jobs,
+        # Compiled per-template extraction (see fingerprints.py)
+        'planned': PlannedParser('linkedin', parse_linkedin_email, compile_linkedin_plan),
+    },
+))
+parser_registry.register(ParserSpec(
+    'indeed',
+    version=1,
+    source="Indeed",
+    senders=["alert@indeed.com"],
+    parsers={
+        'tree': parse_indeed_email,
+        'streaming': iter_indeed_jobs,
+        'planned': PlannedParser('indeed', parse_indeed_email, compile_indeed_plan),
+    },
+))
+
+
+def get_parser_mode():
+    """
+    Returns which parser mode is active: 'streaming' (settings.GMAIL_STREAMING_PARSERS),
+    'planned' (settings.GMAIL_TEMPLATE_PLANS) or 'tree'.
+    """
+    if getattr(settings, 'GMAIL_STREAMING_PARSERS', False):
+        return 'streaming'
+    if getattr(settings, 'GMAIL_TEMPLATE_PLANS', False):
+        return 'planned'
+    return 'tree'
+
+
+def get_email_parser(from_email):
+    """
+    Returns the parser for a sender address, or None. Parsers take the HTML body and return
+    (or, for streaming parsers, yield) ParsedJob records.
+    """
+    spec = parser_registry.lookup(from_email)
+    return spec.get_parser(get_parser_mode()) if spec else None
+
+
+def get_parser_key(from_email):
+    """
+    Identifies the parser that handles a sender (name, version and mode) in parse cache keys.
+    """
+    spec = parser_registry.lookup(from_email)
+    if spec is None:
+        return None
+    return f"{spec.name}:v{spec.version}:{spec.get_mode(get_parser_mode())}"
+
+
+def has_parser(from_email):
+    """
+    Returns True if there is an alert parser for the given sender address.
+    """
+    return parser_registry.lookup(from_email) is not None
+
+
+def get_alert_senders():
+    """
+    Returns the sender addresses and domains of every registered alert source.
+    """
+    return parser_registry.sender_patterns()
+
+
+def get_header(headers, name, default=None):
+    """
+    Returns the value of the first Gmail message header matching `name`, or `default`.
+    """
+    return next((h['value'] for h in headers if h['name'] == name), default)
+
+
+def get_sender_address(sender):
+    """
+    Returns the lower-cased email address from a From header (e.g. 'Indeed <alert@indeed.com>').
+    """
+    return parseaddr(sender or '')[1].lower()
+
+
+def parse_email_body(from_email, body):
+    """
+    Parses an alert email body with the parser that matches the sender's address.
+    Returns:
+        list of ParsedJob: The extracted jobs (empty for unknown senders or on parsing errors).
+    """
+    return parse_email_body_with_outcome(from_email, body)[0]
+
+
+def parse_email_body_with_outcome(from_email, body, use_cache=True):
+    """
+    Same as parse_email_body, but also returns the ProcessedMessage outcome for the ledger.
+    Results are served from / stored in the parse cache (see parse_cache.py) unless use_cache is False.
+    Returns:
+        tuple: (list of ParsedJob, outcome)
+    """
+    if not body:
+        return [], ProcessedMessage.OUTCOME_NO_BODY
+
+    spec = parser_registry.lookup(from_email)
+    if spec is None:
+        # For unknown senders, return an empty list
+        return [], ProcessedMessage.OUTCOME_NO_JOBS
+    mode = get_parser_mode()
+
+    cache_key = None
+    if use_cache:
+        cache = get_parse_cache()
+        cache_key = cache.make_key(get_parser_key(from_email), PARSER_VERSION, body)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    started = time.perf_counter()
+    try:
+        jobs = list(spec.get_parser(mode)(body))
+    except Exception as e:
+        spec.metrics.record(time.perf_counter() - started, failed=True)
+        logger.exception(f"Error parsing email from {from_email}: {e}")
+        # Return an empty list in case of any parsing errors
+        return [], ProcessedMessage.OUTCOME_FAILED
+    spec.metrics.record(time.perf_counter() - started, job_count=len(jobs))
+    for job in jobs:
+        assign_job_identity(job, spec.source)
+
+    result = (jobs, ProcessedMessage.OUTCOME_PARSED if jobs else ProcessedMessage.OUTCOME_NO_JOBS)
+    if cache_key is not None:
+        cache.set(cache_key, result)
+    return result
+
+
+def parse_gmail_message(msg, from_email=None):
+    """
+    Builds the email record returned to the client from a 'full' format Gmail message.
+    Args:
+        msg (dict): Gmail message resource.
+        from_email (str): Sender the message was queried for. Defaults to the address in the From header.
+    Returns:
+        dict: The email's id, subject, sender and extracted jobs.
+    """
+    return parse_gmail_message_with_outcome(msg, from_email=from_email)[0]
+
+
+def parse_gmail_message_with_outcome(msg, from_email=None):
+    """
+    Same as parse_gmail_message, but also returns the ProcessedMessage outcome for the ledger.
+    Returns:
+        tuple: (email dict, outcome)
+    """
+    headers = msg.get('payload', {}).get('headers', [])
+    from_email = from_email or get_sender_address(get_header(headers, 'From'))
+
+    # Parse the email body based on the sender
+    jobs, outcome = parse_email_body_with_outcome(from_email, get_message_body(msg))
+    return build_email(msg, jobs), outcome
+
+
+def get_message_body(msg):
+    """
+    Returns the decoded HTML body of a 'full' format Gmail message, or None.
+    """
+    return extract_html_body(msg.get('payload', {}))
+
+
+def build_email(msg, jobs):
+    """
+    Builds the email record returned to the client from a Gmail message and its parsed jobs.
+    """
+    headers = msg.get('payload', {}).get('headers', [])
+    return {
+        'id': msg['id'],
+        'subject': get_header(headers, 'Subject', '(No Subject)'),
+        'sender': get_header(headers, 'From', '(Unknown Sender)'),
+        'jobs': [job.to_dict() for job in jobs],  # List of extracted job listings ** The individual job postings a user will interact with on the FE **
+    }
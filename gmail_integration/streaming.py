@@ -0,0 +1,351 @@
+"""
+Streaming (event-driven) job extractors for alert emails.
+
+These are alternatives to parse_indeed_email / parse_linkedin_email that never build a DOM.
+They run on the stdlib HTMLParser tokenizer, keep only the stack of open tags plus the
+state of the job cards currently open, and yield each job as soon as its card closes, so
+memory stays flat however large the email is. Matching rules mirror the BeautifulSoup
+parsers in services.py.
+"""
+from html.parser import HTMLParser
+from gmail_integration.records import ParsedJob
+from gmail_integration.utils import determine_experience_level, determine_job_type
+
+# Elements that never have a closing tag, so they are never pushed on the open-tag stack
+VOID_ELEMENTS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr',
+])
+# Text inside these is not part of get_text() output
+SKIPPED_TEXT_ELEMENTS = frozenset(['script', 'style', 'template'])
+
+FEED_CHUNK_SIZE = 64 * 1024
+
+
+class _TextCapture:
+    """
+    Collects the text nodes inside one element until it closes.
+    """
+    __slots__ = ('strings', 'on_close')
+
+    def __init__(self, on_close):
+        self.strings = []
+        self.on_close = on_close
+
+    def text(self, separator=''):
+        # Same as BeautifulSoup's get_text(separator, strip=True)
+        return separator.join(s for s in (string.strip() for string in self.strings) if s)
+
+
+class _CardExtractor(HTMLParser):
+    """
+    Base tokenizer: tracks open tags, routes text to active captures and emits job records
+    in card (document) order as each card closes.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._stack = []  # [tag, captures, closers] per open element
+        self._active_captures = []
+        self._pending_text = []
+        self._skip_text_depth = 0
+        self._cards = []  # open or finished cards, in start order
+        self._open_cards = []
+        self._ready = []
+
+    # Tokenizer events
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_text()
+        attrs = dict(attrs)
+        if tag in VOID_ELEMENTS:
+            self.start_element(tag, attrs, void=True)
+            return
+        node = [tag, [], []]
+        self._stack.append(node)
+        if tag in SKIPPED_TEXT_ELEMENTS:
+            self._skip_text_depth += 1
+        self.start_element(tag, attrs, void=False)
+
+    def handle_startendtag(self, tag, attrs):
+        self._flush_text()
+        self.start_element(tag, dict(attrs), void=True)
+
+    def handle_endtag(self, tag):
+        self._flush_text()
+        # Like BeautifulSoup's html.parser builder: close up to the most recent matching open tag,
+        # and ignore end tags with no matching open tag
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index][0] == tag:
+                while len(self._stack) > index:
+                    self._close_node(self._stack.pop())
+                return
+
+    def handle_data(self, data):
+        if not self._skip_text_depth:
+            self._pending_text.append(data)
+
+    def close(self):
+        super().close()
+        self._flush_text()
+        while self._stack:
+            self._close_node(self._stack.pop())
+
+    # Helpers for subclasses
+
+    def capture_text(self, on_close):
+        """
+        Starts collecting the text of the element that was just opened.
+        `on_close` is called with the capture when the element closes.
+        """
+        capture = _TextCapture(on_close)
+        self._stack[-1][1].append(capture)
+        self._active_captures.append(capture)
+        return capture
+
+    def on_element_close(self, callback):
+        """
+        Calls `callback()` when the element that was just opened closes.
+        """
+        self._stack[-1][2].append(callback)
+
+    def open_card(self, card):
+        self._cards.append(card)
+        self._open_cards.append(card)
+        self.on_element_close(lambda: self._close_card(card))
+
+    def start_element(self, tag, attrs, void):
+        raise NotImplementedError
+
+    def build_record(self, card):
+        raise NotImplementedError
+
+    def drain(self):
+        """
+        Returns (and forgets) the records completed so far.
+        """
+        ready, self._ready = self._ready, []
+        return ready
+
+    # Internals
+
+    def _flush_text(self):
+        if self._pending_text:
+            # Adjacent data events belong to the same text node
+            text = ''.join(self._pending_text)
+            self._pending_text = []
+            for capture in self._active_captures:
+                capture.strings.append(text)
+
+    def _close_node(self, node):
+        tag, captures, closers = node
+        if tag in SKIPPED_TEXT_ELEMENTS:
+            self._skip_text_depth -= 1
+        for capture in captures:
+            self._active_captures.remove(capture)
+            capture.on_close(capture)
+        for callback in closers:
+            callback()
+
+    def _close_card(self, card):
+        card.closed = True
+        self._open_cards.remove(card)
+        # Emit in start order; a nested card closes before the card that contains it
+        while self._cards and self._cards[0].closed:
+            record = self.build_record(self._cards.pop(0))
+            if record is not None:
+                self._ready.append(record)
+
+
+class _IndeedCard:
+    __slots__ = (
+        'closed', 'job_url', 'job_title', 'company_name', 'location', 'salary', 'job_description_snippet',
+        'h2_seen', 'in_first_h2', 'title_seen', 'company_seen', 'after_company', 'location_seen',
+        'salary_table_seen', 'in_salary_table', 'strong_seen', 'snippet_seen',
+    )
+
+    def __init__(self, job_url):
+        self.closed = False
+        self.job_url = job_url
+        self.job_title = None
+        self.company_name = None
+        self.location = None
+        self.salary = None
+        self.job_description_snippet = None
+        self.h2_seen = self.in_first_h2 = self.title_seen = False
+        self.company_seen = self.after_company = self.location_seen = False
+        self.salary_table_seen = self.in_salary_table = self.strong_seen = False
+        self.snippet_seen = False
+
+
+class IndeedJobExtractor(_CardExtractor):
+    """
+    Streaming equivalent of parse_indeed_email. One difference: the location cell is only
+    searched for inside the card, where the tree parser's find_next() can run into the next card.
+    """
+
+    def start_element(self, tag, attrs, void):
+        style = attrs.get('style') or ''
+        for card in self._open_cards:
+            self._update_card(card, tag, attrs, style, void)
+
+        href = attrs.get('href')
+        if tag == 'a' and href and 'rc/clk/dl' in href and not void:
+            self.open_card(_IndeedCard(href))
+
+    def _update_card(self, card, tag, attrs, style, void):
+        # Job Title: first <a> inside the card's first <h2>
+        if tag == 'h2' and not card.h2_seen:
+            card.h2_seen = True
+            if not void:
+                card.in_first_h2 = True
+                self.on_element_close(lambda: setattr(card, 'in_first_h2', False))
+        elif tag == 'a' and card.in_first_h2 and not card.title_seen:
+            card.title_seen = True
+            if not void:
+                self.capture_text(lambda capture: setattr(card, 'job_title', capture.text()))
+
+        if tag == 'td' and not void:
+            # Location: first matching <td> after the company <td>
+            if card.after_company and not card.location_seen and 'font-size:14px;line-height:21px' in style:
+                card.location_seen = True
+                self.capture_text(lambda capture: setattr(card, 'location', _clean_location(capture.text(' '))))
+            # Company Name
+            if not card.company_seen and 'padding:0 12px 0 0' in style:
+                card.company_seen = card.after_company = True
+                self.capture_text(lambda capture: setattr(card, 'company_name', capture.text()))
+            # Job Description Snippet
+            if not card.snippet_seen and 'padding:0;color:#767676;font-size:14px;line-height:21px' in style:
+                card.snippet_seen = True
+                self.capture_text(lambda capture: setattr(card, 'job_description_snippet', capture.text()))
+
+        # Salary: first <strong> inside the card's first #f3f2f1 table
+        if tag == 'table' and not card.salary_table_seen and attrs.get('bgcolor') == '#f3f2f1':
+            card.salary_table_seen = True
+            if not void:
+                card.in_salary_table = True
+                self.on_element_close(lambda: setattr(card, 'in_salary_table', False))
+        elif tag == 'strong' and card.in_salary_table and not card.strong_seen:
+            card.strong_seen = True
+            if not void:
+                self.capture_text(lambda capture: setattr(card, 'salary', capture.text()))
+
+    def build_record(self, card):
+        if card.job_title is None or not card.job_url:
+            return None
+        return ParsedJob(
+            title=card.job_title,
+            company_name=card.company_name,
+            location=card.location,
+            salary=card.salary,
+            job_url=card.job_url,
+            job_description_snippet=card.job_description_snippet,
+            job_type=determine_job_type(card.location),
+            experience_level=determine_experience_level(card.job_title),
+        )
+
+
+def _clean_location(text):
+    return text.replace('•', '').replace('\xa0', ' ').strip()
+
+
+class _LinkedInCard:
+    __slots__ = ('closed', 'title_seen', 'job_title', 'job_url', 'company_seen', 'company_location_text')
+
+    def __init__(self):
+        self.closed = False
+        self.title_seen = False
+        self.job_title = None
+        self.job_url = None
+        self.company_seen = False
+        self.company_location_text = None
+
+
+class LinkedInJobExtractor(_CardExtractor):
+    """
+    Streaming equivalent of parse_linkedin_email.
+    """
+
+    def start_element(self, tag, attrs, void):
+        classes = (attrs.get('class') or '').split()
+        for card in self._open_cards:
+            # Job Title and URL: first <a class="font-bold text-md ..."> in the card
+            if tag == 'a' and not card.title_seen and 'font-bold' in classes and 'text-md' in classes:
+                card.title_seen = True
+                card.job_url = attrs.get('href')
+                card.job_title = ""
+                if not void:
+                    self.capture_text(lambda capture, card=card: setattr(card, 'job_title', capture.text()))
+            # Company Name and Location
+            if tag == 'p' and not card.company_seen and 'text-system-gray-100' in (attrs.get('class') or ''):
+                card.company_seen = True
+                card.company_location_text = ""
+                if not void:
+                    self.capture_text(
+                        lambda capture, card=card: setattr(card, 'company_location_text', capture.text())
+                    )
+
+        if tag == 'td' and attrs.get('data-test-id') == 'job-card' and not void:
+            self.open_card(_LinkedInCard())
+
+    def build_record(self, card):
+        # Skip this job entry if title or URL is missing
+        if card.job_url is None:
+            return None
+        job_title = card.job_title
+        job_url = card.job_url
+        # Ensure the URL is absolute
+        if not job_url.startswith('http'):
+            job_url = 'https://www.linkedin.com' + job_url
+
+        company_name = None
+        location = None
+        text = card.company_location_text
+        if text is not None:
+            company_name = text
+            # Split the text into company and location based on the '·' separator
+            if '·' in text:
+                parts = [part.strip() for part in text.split('·')]
+                company_name = parts[0]
+                location = '·'.join(parts[1:]).strip()
+
+        return ParsedJob(
+            title=job_title,
+            company_name=company_name,
+            location=location,
+            job_url=job_url,
+            experience_level=determine_experience_level(job_title),
+            job_type=determine_job_type(location),
+        )
+
+
+def iter_jobs(extractor, html):
+    """
+    Feeds `html` (a string or an iterable of string chunks) to `extractor` and yields job
+    records as soon as their cards close.
+    """
+    chunks = _iter_chunks(html) if isinstance(html, str) else html
+    for chunk in chunks:
+        extractor.feed(chunk)
+        yield from extractor.drain()
+    extractor.close()
+    yield from extractor.drain()
+
+
+def _iter_chunks(text):
+    for start in range(0, len(text), FEED_CHUNK_SIZE):
+        yield text[start:start + FEED_CHUNK_SIZE]
+
+
+def iter_indeed_jobs(html):
+    """
+    Yields the jobs of an Indeed Job Alert email one at a time (see parse_indeed_email).
+    """
+    return iter_jobs(IndeedJobExtractor(), html)
+
+
+def iter_linkedin_jobs(html):
+    """
+    Yields the jobs of a LinkedIn Job Alert email one at a time (see parse_linkedin_email).
+    """
+    return iter_jobs(LinkedInJobExtractor(), html)
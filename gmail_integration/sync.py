@@ -0,0 +1,224 @@
+import logging
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from googleapiclient.errors import HttpError
+from job_postings.services import save_parsed_jobs
+from .models import GmailCredentials, ProcessedMessage
+from .gmail_api import (
+    batch_get_messages,
+    build_sender_query,
+    get_batch_size,
+    get_current_history_id,
+    get_gmail_service,
+    is_history_expired,
+    iter_chunks,
+    iter_message_ids,
+    list_history_message_ids,
+)
+from .parse_pool import parse_bodies
+from .registry import sender_matches
+from .services import PARSER_VERSION, build_email, get_header, get_message_body, get_sender_address, has_parser
+
+# Headers needed to route a message to a parser before downloading its body
+ROUTING_HEADERS = ['From', 'Subject', 'Date']
+
+logger = logging.getLogger('gmail_integration')
+
+
+def sync_user_emails(access_token, user, senders, max_results=None):
+    """
+    Fetches a user's alert emails incrementally, using the Gmail historyId stored on GmailCredentials.
+    With a cursor, only messages added since the last sync are fetched (a single history().list() call
+    when nothing new has arrived), at most `max_results` of them per call: after a long gap the cursor
+    only moves past the messages processed, and the next sync continues from there. Without a cursor,
+    or once Gmail has expired it, falls back to a bounded full sync of the latest `max_results`
+    messages across all senders. `max_results` defaults to settings.GMAIL_FULL_SYNC_MAX_RESULTS.
+    The parsed jobs are saved as the user's job postings in the same transaction that records their
+    messages in the ledger, so a message is never marked processed without its jobs being saved.
+    Returns:
+        list of dict: Parsed emails from the given senders, in the same shape as fetch_recent_emails.
+    """
+    if max_results is None:
+        max_results = getattr(settings, 'GMAIL_FULL_SYNC_MAX_RESULTS', 50)
+    credentials, _ = GmailCredentials.objects.get_or_create(user=user)
+    service = get_gmail_service(access_token)
+
+    if credentials.history_id:
+        try:
+            message_ids, history_id = list_history_message_ids(service, credentials.history_id, limit=max_results)
+        except HttpError as e:
+            if not is_history_expired(e):
+                raise
+            logger.info(f"Gmail history cursor expired for {user.email}; falling back to a full sync")
+        else:
+            # History includes every new message in the mailbox, so route on headers before downloading bodies
+            emails, failed_count = _fetch_and_parse(service, user, message_ids, senders, metadata_first=True)
+            _save_history_cursor(credentials, history_id, failed_count)
+            return emails
+
+    return _full_sync(service, user, credentials, senders, max_results)
+
+
+def _full_sync(service, user, credentials, senders, max_results):
+    """
+    Lists the latest `max_results` messages from any of the senders with one combined, paginated
+    query and records a fresh history cursor.
+    """
+    # Read the cursor before listing so mail arriving mid-sync is picked up by the next incremental sync
+    history_id = get_current_history_id(service)
+
+    query = build_sender_query(senders, newer_than_days=getattr(settings, 'GMAIL_FULL_SYNC_NEWER_THAN_DAYS', None))
+    message_ids = iter_message_ids(service, query, limit=max_results)
+
+    emails, failed_count = _fetch_and_parse(service, user, message_ids, senders)
+    _save_history_cursor(credentials, history_id, failed_count)
+    return emails
+
+
+def _fetch_and_parse(service, user, message_ids, senders, metadata_first=False):
+    """
+    Batch-fetches the given messages and parses the ones sent by one of `senders`.
+    `message_ids` may be a lazy iterator (see iter_message_ids); each batch is fetched as soon as
+    enough IDs have been listed. Messages already in the user's ProcessedMessage ledger for the
+    current parser version are skipped before any messages().get() call, and newly parsed ones are
+    recorded, together with saving their jobs (see _fetch_and_parse_batch).
+    With metadata_first, messages are first fetched in 'metadata' format (routing headers only) and
+    only those with a matching parser are downloaded in full. Use it when the IDs were not already
+    filtered by a sender query.
+    Returns:
+        tuple: (list of parsed emails, number of messages that could not be fetched)
+    """
+    wanted_senders = {sender.lower() for sender in senders}
+    emails = []
+    failed_count = 0
+    for chunk in iter_chunks(message_ids, get_batch_size()):
+        batch_emails, failed_ids = _fetch_and_parse_batch(service, user, chunk, wanted_senders, metadata_first)
+        emails.extend(batch_emails)
+        failed_count += len(failed_ids)
+    return emails, failed_count
+
+
+def _fetch_and_parse_batch(service, user, message_ids, wanted_senders, metadata_first=False):
+    """
+    Returns (parsed emails, IDs that could not be fetched). Failed messages are not recorded in the
+    ledger, so they are fetched again by the next sync. The jobs are saved in the transaction that
+    records the batch in the ledger: if saving fails, neither happens and the next sync parses the
+    messages again.
+    """
+    message_ids = filter_unprocessed_message_ids(user, message_ids)
+    if not message_ids:
+        return [], []
+
+    outcomes = []
+    failed_ids = []
+    if metadata_first:
+        message_ids, skipped_ids, failed_ids = _route_by_metadata(service, message_ids, wanted_senders)
+        # Remember non-alert mail so it is never fetched again
+        outcomes.extend((message_id, ProcessedMessage.OUTCOME_SKIPPED, 0) for message_id in skipped_ids)
+
+    fetched_messages, failed_body_ids = batch_get_messages(service, message_ids)
+    failed_ids.extend(failed_body_ids)
+    matched = []
+    for msg in fetched_messages:
+        headers = msg.get('payload', {}).get('headers', [])
+        sender_address = get_sender_address(get_header(headers, 'From'))
+        if sender_matches(sender_address, wanted_senders):
+            matched.append((msg, sender_address))
+
+    # Parse the whole batch at once so large batches can use the process pool
+    results = parse_bodies([(sender_address, get_message_body(msg)) for msg, sender_address in matched])
+
+    emails = []
+    parsed_jobs = []
+    fetched_at = timezone.now()
+    for (msg, _), (jobs, outcome) in zip(matched, results):
+        for job in jobs:
+            job.gmail_message_id = msg['id']
+            job.gmail_thread_id = msg.get('threadId')
+            job.fetched_at = fetched_at
+        parsed_jobs.extend(jobs)
+        email = build_email(msg, jobs)
+        emails.append(email)
+        outcomes.append((email['id'], outcome, len(jobs)))
+
+    with transaction.atomic():
+        if parsed_jobs:
+            save_parsed_jobs(user, parsed_jobs)
+        record_processed_messages(user, outcomes)
+    return emails, failed_ids
+
+
+def _route_by_metadata(service, message_ids, wanted_senders):
+    """
+    Fetches routing headers only and splits message IDs into (to download in full, skipped, failed to fetch).
+    """
+    matched_ids = []
+    skipped_ids = []
+    fetched_messages, failed_ids = batch_get_messages(
+        service, message_ids, msg_format='metadata', metadata_headers=ROUTING_HEADERS
+    )
+    for msg in fetched_messages:
+        headers = msg.get('payload', {}).get('headers', [])
+        sender_address = get_sender_address(get_header(headers, 'From'))
+        if sender_matches(sender_address, wanted_senders) and has_parser(sender_address):
+            matched_ids.append(msg['id'])
+        else:
+            skipped_ids.append(msg['id'])
+    return matched_ids, skipped_ids, failed_ids
+
+
+def filter_unprocessed_message_ids(user, message_ids):
+    """
+    Drops the message IDs already processed for `user` with the current PARSER_VERSION.
+    """
+    message_ids = list(dict.fromkeys(message_ids))
+    if not message_ids:
+        return []
+    processed = set(
+        ProcessedMessage.objects.filter(
+            user=user,
+            gmail_message_id__in=message_ids,
+            parser_version=PARSER_VERSION,
+        ).values_list('gmail_message_id', flat=True)
+    )
+    return [message_id for message_id in message_ids if message_id not in processed]
+
+
+def record_processed_messages(user, outcomes):
+    """
+    Upserts ledger entries for (gmail_message_id, outcome, job_count) tuples in a single query.
+    """
+    if not outcomes:
+        return
+    ProcessedMessage.objects.bulk_create(
+        [
+            ProcessedMessage(
+                user=user,
+                gmail_message_id=message_id,
+                parser_version=PARSER_VERSION,
+                outcome=outcome,
+                job_count=job_count,
+            )
+            for message_id, outcome, job_count in outcomes
+        ],
+        update_conflicts=True,
+        unique_fields=['user', 'gmail_message_id'],
+        update_fields=['parser_version', 'outcome', 'job_count', 'processed_at'],
+    )
+
+
+def _save_history_cursor(credentials, history_id, failed_count=0):
+    """
+    Moves the history cursor to `history_id`, unless some messages could not be fetched: the next
+    sync then lists the same history again (already processed messages are skipped by the ledger),
+    so the failed ones aren't lost.
+    """
+    if failed_count:
+        logger.warning(
+            f"Keeping the Gmail history cursor for user {credentials.user_id}: {failed_count} messages could not be fetched"
+        )
+        return
+    credentials.history_id = str(history_id)
+    credentials.history_synced_at = timezone.now()
+    credentials.save(update_fields=['history_id', 'history_synced_at'])
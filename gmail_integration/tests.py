@@ -1,3 +1,725 @@
-from django.test import TestCase
+import base64
+import importlib
+import json
+import pickle
+from datetime import datetime, timezone
+from unittest import mock
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from googleapiclient.discovery import build_from_document
+from googleapiclient.http import HttpMockSequence
+from job_postings.models import JobPosting
+from users.models import User
+from . import fingerprints, parse_pool, sync, views
+from .fingerprints import PlannedParser, compile_indeed_plan, compile_linkedin_plan
+from .canonical import assign_job_identity, get_canonical_job_id, guess_job_source
+from .gmail_api import batch_get_messages, get_discovery_document
+from .mime import decode_part_body, extract_html_body, find_html_part
+from .models import GmailCredentials, ProcessedMessage
+from .parse_cache import ParseCache
+from .parse_pool import parse_bodies
+from .records import ParsedJob
+from .registry import ParserRegistry, ParserSpec
+from .sample_emails import build_indeed_alert_html, build_linkedin_alert_html
+from .services import (
+    DEFAULT_HTML_PARSER, HTML_PARSER_BACKENDS, parse_email_body_with_outcome, parse_indeed_email, parse_linkedin_email,
+    parser_registry,
+)
+from .streaming import iter_indeed_jobs, iter_linkedin_jobs
+from .utils import determine_experience_level, determine_experience_levels, determine_job_type, determine_job_types
 
-# Create your tests here.
+LINKEDIN_SENDER = "jobalerts-noreply@linkedin.com"
+
+
+def gmail_message(message_id, sender=f"LinkedIn <{LINKEDIN_SENDER}>", html=None):
+    """
+    Returns a Gmail API message resource with a From header and an HTML body.
+    """
+    message = {'id': message_id, 'payload': {'headers': [{'name': 'From', 'value': sender}, {'name': 'Subject', 'value': 'Jobs'}]}}
+    if html is not None:
+        message['payload']['mimeType'] = 'text/html'
+        message['payload']['body'] = {'data': base64.urlsafe_b64encode(html.encode('utf-8')).decode('ascii')}
+    return message
+
+
+def json_response(data):
+    return {'status': '200'}, json.dumps(data)
+
+
+def batch_response(items):
+    """
+    Returns a fake multipart batch response. `items` are (message_id, status, body dict) tuples.
+    """
+    parts = []
+    for message_id, status, body in items:
+        reason = 'OK' if status == 200 else 'Error'
+        parts.append(
+            f"--batch_boundary\r\nContent-Type: application/http\r\nContent-ID: <response-x + {message_id}>\r\n\r\n"
+            f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n\r\n{json.dumps(body)}\r\n"
+        )
+    return {'status': '200', 'content-type': 'multipart/mixed; boundary="batch_boundary"'}, ''.join(parts) + "--batch_boundary--"
+
+
+def rate_limited(message_id):
+    return message_id, 429, {'error': {'code': 429, 'message': 'Too many concurrent requests for user'}}
+
+
+def fake_service(responses):
+    return build_from_document(get_discovery_document(), http=HttpMockSequence(responses))
+
+
+class CountingHttpMockSequence(HttpMockSequence):
+    """
+    HttpMockSequence that records the URIs it was called with.
+    """
+
+    def __init__(self, iterable):
+        super().__init__(iterable)
+        self.requests = []
+
+    def request(self, uri, *args, **kwargs):
+        self.requests.append(uri)
+        return super().request(uri, *args, **kwargs)
+
+
+class FetchRecentEmailsTests(TestCase):
+    """
+    fetch_recent_emails must make one list call and one batch call per GMAIL_BATCH_SIZE messages,
+    however many messages it fetches.
+    """
+
+    def fetch(self, message_count, batch_size=50):
+        message_ids = [f"m{i}" for i in range(message_count)]
+        batches = [
+            batch_response([(message_id, 200, gmail_message(message_id)) for message_id in message_ids[start:start + batch_size]])
+            for start in range(0, message_count, batch_size)
+        ]
+        http = CountingHttpMockSequence([json_response({'messages': [{'id': message_id} for message_id in message_ids]}), *batches])
+        emails = views.fetch_recent_emails('token', LINKEDIN_SENDER, max_results=message_count, batch_size=batch_size, http=http)
+        return emails, http.requests
+
+    def test_call_count_is_constant_within_a_batch(self):
+        for message_count in (1, 10, 50):
+            emails, requests = self.fetch(message_count)
+            self.assertEqual(len(emails), message_count)
+            self.assertEqual(len(requests), 2)
+            self.assertTrue(requests[1].endswith('/batch'))
+
+    def test_call_count_grows_per_batch(self):
+        emails, requests = self.fetch(120, batch_size=50)
+        self.assertEqual(len(emails), 120)
+        self.assertEqual(len(requests), 1 + 3)
+
+
+class FetchEmailsViewTests(TestCase):
+
+    def post(self):
+        return self.client.post("/api/gmail/fetch-emails/", headers={'authorization': "Bearer token"})
+
+    def test_failed_sender_is_reported_apart_from_the_emails(self):
+        def fetch(access_token, sender, max_results=5):
+            if sender == "alert@indeed.com":
+                return {"error": "Indeed listing failed"}
+            return [{'id': 'm1', 'subject': 'Jobs', 'sender': sender, 'jobs': []}]
+
+        with mock.patch.object(views, 'fetch_recent_emails', side_effect=fetch):
+            response = self.post()
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.json(), {
+            'emails': [{'id': 'm1', 'subject': 'Jobs', 'sender': LINKEDIN_SENDER, 'jobs': []}],
+            'errors': {'alert@indeed.com': "Indeed listing failed"},
+        })
+
+    def test_every_sender_failing_is_an_error(self):
+        with mock.patch.object(views, 'fetch_recent_emails', return_value={"error": "Gmail is down"}):
+            response = self.post()
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(set(response.json()['errors']), {LINKEDIN_SENDER, "alert@indeed.com"})
+
+
+@override_settings(GMAIL_BATCH_RETRY_DELAY=0, GMAIL_PARSE_CACHE_SIZE=0)
+class HistorySyncFailureTests(TestCase):
+    """
+    Messages that can't be downloaded or saved must not be skipped by moving the history cursor past
+    them or recording them in the ledger.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(username="sync", email="sync@example.com")
+        GmailCredentials.objects.create(user=self.user, history_id="100")
+        self.html = build_linkedin_alert_html(job_count=2)
+
+    def sync(self, responses):
+        with mock.patch.object(sync, 'get_gmail_service', return_value=fake_service(responses)):
+            return sync.sync_user_emails('token', self.user, [LINKEDIN_SENDER])
+
+    def history(self, history_id, message_ids):
+        return json_response({
+            'historyId': history_id,
+            'history': [{'id': history_id, 'messagesAdded': [{'message': {'id': message_id}} for message_id in message_ids]}],
+        })
+
+    def test_rate_limited_items_are_retried(self):
+        emails = self.sync([
+            self.history('120', ['a', 'b']),
+            batch_response([('a', 200, gmail_message('a')), rate_limited('b')]),
+            batch_response([('b', 200, gmail_message('b'))]),
+            batch_response([('a', 200, gmail_message('a', html=self.html)), ('b', 200, gmail_message('b', html=self.html))]),
+        ])
+        self.assertEqual([email['id'] for email in emails], ['a', 'b'])
+        self.assertEqual(GmailCredentials.objects.get(user=self.user).history_id, '120')
+
+    @override_settings(GMAIL_BATCH_RETRIES=0)
+    def test_cursor_is_kept_when_a_body_download_fails(self):
+        emails = self.sync([
+            self.history('120', ['a', 'b']),
+            batch_response([('a', 200, gmail_message('a')), ('b', 200, gmail_message('b'))]),
+            batch_response([('a', 200, gmail_message('a', html=self.html)), rate_limited('b')]),
+        ])
+        self.assertEqual([email['id'] for email in emails], ['a'])
+        self.assertEqual(GmailCredentials.objects.get(user=self.user).history_id, '100')
+        self.assertEqual(list(ProcessedMessage.objects.values_list('gmail_message_id', flat=True)), ['a'])
+
+        # The next sync lists the same history again and only downloads the failed message
+        emails = self.sync([
+            self.history('130', ['a', 'b']),
+            batch_response([('b', 200, gmail_message('b'))]),
+            batch_response([('b', 200, gmail_message('b', html=self.html))]),
+        ])
+        self.assertEqual([email['id'] for email in emails], ['b'])
+        self.assertEqual(GmailCredentials.objects.get(user=self.user).history_id, '130')
+
+    @override_settings(GMAIL_BATCH_RETRIES=0)
+    def test_cursor_is_kept_when_a_metadata_download_fails(self):
+        self.sync([
+            self.history('120', ['a', 'b']),
+            batch_response([('a', 200, gmail_message('a')), rate_limited('b')]),
+            batch_response([('a', 200, gmail_message('a', html=self.html))]),
+        ])
+        self.assertEqual(GmailCredentials.objects.get(user=self.user).history_id, '100')
+
+    def test_processed_messages_are_skipped_by_the_next_sync(self):
+        emails = self.sync([
+            self.history('120', ['a']),
+            batch_response([('a', 200, gmail_message('a'))]),
+            batch_response([('a', 200, gmail_message('a', html=self.html))]),
+        ])
+        self.assertEqual(len(emails[0]['jobs']), 2)
+        self.assertEqual(JobPosting.objects.filter(user=self.user, gmail_message_id='a').count(), 2)
+
+        # Only the history call: the ledgered message isn't fetched again
+        self.assertEqual(self.sync([self.history('130', ['a'])]), [])
+        self.assertEqual(GmailCredentials.objects.get(user=self.user).history_id, '130')
+
+    def test_messages_are_delivered_again_when_saving_their_jobs_fails(self):
+        responses = [
+            self.history('120', ['a']),
+            batch_response([('a', 200, gmail_message('a'))]),
+            batch_response([('a', 200, gmail_message('a', html=self.html))]),
+        ]
+        with mock.patch.object(sync, 'save_parsed_jobs', side_effect=DatabaseError("connection lost")):
+            with self.assertRaises(DatabaseError):
+                self.sync(list(responses))
+        self.assertFalse(ProcessedMessage.objects.filter(user=self.user).exists())
+        self.assertEqual(GmailCredentials.objects.get(user=self.user).history_id, '100')
+
+        emails = self.sync(responses)
+        self.assertEqual([email['id'] for email in emails], ['a'])
+        self.assertEqual(JobPosting.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(GmailCredentials.objects.get(user=self.user).history_id, '120')
+
+    @override_settings(GMAIL_FULL_SYNC_MAX_RESULTS=50)
+    def test_large_history_delta_is_synced_in_slices(self):
+        records = [{'id': str(200 + i), 'messagesAdded': [{'message': {'id': f"m{i}"}}]} for i in range(120)]
+
+        def history_sync(start):
+            # Mail from other senders: routed on metadata only, no bodies are downloaded
+            remaining = [record for record in records if int(record['id']) > start]
+            routed_ids = [record['messagesAdded'][0]['message']['id'] for record in remaining[:50]]
+            http = CountingHttpMockSequence([
+                json_response({'historyId': '400', 'history': remaining}),
+                batch_response([(message_id, 200, gmail_message(message_id, sender="someone@example.com")) for message_id in routed_ids]),
+            ])
+            service = build_from_document(get_discovery_document(), http=http)
+            with mock.patch.object(sync, 'get_gmail_service', return_value=service):
+                sync.sync_user_emails('token', self.user, [LINKEDIN_SENDER])
+            self.assertIn(f"startHistoryId={start}", http.requests[0])
+            self.assertEqual(len(http.requests), 2)
+            return GmailCredentials.objects.get(user=self.user).history_id
+
+        # One record per message: the cursor stops at the last record processed
+        self.assertEqual(history_sync(100), '249')
+        self.assertEqual(history_sync(249), '299')
+        self.assertEqual(history_sync(299), '400')
+        self.assertEqual(ProcessedMessage.objects.filter(user=self.user).count(), 120)
+
+
+class BatchGetMessagesTests(TestCase):
+
+    def test_returns_failed_ids(self):
+        service = fake_service([
+            batch_response([('a', 200, gmail_message('a')), ('b', 404, {'error': {'code': 404, 'message': 'Not Found'}})]),
+        ])
+        messages, failed_ids = batch_get_messages(service, ['a', 'b'], http=service._http, retry_delay=0)
+        self.assertEqual([message['id'] for message in messages], ['a'])
+        # A 404 won't succeed on a retry, so it isn't retried
+        self.assertEqual(failed_ids, ['b'])
+
+
+def sample_emails():
+    """
+    Yields (provider, html) for the sample alert emails the parser equivalence tests run on.
+    """
+    for job_count, seed in [(1, 0), (6, 3), (25, 100)]:
+        yield 'indeed', build_indeed_alert_html(job_count, seed=seed)
+        yield 'linkedin', build_linkedin_alert_html(job_count, seed=seed)
+
+
+TREE_PARSERS = {'indeed': parse_indeed_email, 'linkedin': parse_linkedin_email}
+STREAMING_EXTRACTORS = {'indeed': iter_indeed_jobs, 'linkedin': iter_linkedin_jobs}
+
+
+class HtmlParserBackendTests(TestCase):
+    """
+    Every GMAIL_HTML_PARSER backend must extract the same jobs as the default one.
+    """
+
+    def test_backends_extract_identical_jobs(self):
+        for provider, html in sample_emails():
+            with override_settings(GMAIL_HTML_PARSER=DEFAULT_HTML_PARSER):
+                expected = TREE_PARSERS[provider](html)
+            self.assertTrue(expected)
+            self.assertTrue(all(job.title and job.job_url for job in expected))
+            for backend in HTML_PARSER_BACKENDS:
+                with self.subTest(provider=provider, backend=backend, jobs=len(expected)):
+                    with override_settings(GMAIL_HTML_PARSER=backend):
+                        self.assertEqual(TREE_PARSERS[provider](html), expected)
+
+
+class StreamingExtractorTests(TestCase):
+    """
+    The streaming extractors must yield the same jobs as the tree parsers, whatever the chunking.
+    """
+
+    def test_streaming_matches_tree_parser(self):
+        for provider, html in sample_emails():
+            expected = TREE_PARSERS[provider](html)
+            with self.subTest(provider=provider, jobs=len(expected)):
+                self.assertEqual(list(STREAMING_EXTRACTORS[provider](html)), expected)
+                # Chunk boundaries falling inside tags, attributes and entities
+                chunks = (html[start:start + 7] for start in range(0, len(html), 7))
+                self.assertEqual(list(STREAMING_EXTRACTORS[provider](chunks)), expected)
+
+    def test_jobs_are_yielded_as_their_cards_close(self):
+        for provider, build_html in [('indeed', build_indeed_alert_html), ('linkedin', build_linkedin_alert_html)]:
+            html = build_html(50)
+            chunk_size = 512
+            fed = []
+
+            def chunks():
+                for start in range(0, len(html), chunk_size):
+                    fed.append(start)
+                    yield html[start:start + chunk_size]
+
+            with self.subTest(provider=provider):
+                next(STREAMING_EXTRACTORS[provider](chunks()))
+                self.assertLess(len(fed) * chunk_size, len(html) / 4)
+
+
+class PlannedParserTests(TestCase):
+    """
+    Template plans must extract the same jobs as the generic parsers they were learned from.
+    """
+
+    def planned_parsers(self):
+        return {
+            'indeed': PlannedParser('indeed', parse_indeed_email, compile_indeed_plan),
+            'linkedin': PlannedParser('linkedin', parse_linkedin_email, compile_linkedin_plan),
+        }
+
+    def test_planned_matches_generic_parser(self):
+        parsers = self.planned_parsers()
+        for provider, html in [*sample_emails(), *sample_emails()]:
+            with self.subTest(provider=provider):
+                self.assertEqual(parsers[provider](html), TREE_PARSERS[provider](html))
+        for provider, parser in parsers.items():
+            stats = parser.stats()
+            # Learned once from the first email, then planned for every later one
+            self.assertEqual((stats['unknown'], stats['planned_variants'], stats['fallbacks']), (1, 1, 0))
+            self.assertEqual(stats['planned'], 5)
+
+    def test_least_recently_seen_variant_is_evicted(self):
+        parser = self.planned_parsers()['indeed']
+        html = build_indeed_alert_html(3)
+        with mock.patch.object(fingerprints, 'MAX_VARIANTS', 2), \
+                mock.patch.object(fingerprints, 'compute_fingerprint', side_effect=['a', 'b', 'a', 'c', 'a', 'b']):
+            for _ in range(6):
+                self.assertEqual(parser(html), parse_indeed_email(html))
+        stats = parser.stats()
+        # 'b' made room for 'c', and 'c' for 'b' again; 'a' stayed planned throughout
+        self.assertEqual((stats['unknown'], stats['planned'], stats['evictions'], stats['variants']), (4, 2, 2, 2))
+
+    def test_fields_stay_inside_their_card(self):
+        parser = self.planned_parsers()['indeed']
+        parser(build_indeed_alert_html(3))
+
+        # Same template, but the last card has no snippet and the footer has a cell styled like one
+        snippet_row = (
+            '<tr><td style="padding:0;color:#767676;font-size:14px;line-height:21px">'
+            'Design, build and maintain services for job number 12. Work with product and data teams.</td></tr>'
+        )
+        html = build_indeed_alert_html(3, seed=10).replace(snippet_row, '').replace(
+            '</table></body>',
+            '<tr><td style="padding:0;color:#767676;font-size:14px;line-height:21px">Jobs near you: see more</td></tr>'
+            '</table></body>',
+        )
+        jobs = parser(html)
+        self.assertEqual(parser.stats()['planned'], 1)
+        self.assertEqual(jobs, parse_indeed_email(html))
+        self.assertIsNone(jobs[-1].job_description_snippet)
+
+
+def mime_part(mime_type, text=None, charset='utf-8', headers=(), **fields):
+    """
+    Returns a Gmail API MIME part; `text` is encoded with `charset` into unpadded base64url data.
+    """
+    part = {'mimeType': mime_type, 'headers': [{'name': 'Content-Type', 'value': f'{mime_type}; charset="{charset}"'}, *headers]}
+    part['body'] = {}
+    if text is not None:
+        part['body']['data'] = base64.urlsafe_b64encode(text.encode(charset)).decode('ascii').rstrip('=')
+    part.update(fields)
+    return part
+
+
+class MimeTests(TestCase):
+
+    def test_html_part_nested_in_alternative(self):
+        html = mime_part('text/html', "<p>Jobs</p>")
+        payload = {'mimeType': 'multipart/mixed', 'parts': [
+            {'mimeType': 'multipart/alternative', 'parts': [mime_part('text/plain', "Jobs"), html]},
+            mime_part('text/html', "<p>Forwarded</p>"),
+        ]}
+        self.assertIs(find_html_part(payload), html)
+        self.assertEqual(extract_html_body(payload), "<p>Jobs</p>")
+
+    def test_attachments_are_skipped(self):
+        attached = mime_part('text/html', "<p>Attached</p>", filename='jobs.html')
+        disposed = mime_part('text/html', "<p>Disposed</p>", headers=[{'name': 'Content-Disposition', 'value': 'attachment'}])
+        stored = mime_part('text/html', body={'attachmentId': 'ANGjdJ8', 'size': 2048})
+        payload = {'mimeType': 'multipart/mixed', 'parts': [attached, disposed, stored, mime_part('text/html', "<p>Jobs</p>")]}
+        self.assertEqual(extract_html_body(payload), "<p>Jobs</p>")
+        self.assertIsNone(extract_html_body({'mimeType': 'multipart/mixed', 'parts': [attached, stored]}))
+
+    def test_declared_charset_is_used(self):
+        self.assertEqual(decode_part_body(mime_part('text/html', "Société Générale", charset='iso-8859-1')), "Société Générale")
+        # Unknown charsets fall back to UTF-8
+        part = mime_part('text/html', "Café")
+        part['headers'] = [{'name': 'Content-Type', 'value': 'text/html; charset=x-unknown'}]
+        self.assertEqual(decode_part_body(part), "Café")
+
+    def test_unpadded_base64(self):
+        for text in ("a", "ab", "abc", "abcd"):
+            with self.subTest(text=text):
+                part = mime_part('text/html', text)
+                self.assertEqual(decode_part_body(part), text)
+
+
+class ParseCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.html = build_indeed_alert_html(3)
+        self.result = (parse_indeed_email(self.html), ProcessedMessage.OUTCOME_PARSED)
+
+    def test_parser_changes_invalidate_keys(self):
+        parse_cache = ParseCache()
+        key = parse_cache.make_key('indeed:v1:tree', 1, self.html)
+        parse_cache.set(key, self.result)
+        self.assertEqual(parse_cache.get(key), self.result)
+        self.assertEqual(parse_cache.get(parse_cache.make_key('indeed:v1:tree', 1, self.html)), self.result)
+
+        # Another body, source or parser mode, a parser or PARSER_VERSION bump, or edited parser code
+        self.assertIsNone(parse_cache.get(parse_cache.make_key('indeed:v1:tree', 1, self.html + " ")))
+        self.assertIsNone(parse_cache.get(parse_cache.make_key('linkedin:v1:tree', 1, self.html)))
+        self.assertIsNone(parse_cache.get(parse_cache.make_key('indeed:v1:planned', 1, self.html)))
+        self.assertIsNone(parse_cache.get(parse_cache.make_key('indeed:v2:tree', 1, self.html)))
+        self.assertIsNone(parse_cache.get(parse_cache.make_key('indeed:v1:tree', 2, self.html)))
+        with mock.patch('gmail_integration.parse_cache._code_digest', 'edited'):
+            self.assertIsNone(parse_cache.get(parse_cache.make_key('indeed:v1:tree', 1, self.html)))
+
+    def test_lru_eviction(self):
+        parse_cache = ParseCache(max_entries=2)
+        for key in ('a', 'b', 'a', 'c'):
+            if parse_cache.get(key) is None:
+                parse_cache.set(key, self.result)
+        # 'b' was the least recently used when 'c' came in
+        self.assertIsNone(parse_cache.get('b'))
+        self.assertEqual(parse_cache.get('a'), self.result)
+        self.assertEqual(parse_cache.stats()['evictions'], 1)
+
+    def test_shared_tier(self):
+        # Two processes: separate in-process LRUs on the same Django cache alias
+        parse_cache = ParseCache(cache_alias='default')
+        other_process = ParseCache(cache_alias='default')
+        key = parse_cache.make_key('indeed:v1:tree', 1, self.html)
+        parse_cache.set(key, self.result)
+
+        self.assertEqual(other_process.get(key), self.result)
+        self.assertEqual(other_process.get(key), self.result)
+        stats = other_process.stats()
+        self.assertEqual((stats['shared_hits'], stats['local_hits'], stats['misses']), (1, 1, 0))
+
+    def test_cached_jobs_are_copies(self):
+        parse_cache = ParseCache()
+        parse_cache.set('key', self.result)
+        jobs, _ = parse_cache.get('key')
+        jobs[0].gmail_message_id = 'm1'
+        self.assertIsNone(parse_cache.get('key')[0][0].gmail_message_id)
+
+
+class InProcessPool:
+    """
+    Stands in for the parse pool's ProcessPoolExecutor, running the chunks in this process.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def map(self, function, chunks):
+        self.chunks.extend(chunks)
+        return map(function, chunks)
+
+
+@override_settings(GMAIL_PARSE_CACHE_SIZE=0)
+class ParsePoolTests(TestCase):
+
+    def bodies(self, count):
+        return [("alert@indeed.com", build_indeed_alert_html(2, seed=seed)) for seed in range(count)]
+
+    def expected(self, bodies):
+        return [
+            ([assign_job_identity(job, "Indeed") for job in parse_indeed_email(body)], ProcessedMessage.OUTCOME_PARSED)
+            for _, body in bodies
+        ]
+
+    def test_small_batches_are_parsed_in_process(self):
+        bodies = self.bodies(3)
+        with mock.patch.object(parse_pool, 'get_parse_pool') as get_parse_pool:
+            results = parse_bodies(bodies, workers=4, min_pool_batch=4)
+            parse_bodies(bodies * 2, workers=1, min_pool_batch=4)
+        get_parse_pool.assert_not_called()
+        self.assertEqual(results, self.expected(bodies))
+
+    def test_large_batches_go_to_the_pool_in_chunks(self):
+        bodies = self.bodies(5)
+        pool = InProcessPool()
+        with mock.patch.object(parse_pool, 'get_parse_pool', return_value=pool):
+            results = parse_bodies(bodies, workers=4, min_pool_batch=4, chunksize=2, use_cache=False)
+        self.assertEqual([len(chunk) for chunk in pool.chunks], [2, 2, 1])
+        self.assertEqual(results, self.expected(bodies))
+
+
+class ParserRegistryTests(TestCase):
+
+    def setUp(self):
+        self.registry = ParserRegistry()
+        self.indeed = self.registry.register(ParserSpec(
+            'indeed', version=1, source="Indeed", senders=["alert@indeed.com"], parsers={'tree': parse_indeed_email},
+        ))
+        self.glassdoor = self.registry.register(ParserSpec(
+            'glassdoor', version=1, source="Glassdoor", domains=["glassdoor.com"], parsers={'tree': list},
+        ))
+
+    def test_lookup(self):
+        self.assertIs(self.registry.lookup("Alert@Indeed.com"), self.indeed)
+        self.assertIs(self.registry.lookup("noreply@glassdoor.com"), self.glassdoor)
+        self.assertIs(self.registry.lookup("alerts@mail.glassdoor.com"), self.glassdoor)
+        self.assertIsNone(self.registry.lookup("other@indeed.com"))
+        self.assertIsNone(self.registry.lookup("noreply@notglassdoor.com"))
+        self.assertIsNone(self.registry.lookup(""))
+        self.assertEqual(self.registry.sender_patterns(), ["alert@indeed.com", "glassdoor.com"])
+
+    def test_conflicting_registrations_are_rejected(self):
+        for spec in [
+            ParserSpec('indeed', version=2, source="Indeed", senders=["jobs@indeed.com"], parsers={'tree': list}),
+            ParserSpec('indeed2', version=1, source="Indeed", senders=["ALERT@indeed.com"], parsers={'tree': list}),
+            ParserSpec('glassdoor2', version=1, source="Glassdoor", domains=["glassdoor.com"], parsers={'tree': list}),
+        ]:
+            with self.subTest(spec=spec), self.assertRaises(ValueError):
+                self.registry.register(spec)
+        with self.assertRaises(ValueError):
+            ParserSpec('nameless', version=1, source="X", senders=["a@x.com"], parsers={'streaming': list})
+
+    def test_modes_fall_back_to_the_tree_parser(self):
+        self.assertIs(self.indeed.get_parser('streaming'), parse_indeed_email)
+        self.assertEqual(self.indeed.get_mode('streaming'), 'tree')
+
+
+class ParserMetricsTests(TestCase):
+
+    def setUp(self):
+        self.spec = parser_registry.lookup("alert@indeed.com")
+        self.spec.metrics.reset()
+        self.addCleanup(self.spec.metrics.reset)
+
+    @override_settings(GMAIL_STREAMING_PARSERS=False, GMAIL_TEMPLATE_PLANS=False)
+    def test_parses_are_counted_per_parser(self):
+        parse_email_body_with_outcome("alert@indeed.com", build_indeed_alert_html(4), use_cache=False)
+        with mock.patch.dict(self.spec.parsers, tree=mock.Mock(side_effect=ValueError("bad markup"))):
+            _, outcome = parse_email_body_with_outcome("alert@indeed.com", "<html></html>", use_cache=False)
+        self.assertEqual(outcome, ProcessedMessage.OUTCOME_FAILED)
+
+        stats = parser_registry.stats()['indeed']
+        self.assertEqual((stats['invocations'], stats['jobs'], stats['failures']), (2, 4, 1))
+        self.assertEqual(sum(stats['parse_time_histogram'].values()), 2)
+
+
+class ParsedJobTests(TestCase):
+
+    def setUp(self):
+        self.job = assign_job_identity(ParsedJob(
+            title="Senior Python Developer",
+            company_name="Acme",
+            job_url="https://ca.indeed.com/rc/clk/dl?jk=ABC123&from=ja",
+            skills=["python", "django"],
+            gmail_message_id="m1",
+            fetched_at=datetime(2024, 3, 1, 12, 30, tzinfo=timezone.utc),
+        ), "Indeed")
+
+    def test_pickle_round_trip(self):
+        # How jobs travel to and from parse pool workers and the shared parse cache
+        self.assertEqual(pickle.loads(pickle.dumps(self.job)), self.job)
+        self.assertEqual(pickle.loads(pickle.dumps([self.job, self.job.copy()])), [self.job, self.job])
+
+    def test_equality(self):
+        other = self.job.copy()
+        self.assertEqual(other, self.job)
+        other.salary = "$100,000"
+        self.assertNotEqual(other, self.job)
+        self.assertNotEqual(self.job, self.job.to_dict())
+
+    def test_json_round_trip(self):
+        data = json.loads(json.dumps(self.job.to_dict()))
+        self.assertEqual(data['fetched_at'], "2024-03-01T12:30:00+00:00")
+        # The source and canonical job ID aren't taken from clients, they are derived again from the link
+        job = ParsedJob.from_dict(data)
+        self.assertEqual((job.source, job.canonical_job_id), (None, None))
+        self.assertEqual(assign_job_identity(job), self.job)
+
+    def test_from_dict_cleans_client_values(self):
+        job = ParsedJob.from_dict({
+            'title': "Developer",
+            'salary': "N/A",
+            'summary': "Description unavailable...",
+            'skills': ["N/A"],
+            'date_posted': "2024-02-30T00:00:00Z",
+            'application_deadline': 1709251200,
+            'fetched_at': "2024-03-01T12:30:00Z",
+            'unknown_field': "ignored",
+        })
+        self.assertEqual((job.title, job.salary, job.summary, job.skills), ("Developer", None, None, ["N/A"]))
+        # Impossible dates and non-string values become None instead of failing the whole save
+        self.assertIsNone(job.date_posted)
+        self.assertIsNone(job.application_deadline)
+        self.assertEqual(job.fetched_at, datetime(2024, 3, 1, 12, 30, tzinfo=timezone.utc))
+
+    def test_unknown_fields_are_rejected(self):
+        with self.assertRaises(TypeError):
+            ParsedJob(title="Developer", url="https://example.com")
+
+
+class ClassifierTests(TestCase):
+
+    def test_experience_level_matches_whole_words(self):
+        for title, level in [
+            ("Software Intern", "Intern"),
+            ("Summer Interns 2025", "Intern"),
+            ("Data Science Internship", "Intern"),
+            ("Co-op Student, Platform", "Intern"),
+            ("Internal Tools Developer", "Unknown"),
+            ("Team Leader", "Unknown"),
+            ("Headcount Planner", "Unknown"),
+            ("Senior Developer", "Senior"),
+            ("", "Unknown"),
+            (None, "Unknown"),
+        ]:
+            with self.subTest(title=title):
+                self.assertEqual(determine_experience_level(title), level)
+
+    def test_first_listed_keyword_wins(self):
+        # Whatever their position in the title
+        for title, level in [
+            ("Lead Engineer", "Senior"),
+            ("Engineer Lead", "Senior"),
+            ("Senior Intern", "Intern"),
+            ("Manager, Junior Programs", "Junior"),
+        ]:
+            with self.subTest(title=title):
+                self.assertEqual(determine_experience_level(title), level)
+
+    def test_job_type(self):
+        for location, job_type in [
+            ("Remote", "Remote"),
+            ("Remotely in Canada", "Remote"),
+            ("Toronto, ON (Hybrid remote)", "Hybrid Remote"),
+            ("Remote or hybrid", "Hybrid"),
+            ("Vancouver, BC • On-site", "On-site"),
+            ("Remote-first company, Montreal", "Remote"),
+            ("Montreal, QC", "In Person"),
+            ("N/A", "Unknown"),
+            (None, "Unknown"),
+        ]:
+            with self.subTest(location=location):
+                self.assertEqual(determine_job_type(location), job_type)
+
+    def test_batch_matches_single_calls(self):
+        titles = ["Software Intern", None, "Team Leader", "Software Intern", "Lead Engineer"]
+        self.assertEqual(determine_experience_levels(titles), [determine_experience_level(title) for title in titles])
+        locations = ["Remotely", "N/A", "Hybrid", None]
+        self.assertEqual(determine_job_types(locations), [determine_job_type(location) for location in locations])
+
+
+# (source, job link, expected canonical job ID)
+CANONICAL_JOB_ID_CASES = [
+    ("Indeed", "https://ca.indeed.com/rc/clk/dl?jk=3F9A1B2C&from=ja", "3f9a1b2c"),
+    ("Indeed", "https://www.indeed.com/viewjob?vjk=ABCdef123&tk=1", "abcdef123"),
+    ("Indeed", "https://www.indeed.com/rc/clk/dl?jk=not-a-key&vjk=ab12", "ab12"),
+    ("Indeed", "https://www.indeed.com/jobs?q=python", None),
+    ("LinkedIn", "https://www.linkedin.com/comm/jobs/view/3812345678/?trackingId=abc", "3812345678"),
+    ("LinkedIn", "https://www.linkedin.com/jobs/view/senior-python-developer-at-acme-3812345678", "3812345678"),
+    ("LinkedIn", "https://www.linkedin.com/jobs/search/?currentJobId=3812345678&keywords=python", "3812345678"),
+    ("LinkedIn", "https://www.linkedin.com/jobs/search/?currentJobId=abc", None),
+    # Malformed links (an invalid IPv6 host raises ValueError in urlsplit)
+    ("Indeed", "https://[::1/rc/clk/dl?jk=abc", None),
+    ("LinkedIn", "https://[::1/jobs/view/123", None),
+    ("Indeed", "", None),
+    ("Glassdoor", "https://www.glassdoor.com/job-listing/123", None),
+    ("Indeed", "https://www.indeed.com/rc/clk/dl?jk=" + "a" * 65, None),
+]
+
+
+class CanonicalJobIdTests(TestCase):
+
+    def test_canonical_job_ids(self):
+        for source, job_url, job_id in CANONICAL_JOB_ID_CASES:
+            with self.subTest(job_url=job_url):
+                self.assertEqual(get_canonical_job_id(source, job_url), job_id)
+
+    def test_backfill_migration_agrees(self):
+        # Migration 0011 backfilled existing rows with a frozen copy of the extraction
+        migration = importlib.import_module('job_postings.migrations.0011_jobposting_canonical_job_id')
+        for source, job_url, job_id in CANONICAL_JOB_ID_CASES:
+            with self.subTest(job_url=job_url):
+                self.assertEqual(migration.get_canonical_job_id(source, job_url), job_id)
+                self.assertEqual(migration.guess_job_source(job_url), guess_job_source(job_url))
+
+    def test_source_from_link_host(self):
+        self.assertEqual(guess_job_source("https://ca.indeed.com/rc/clk/dl?jk=abc"), "Indeed")
+        self.assertEqual(guess_job_source("https://www.linkedin.com/jobs/view/1"), "LinkedIn")
+        self.assertIsNone(guess_job_source("https://notindeed.com/rc/clk/dl?jk=abc"))
+        self.assertIsNone(guess_job_source("https://[::1/rc/clk/dl?jk=abc"))
+        self.assertIsNone(guess_job_source(None))
+
+        job = assign_job_identity(ParsedJob(job_url="https://www.linkedin.com/jobs/view/42", source="Unknown"))
+        self.assertEqual((job.source, job.canonical_job_id), ("LinkedIn", "42"))
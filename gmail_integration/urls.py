@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import fetch_emails_view
+from .views import fetch_emails_view, parser_stats_view
 
 urlpatterns = [
-    path('fetch-emails/', fetch_emails_view, name='fetch_emails')
+    path('fetch-emails/', fetch_emails_view, name='fetch_emails'),
+    path('parser-stats/', parser_stats_view, name='parser_stats'),
 ]
\ No newline at end of file
@@ -1,6 +1,9 @@
+import re
+
 EXPERIENCE_LEVEL_MAPPING = [
-    ("co-op", "Intern"),  
+    ("co-op", "Intern"),
     ("intern", "Intern"),
+    ("internship", "Intern"),
     ("junior", "Junior"),
     ("associate", "Junior"),
     ("assistant", "Junior"),
@@ -24,6 +27,87 @@ EXPERIENCE_LEVEL_MAPPING = [
     ("intermediate", "Mid-Level"),
 ]
 
+# Checked in order, like EXPERIENCE_LEVEL_MAPPING; locations matching none of these are "In Person"
+JOB_TYPE_MAPPING = [
+    ("hybrid remote", "Hybrid Remote"),
+    ("hybrid", "Hybrid"),
+    ("remote", "Remote"),
+    # Keywords only match whole words, so derived forms the old substring check caught are listed
+    ("remotely", "Remote"),
+    ("work from home", "Remote"),
+    ("wfh", "Remote"),
+    ("on-site", "On-site"),
+    ("on site", "On-site"),
+    ("in-office", "On-site"),
+    ("in person", "In Person"),
+    ("office-based", "In Person"),
+]
+
+CLASSIFIER_CACHE_SIZE = 8192
+
+
+class KeywordClassifier:
+    """
+    Maps text to a label with an ordered (keyword, label) list.
+    All keywords are compiled into one alternation regex matched on word boundaries (so "intern"
+    doesn't match "internal" and "lead" doesn't match "leader"; a plural "s" is allowed). When
+    several keywords match, the one listed first wins, as with a linear scan of the list.
+    Results are memoized per lower-cased string, up to `cache_size` strings.
+    """
+
+    def __init__(self, mapping, default, cache_size=CLASSIFIER_CACHE_SIZE):
+        self.mapping = list(mapping)
+        self.default = default
+        self.cache_size = cache_size
+        self._priority = {}
+        for index, (keyword, label) in enumerate(self.mapping):
+            self._priority.setdefault(keyword, (index, label))
+        # Longest keywords first, so "hybrid remote" is tried before "hybrid" at the same position
+        keywords = sorted(self._priority, key=len, reverse=True)
+        self._pattern = re.compile(r'\b(' + '|'.join(re.escape(keyword) for keyword in keywords) + r')s?\b')
+        self._cache = {}
+        self.hits = self.misses = 0
+
+    def _match(self, text):
+        keywords = self._pattern.findall(text)
+        if not keywords:
+            return self.default
+        return min(map(self._priority.__getitem__, keywords))[1]
+
+    def classify(self, text):
+        text = text.lower()
+        label = self._cache.get(text)
+        if label is None:
+            self.misses += 1
+            label = self._match(text)
+            # Start over when full: unlike an LRU, a scan over more distinct strings than fit still hits
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[text] = label
+        else:
+            self.hits += 1
+        return label
+
+    def classify_many(self, texts):
+        """
+        Classifies a list of strings in one call; each distinct string is only matched once.
+        """
+        labels = {}
+        classify = self.classify
+        return [labels[text] if text in labels else labels.setdefault(text, classify(text)) for text in texts]
+
+    def cache_info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._cache), 'max_size': self.cache_size}
+
+    def cache_clear(self):
+        self._cache.clear()
+        self.hits = self.misses = 0
+
+
+experience_level_classifier = KeywordClassifier(EXPERIENCE_LEVEL_MAPPING, "Unknown")
+job_type_classifier = KeywordClassifier(JOB_TYPE_MAPPING, "In Person")
+
+
 def determine_experience_level(job_title):
     """
     Determines the experience level based on keywords in the job title.
@@ -32,11 +116,21 @@ def determine_experience_level(job_title):
     Returns:
         str: The experience level (e.g., "Senior", "Mid-Level", "Junior", "Intern").
     """
-    job_title_lower = job_title.lower()
-    for keyword, level in EXPERIENCE_LEVEL_MAPPING:
-        if keyword in job_title_lower:
-            return level
-    return "Unknown"  
+    if not job_title:
+        return "Unknown"
+    return experience_level_classifier.classify(job_title)
+
+
+def determine_experience_levels(job_titles):
+    """
+    Batch version of determine_experience_level.
+    Returns:
+        list of str: One experience level per title, in order.
+    """
+    return [level if title else "Unknown" for title, level in zip(
+        job_titles, experience_level_classifier.classify_many(title or '' for title in job_titles)
+    )]
+
 
 def determine_job_type(location):
     """
@@ -49,19 +143,15 @@ def determine_job_type(location):
     if not location or location == "N/A":
         return "Unknown"
 
-    location_lower = location.lower()
-
-    if "hybrid remote" in location_lower:
-        job_type = "Hybrid Remote"
-    elif "hybrid" in location_lower:
-        job_type = "Hybrid"
-    elif "remote" in location_lower or "work from home" in location_lower or "wfh" in location_lower:
-        job_type = "Remote"
-    elif "on-site" in location_lower or "on site" in location_lower or "in-office" in location_lower:
-        job_type = "On-site"
-    elif "in person" in location_lower or "office-based" in location_lower:
-        job_type = "In Person"
-    else:
-        job_type = "In Person"
-
-    return job_type
\ No newline at end of file
+    return job_type_classifier.classify(location)
+
+
+def determine_job_types(locations):
+    """
+    Batch version of determine_job_type.
+    Returns:
+        list of str: One job type per location, in order.
+    """
+    return [job_type if location and location != "N/A" else "Unknown" for location, job_type in zip(
+        locations, job_type_classifier.classify_many(location or '' for location in locations)
+    )]
@@ -1,89 +1,113 @@
 from django.shortcuts import render
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-import base64
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
 from django.http import JsonResponse
 import json
-from .services import parse_indeed_email, parse_linkedin_email
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from .services import get_alert_senders, parse_gmail_message, parser_registry
+from .gmail_api import batch_get_messages, build_sender_query, get_gmail_service, iter_message_ids
+from .sync import sync_user_emails
+from users.models import User
 
 import re
 from bs4 import BeautifulSoup
 
-def fetch_recent_emails(access_token, from_email, max_results=2): # TODO: change max_results to 5 or remove when done testing
+_fetch_executor = None
+_fetch_executor_lock = threading.Lock()
+
+
+def get_fetch_executor():
+    """
+    Returns the process-wide thread pool used for Gmail fetches (settings.GMAIL_FETCH_MAX_WORKERS).
+    Keeping the threads alive between requests lets each one reuse its Gmail connections.
+    """
+    global _fetch_executor
+    if _fetch_executor is None:
+        with _fetch_executor_lock:
+            if _fetch_executor is None:
+                _fetch_executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'GMAIL_FETCH_MAX_WORKERS', 4),
+                    thread_name_prefix='gmail-fetch',
+                )
+    return _fetch_executor
+
+
+def fetch_recent_emails(access_token, from_email, max_results=5, batch_size=None, http=None):
     """
     Fetch recent emails from Gmail using the provided access token.
     Return emails based on the sender's email address and parse the content accordingly.
+    Messages are retrieved with Gmail batch requests (batch_size per request) rather than one
+    messages().get() call each. `http` can be a fake transport (e.g. HttpMockSequence) for tests.
+    Lists a single sender, so requests without a known user make one list call per sender (run
+    concurrently, see fetch_emails_for_senders); only sync_user_emails lists all senders in one query.
     """
     try:
         # Initialize the Gmail API client
-        creds = Credentials(token=access_token)
-        service = build('gmail', 'v1', credentials=creds)
+        service = get_gmail_service(access_token)
 
         # Use the Gmail API query to fetch emails from the specified sender
-        query = f"from:{from_email}"
-        results = service.users().messages().list(userId='me', q=query, maxResults=max_results).execute()
-        messages = results.get('messages', [])
-
-        # Fetch details for each message
-        emails = []
-        for message in messages:
-            msg = service.users().messages().get(userId='me', id=message['id']).execute()
-
-            payload = msg.get('payload', {})
-            headers = payload.get('headers', [])
-            subject = next((h['value'] for h in headers if h['name'] == 'Subject'), '(No Subject)')
-            sender = next((h['value'] for h in headers if h['name'] == 'From'), '(Unknown Sender)')
-
-            # Extract the email body
-            body = None
-            if 'data' in payload.get('body', {}):
-                # If the body is directly available
-                body = base64.urlsafe_b64decode(payload['body']['data']).decode('utf-8')
-            elif 'parts' in payload:
-                # If the body is split into parts (common for HTML emails)
-                for part in payload['parts']:
-                    if part.get('mimeType') == 'text/html':
-                        body = base64.urlsafe_b64decode(part['body']['data']).decode('utf-8')
-                        break
-
-            # Parse the email body based on the sender
-            jobs = []
-            if body:
-                from_email_lower = from_email.lower()
-                try:
-                    if from_email_lower == "alert@indeed.com":
-                        jobs = parse_indeed_email(body)
-                    elif from_email_lower == "jobalerts-noreply@linkedin.com":
-                        jobs = parse_linkedin_email(body)
-                    else:
-                        # For unknown senders, return an empty list
-                        jobs = []
-                except Exception as e:
-                    # Log the error for debugging purposes
-                    print(f"Error parsing email from {from_email}: {e}")
-                    # Return an empty list in case of any parsing errors
-                    jobs = []
-
-            # Add parsed email details
-            emails.append({
-                'id': msg['id'],
-                'subject': subject,
-                'sender': sender,
-                'jobs': jobs,  # List of extracted job listings ** The individual job postings a user will interact with on the FE **
-            })
-
-        return emails
+        query = build_sender_query([from_email])
+        message_ids = list(iter_message_ids(service, query, limit=max_results, http=http))
+
+        # Fetch details for all messages in as few batch requests as possible
+        fetched_messages, _ = batch_get_messages(service, message_ids, batch_size=batch_size, http=http)
+
+        # Parse each message based on the sender we queried for
+        return [parse_gmail_message(msg, from_email=from_email) for msg in fetched_messages]
 
     except Exception as e:
         return {"error": str(e)}
 
 
+def fetch_emails_for_senders(access_token, senders, max_results=5):
+    """
+    Runs fetch_recent_emails for every sender concurrently on the shared, bounded fetch pool
+    (settings.GMAIL_FETCH_MAX_WORKERS), so total latency tracks the slowest sender.
+    Returns:
+        list of tuple: (sender, emails_or_error) in the same order as `senders`, where
+                       emails_or_error is either a list of emails or {"error": "..."}.
+    """
+    if not senders:
+        return []
+
+    executor = get_fetch_executor()
+    futures = [
+        executor.submit(fetch_recent_emails, access_token, sender, max_results=max_results)
+        for sender in senders
+    ]
+
+    results = []
+    for sender, future in zip(senders, futures):
+        try:
+            results.append((sender, future.result()))
+        except Exception as e:
+            results.append((sender, {"error": str(e)}))
+    return results
+
+
+def get_request_user(request):
+    """
+    Returns the User identified by an optional `user_email` (query string or JSON body), or None.
+    """
+    user_email = request.GET.get("user_email")
+    if not user_email and request.body:
+        try:
+            user_email = json.loads(request.body).get("user_email")
+        except (json.JSONDecodeError, UnicodeDecodeError, AttributeError):
+            user_email = None
+    if not user_email:
+        return None
+    return User.objects.filter(email=user_email).first()
+
+
 @csrf_exempt
 def fetch_emails_view(request):
     """
     Django view to fetch recent emails.
+    Returns the list of emails, or a 207 with {"emails": [...], "errors": {sender: error}} when
+    some senders could not be fetched (a 500 when none could).
     """
     if request.method == "POST":
         auth_header = request.META.get("HTTP_AUTHORIZATION")
@@ -95,18 +119,47 @@ def fetch_emails_view(request):
         if token_type.lower() != "bearer":
             return JsonResponse({"error": "Invalid token type"}, status=400)
 
-        # Define the list of senders to fetch emails from
-        senders = ["jobalerts-noreply@linkedin.com", "alert@indeed.com"]
+        # Fetch from every registered alert source (see services.parser_registry)
+        senders = get_alert_senders()
+
+        # Known users sync incrementally from their stored Gmail history cursor
+        user = get_request_user(request)
+        if user is not None:
+            try:
+                all_emails = sync_user_emails(access_token, user, senders)
+            except Exception as e:
+                return JsonResponse({"error": str(e)}, status=500)
+            return JsonResponse(all_emails, safe=False, status=200)
+
         all_emails = []
+        errors = {}
 
-        for sender in senders:
-            # Fetch recent emails for each sender
-            emails = fetch_recent_emails(access_token, sender, max_results=5)
+        # Fetch recent emails for all senders at once; results come back in sender order
+        for sender, emails in fetch_emails_for_senders(access_token, senders, max_results=5):
             if isinstance(emails, dict) and "error" in emails:
-                return JsonResponse({"error": emails["error"]}, status=500)
+                # Report the failure for this sender without dropping the others
+                errors[sender] = emails["error"]
+                continue
             all_emails.extend(emails)
 
+        if errors and len(errors) == len(senders):
+            return JsonResponse({"error": next(iter(errors.values())), "errors": errors}, status=500)
+        if errors:
+            # Partial failure: the emails that were fetched, and the error of each sender that failed
+            return JsonResponse({"emails": all_emails, "errors": errors}, status=207)
+
         # Return the aggregated emails with job listings
         return JsonResponse(all_emails, safe=False, status=200)
 
     return JsonResponse({"error": "Invalid request"}, status=400)
+
+
+def parser_stats_view(request):
+    """
+    Returns each alert parser's version, capabilities and counters for this process
+    (parses done in parse pool workers are counted in the workers).
+    """
+    if request.method == "GET":
+        return JsonResponse(parser_registry.stats(), status=200)
+
+    return JsonResponse({"error": "Invalid request"}, status=400)
@@ -0,0 +1,107 @@
+"""
+Response cache for job posting list pages.
+
+Entries hold the encoded JSON body of one list response, keyed by the response's ETag (user,
+feed version and query string digest, see services.get_feed_etag). Saves and deletes bump
+the feed version in the same transaction as the change, so later requests look up new keys and
+never see a stale page; the old entries just expire. Any Django cache backend works (locmem in
+tests, a shared backend in production). Hit/miss counters are kept in process, so counting a
+lookup never costs another cache round trip.
+"""
+import logging
+import threading
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger('job_postings')
+
+DEFAULT_TIMEOUT = 10 * 60
+STAT_NAMES = ('hits', 'misses', 'stores', 'errors')
+
+
+class FeedCache:
+    """
+    Cache of encoded job posting list responses on a Django cache alias.
+    """
+
+    def __init__(self, cache_alias='default', timeout=DEFAULT_TIMEOUT, prefix='job-postings-feed'):
+        self.cache_alias = cache_alias
+        self.timeout = timeout
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(STAT_NAMES, 0)
+
+    @property
+    def enabled(self):
+        return bool(self.cache_alias)
+
+    def make_key(self, etag):
+        opaque_tag = etag.strip('"')
+        return f"{self.prefix}:{opaque_tag}"
+
+    def get(self, key):
+        """
+        Returns the cached response body for `key`, or None.
+        """
+        if not self.enabled:
+            return None
+        try:
+            content = caches[self.cache_alias].get(key)
+        except Exception as e:
+            logger.warning(f"Job postings feed cache lookup failed: {e}")
+            self._count('errors')
+            return None
+        self._count('hits' if content is not None else 'misses')
+        return content
+
+    def set(self, key, content):
+        if not self.enabled:
+            return
+        try:
+            caches[self.cache_alias].set(key, content, self.timeout)
+        except Exception as e:
+            logger.warning(f"Job postings feed cache store failed: {e}")
+            self._count('errors')
+            return
+        self._count('stores')
+
+    def stats(self):
+        """
+        Returns this process's hit/miss counters and hit rate.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        stats.update(enabled=self.enabled, cache_alias=self.cache_alias, timeout=self.timeout)
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            for name in self._stats:
+                self._stats[name] = 0
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+
+_feed_cache = None
+_feed_cache_lock = threading.Lock()
+
+
+def get_feed_cache():
+    """
+    Returns the process-wide FeedCache configured from settings:
+    JOB_POSTINGS_FEED_CACHE_ALIAS (Django cache alias, None disables it) and
+    JOB_POSTINGS_FEED_CACHE_TIMEOUT (seconds).
+    """
+    global _feed_cache
+    if _feed_cache is None:
+        with _feed_cache_lock:
+            if _feed_cache is None:
+                _feed_cache = FeedCache(
+                    cache_alias=getattr(settings, 'JOB_POSTINGS_FEED_CACHE_ALIAS', 'default'),
+                    timeout=getattr(settings, 'JOB_POSTINGS_FEED_CACHE_TIMEOUT', DEFAULT_TIMEOUT),
+                )
+    return _feed_cache
@@ -0,0 +1,104 @@
+import json
+import time
+import tracemalloc
+import uuid
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from job_postings.models import JobPosting
+from job_postings.serializers import dumps, get_projection, orjson, serialize_rows
+from users.models import User
+
+
+def legacy_serialize(queryset):
+    # Per-instance loop get_job_postings used before the projection path
+    serialized_jobs = []
+    for job in queryset:
+        serialized_jobs.append({
+            "job_uuid": str(job.job_uuid),
+            "title": job.title,
+            "company_name": job.company_name,
+            "location": job.location,
+            "salary": job.salary,
+            "job_type": job.job_type,
+            "date_posted": job.date_posted.isoformat() if job.date_posted else None,
+            "application_deadline": job.application_deadline.isoformat() if job.application_deadline else None,
+            "benefits": job.benefits,
+            "summary": job.summary,
+            "experience_level": job.experience_level,
+            "industries": job.industries,
+            "skills": job.skills,
+            "job_description_snippet": job.job_description_snippet,
+            "status": job.status,
+            "employment_type": job.employment_type,
+            "company_url": job.company_url,
+            "company_logo_url": job.company_logo_url,
+            "job_url": job.job_url,
+            "match_score": job.match_score,
+            "source": job.source,
+            "gmail_message_id": job.gmail_message_id,
+            "gmail_thread_id": job.gmail_thread_id,
+            "fetched_at": job.fetched_at.isoformat(),
+            "created_at": job.created_at.isoformat(),
+            "updated_at": job.updated_at.isoformat(),
+        })
+    return json.dumps({"job_postings": serialized_jobs}, cls=DjangoJSONEncoder).encode('utf-8')
+
+
+def projection_serialize(queryset):
+    rows_queryset, _ = get_projection(queryset)
+    return dumps({"job_postings": serialize_rows(list(rows_queryset))})
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds job postings in a rolled-back transaction and compares the old per-instance serialization "
+        "of get_job_postings with the projection path (time, peak memory, output)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help="Job postings to seed and serialize.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = User.objects.create(username=f"bench-{uuid.uuid4().hex[:12]}", email=f"bench-{uuid.uuid4().hex[:12]}@example.com")
+            now = timezone.now()
+            JobPosting.objects.bulk_create([
+                JobPosting(
+                    user=user,
+                    title=f"Senior Python Developer {i}",
+                    company_name="Acme Corp",
+                    location="Toronto, ON",
+                    salary="$90,000 a year",
+                    job_type="In Person",
+                    experience_level="Senior",
+                    job_description_snippet="Design, build and maintain services. " * 4,
+                    job_url=f"https://ca.indeed.com/rc/clk/dl?jk={i:016x}&from=ja&tk=1ik{i}",
+                    source="Indeed",
+                    gmail_message_id=f"msg{i // 20}",
+                    skills=["python", "django"],
+                    fetched_at=now - timedelta(minutes=i),
+                )
+                for i in range(options['rows'])
+            ], batch_size=500)
+            queryset = JobPosting.objects.filter(user=user).order_by('-fetched_at', '-id')
+
+            outputs = {}
+            for name, serialize in [("instances + dicts", legacy_serialize), ("projection", projection_serialize)]:
+                tracemalloc.start()
+                started = time.perf_counter()
+                outputs[name] = serialize(queryset)
+                elapsed = time.perf_counter() - started
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                self.stdout.write(
+                    f"{name:<18} {elapsed * 1000:8.1f} ms  peak {peak / 1024 / 1024:7.2f} MiB  "
+                    f"{len(outputs[name]) / 1024:8.0f} KB"
+                )
+
+            if json.loads(outputs["instances + dicts"]) != json.loads(outputs["projection"]):
+                self.stderr.write("Projection output differs from the per-instance serialization")
+            self.stdout.write(f"JSON encoder: {'orjson' if orjson is not None else 'json (orjson not installed)'}")
+            transaction.set_rollback(True)
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from gmail_integration.utils import determine_experience_levels, determine_job_types
+from job_postings.models import JobPosting
+from job_postings.services import bump_feed_versions
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes experience_level (from the title) and job_type (from the location) of existing "
+        "job postings with the current classifiers, and saves the rows that change."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows classified and updated per batch.")
+        parser.add_argument('--dry-run', action='store_true', help="Report the changes without saving them.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        rows = JobPosting.all_objects.order_by('pk').only('pk', 'user_id', 'title', 'location', 'experience_level', 'job_type')
+
+        scanned = changed = 0
+        batch = []
+        for job in rows.iterator(chunk_size=batch_size):
+            batch.append(job)
+            if len(batch) >= batch_size:
+                changed += self.reclassify(batch, options['dry_run'])
+                scanned += len(batch)
+                batch = []
+        if batch:
+            changed += self.reclassify(batch, options['dry_run'])
+            scanned += len(batch)
+
+        verb = "Would update" if options['dry_run'] else "Updated"
+        self.stdout.write(f"{verb} {changed} of {scanned} job postings")
+
+    def reclassify(self, jobs, dry_run):
+        experience_levels = determine_experience_levels([job.title for job in jobs])
+        job_types = determine_job_types([job.location for job in jobs])
+
+        changed = []
+        updated_at = timezone.now()
+        for job, experience_level, job_type in zip(jobs, experience_levels, job_types):
+            if (job.experience_level, job.job_type) != (experience_level, job_type):
+                job.experience_level = experience_level
+                job.job_type = job_type
+                # bulk_update() skips auto_now
+                job.updated_at = updated_at
+                changed.append(job)
+
+        if changed and not dry_run:
+            with transaction.atomic():
+                # Delta sync picks up rows by change_seq, the owner's new feed version
+                versions = bump_feed_versions({job.user_id for job in changed})
+                for job in changed:
+                    job.change_seq = versions[job.user_id]
+                JobPosting.all_objects.bulk_update(changed, ['experience_level', 'job_type', 'updated_at', 'change_seq'])
+        return len(changed)
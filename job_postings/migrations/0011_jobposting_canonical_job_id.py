@@ -0,0 +1,127 @@
+# Generated by Django 5.1.4 on 2026-10-18 10:41
+
+import re
+from urllib.parse import parse_qs, urlsplit
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen copy of the job ID extraction in gmail_integration/canonical.py at the time of this
+# migration, so replaying it never depends on (or changes with) the live app code.
+INDEED_JOB_KEY_RE = re.compile(r"^[0-9A-Za-z]{1,64}$")
+LINKEDIN_JOB_PATH_RE = re.compile(r"/jobs/view/(?:[^/?#]*-)?(\d+)")
+LINKEDIN_JOB_ID_RE = re.compile(r"^\d{1,64}$")
+SOURCE_HOSTS = {
+    "indeed.com": "Indeed",
+    "linkedin.com": "LinkedIn",
+}
+
+
+def extract_indeed_job_id(job_url):
+    query = parse_qs(urlsplit(job_url).query)
+    for name in ("jk", "vjk"):
+        for value in query.get(name, []):
+            if INDEED_JOB_KEY_RE.match(value):
+                return value.lower()
+    return None
+
+
+def extract_linkedin_job_id(job_url):
+    parts = urlsplit(job_url)
+    match = LINKEDIN_JOB_PATH_RE.search(parts.path)
+    if match:
+        return match.group(1)
+    for value in parse_qs(parts.query).get("currentJobId", []):
+        if LINKEDIN_JOB_ID_RE.match(value):
+            return value
+    return None
+
+
+JOB_ID_EXTRACTORS = {
+    "Indeed": extract_indeed_job_id,
+    "LinkedIn": extract_linkedin_job_id,
+}
+
+
+def guess_job_source(job_url):
+    if not job_url:
+        return None
+    try:
+        hostname = urlsplit(job_url).hostname
+    except ValueError:
+        return None
+    labels = (hostname or "").split(".")
+    for index in range(len(labels) - 1):
+        source = SOURCE_HOSTS.get(".".join(labels[index:]))
+        if source:
+            return source
+    return None
+
+
+def get_canonical_job_id(source, job_url):
+    extractor = JOB_ID_EXTRACTORS.get(source)
+    if extractor is None or not job_url:
+        return None
+    try:
+        job_id = extractor(job_url)
+    except ValueError:
+        return None
+    if job_id and len(job_id) <= 64:
+        return job_id
+    return None
+
+
+def backfill_canonical_job_ids(apps, schema_editor):
+    """
+    Derives source and canonical_job_id from existing job links. Later duplicates of a job keep a
+    NULL canonical_job_id so the unique constraint can be added.
+    """
+    JobPosting = apps.get_model("job_postings", "JobPosting")
+    seen = set()
+    changed = []
+    for job in JobPosting.objects.order_by("pk").only("pk", "user_id", "source", "job_url").iterator(chunk_size=1000):
+        source = job.source
+        if not source or source == "Unknown":
+            source = guess_job_source(job.job_url) or source
+        canonical_job_id = get_canonical_job_id(source, job.job_url)
+        key = (job.user_id, source, canonical_job_id)
+        if canonical_job_id is None or key in seen:
+            continue
+        seen.add(key)
+        job.source = source
+        job.canonical_job_id = canonical_job_id
+        changed.append(job)
+        if len(changed) >= 1000:
+            JobPosting.objects.bulk_update(changed, ["source", "canonical_job_id"])
+            changed = []
+    if changed:
+        JobPosting.objects.bulk_update(changed, ["source", "canonical_job_id"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("job_postings", "0010_alter_jobposting_job_url"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="jobposting",
+            name="canonical_job_id",
+            field=models.CharField(
+                blank=True,
+                help_text="Provider's stable job key (e.g. Indeed jk, LinkedIn job ID), used for deduplication.",
+                max_length=64,
+                null=True,
+            ),
+        ),
+        migrations.RunPython(backfill_canonical_job_ids, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="jobposting",
+            constraint=models.UniqueConstraint(
+                fields=("user", "source", "canonical_job_id"),
+                name="unique_job_posting_per_user_source",
+            ),
+        ),
+    ]
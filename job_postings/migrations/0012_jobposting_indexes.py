@@ -0,0 +1,29 @@
+# Generated by Django 5.1.4 on 2026-10-18 10:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("job_postings", "0011_jobposting_canonical_job_id"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="jobposting",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["user", "-fetched_at"],
+                name="job_posting_feed_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="jobposting",
+            index=models.Index(
+                fields=["user", "gmail_message_id"], name="job_posting_message_idx"
+            ),
+        ),
+    ]
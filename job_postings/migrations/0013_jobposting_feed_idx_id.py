@@ -0,0 +1,27 @@
+# Generated by Django 5.1.4 on 2026-10-18 10:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("job_postings", "0012_jobposting_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="jobposting",
+            name="job_posting_feed_idx",
+        ),
+        migrations.AddIndex(
+            model_name="jobposting",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["user", "-fetched_at", "-id"],
+                name="job_posting_feed_idx",
+            ),
+        ),
+    ]
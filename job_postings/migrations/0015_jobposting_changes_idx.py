@@ -0,0 +1,21 @@
+# Generated by Django 5.1.4 on 2026-10-18 10:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("job_postings", "0014_jobpostingfeedstate"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="jobposting",
+            index=models.Index(
+                fields=["user", "updated_at", "id"], name="job_posting_changes_idx"
+            ),
+        ),
+    ]
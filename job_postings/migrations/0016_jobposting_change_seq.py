@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("job_postings", "0015_jobposting_changes_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="jobposting",
+            name="job_posting_changes_idx",
+        ),
+        migrations.AddField(
+            model_name="jobposting",
+            name="change_seq",
+            field=models.PositiveBigIntegerField(
+                default=0,
+                help_text="Feed version (JobPostingFeedState.version) of the last change to the row; orders delta sync.",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="jobposting",
+            index=models.Index(
+                fields=["user", "change_seq", "id"], name="job_posting_changes_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:14
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("job_postings", "0016_jobposting_change_seq"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="jobpostingfeedstate",
+            name="modified_at",
+        ),
+    ]
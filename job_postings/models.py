@@ -2,6 +2,17 @@ import uuid
 from django.db import models
 from users.models import User
 
+
+class ActiveJobPostingManager(models.Manager):
+    """
+    Default JobPosting manager: leaves out soft-deleted postings, so queries match the
+    partial (NOT is_deleted) indexes. Use JobPosting.all_objects to include them.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
 class JobPosting(models.Model):
     """
     Represents a single job posting (or email referencing a job).
@@ -32,6 +43,12 @@ class JobPosting(models.Model):
         blank=True,
         help_text="Direct URL to the job posting."
     )
+    canonical_job_id = models.CharField(
+        max_length=64,
+        null=True,
+        blank=True,
+        help_text="Provider's stable job key (e.g. Indeed jk, LinkedIn job ID), used for deduplication."
+    )
     employment_type = models.CharField(
         max_length=50,
         null=True,
@@ -152,6 +169,60 @@ class JobPosting(models.Model):
         auto_now=True,
         help_text="Timestamp when the job posting was last updated in the database."
     )
+    change_seq = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Feed version (JobPostingFeedState.version) of the last change to the row; orders delta sync."
+    )
+
+    objects = ActiveJobPostingManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            # Feed query: a user's live postings, newest first (id breaks ties for keyset pagination)
+            models.Index(
+                fields=["user", "-fetched_at", "-id"],
+                name="job_posting_feed_idx",
+                condition=models.Q(is_deleted=False),
+            ),
+            # Dedup lookup for postings without a canonical job ID (job_url is filtered on the matches)
+            models.Index(fields=["user", "gmail_message_id"], name="job_posting_message_idx"),
+            # Delta sync: a user's postings changed (or soft-deleted) after a cursor, oldest first
+            models.Index(fields=["user", "change_seq", "id"], name="job_posting_changes_idx"),
+        ]
+        constraints = [
+            # One row per job per user and source; rows without a canonical ID (NULL) never conflict
+            models.UniqueConstraint(
+                fields=["user", "source", "canonical_job_id"],
+                name="unique_job_posting_per_user_source",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title[:50]} - {self.source or 'Unknown'}"
+
+
+class JobPostingFeedState(models.Model):
+    """
+    Per-user version of the job postings feed, bumped whenever any of the user's postings is
+    saved, updated or deleted. List responses derive their ETag from it, so conditional
+    requests are answered without querying the postings table.
+
+    The changed rows get the new version as their change_seq. The bump's row lock is held until
+    the change commits, so a user's versions become visible in order: once a reader sees version
+    N, every change up to N is visible too. That makes change_seq a safe delta sync cursor,
+    unlike updated_at, which is set before the (possibly slow) transaction commits.
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name="job_posting_feed_state"
+    )
+    version = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Incremented on every change to the user's job postings."
+    )
+
+    def __str__(self):
+        return f"Job postings feed of user {self.user_id} (v{self.version})"
@@ -0,0 +1,137 @@
+"""
+Keyset (cursor) pagination for job posting lists.
+
+Pages are ordered by (fetched_at, id) descending. The cursor is an opaque token holding the
+(fetched_at, id) of the last row returned; the next page starts strictly after it, so every
+page is an index range scan on the feed index, however deep the client pages (no OFFSET).
+
+Delta sync (paginate_changes) works the same way on (change_seq, id) ascending: its `since`
+cursor holds the (change_seq, id) of the last change the client has seen, or just a change_seq
+once every change up to it has been delivered. change_seq values become visible in commit
+order (see JobPostingFeedState), so a cursor never skips a change committed later.
+"""
+import base64
+import json
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+FEED_ORDERING = ('-fetched_at', '-id')
+CHANGES_ORDERING = ('change_seq', 'id')
+
+
+def encode_cursor(fetched_at, pk):
+    payload = json.dumps({'f': fetched_at.isoformat(), 'i': pk}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Returns the (fetched_at, id) in a cursor. Raises ValueError if the cursor is malformed.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        fetched_at = parse_datetime(payload['f'])
+        pk = int(payload['i'])
+    except (ValueError, TypeError, KeyError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {e}") from e
+    if fetched_at is None:
+        raise ValueError("Invalid cursor: bad timestamp")
+    return fetched_at, pk
+
+
+def encode_sync_cursor(change_seq, pk=None):
+    payload = json.dumps({'s': change_seq, 'i': pk}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_sync_cursor(cursor):
+    """
+    Returns the (change_seq, id or None) in a delta sync cursor. Raises ValueError if it is malformed.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        change_seq = int(payload['s'])
+        pk = None if payload['i'] is None else int(payload['i'])
+    except (ValueError, TypeError, KeyError, UnicodeError) as e:
+        raise ValueError(f"Invalid sync cursor: {e}") from e
+    if change_seq < 0:
+        raise ValueError("Invalid sync cursor: negative change_seq")
+    return change_seq, pk
+
+
+def parse_page_size(value):
+    """
+    Returns the page size for a `limit` query parameter (settings.JOB_POSTINGS_PAGE_SIZE if empty,
+    capped at settings.JOB_POSTINGS_MAX_PAGE_SIZE). Raises ValueError if it isn't a positive integer.
+    """
+    max_page_size = getattr(settings, 'JOB_POSTINGS_MAX_PAGE_SIZE', MAX_PAGE_SIZE)
+    if value in (None, ''):
+        return min(getattr(settings, 'JOB_POSTINGS_PAGE_SIZE', DEFAULT_PAGE_SIZE), max_page_size)
+    limit = int(value)
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    return min(limit, max_page_size)
+
+
+def paginate(queryset, limit, cursor=None, key=None):
+    """
+    Returns one page of `queryset` in feed order.
+    Args:
+        queryset (QuerySet): Job postings to page through (ordering is replaced).
+        limit (int): Rows per page.
+        cursor (str): next_cursor of the previous page, or None for the first page.
+        key (callable): Returns (fetched_at, id) for a row; defaults to model instance attributes
+                        (pass one for values()/values_list() querysets).
+    Returns:
+        tuple: (list of rows, next_cursor or None on the last page)
+    """
+    queryset = queryset.order_by(*FEED_ORDERING)
+    if cursor:
+        fetched_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(fetched_at__lt=fetched_at) | Q(fetched_at=fetched_at, id__lt=pk))
+
+    # One extra row tells whether there is a next page without a COUNT query
+    rows = list(queryset[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    if key is None:
+        key = lambda row: (row.fetched_at, row.pk)
+    return rows, encode_cursor(*key(rows[-1]))
+
+
+def paginate_changes(queryset, limit, since=None, feed_version=0, key=None):
+    """
+    Returns the rows of `queryset` changed after the `since` cursor, oldest change first.
+    Args:
+        queryset (QuerySet): Job postings to sync, including soft-deleted ones (ordering is replaced).
+        limit (int): Rows per page.
+        since (str): next_since of the previous sync, or None to start from the beginning.
+        feed_version (int): The user's feed version, read before this query: every change up to it is visible.
+        key (callable): Returns (change_seq, id) for a row; defaults to model instance attributes.
+    Returns:
+        tuple: (list of rows, next_since cursor, whether more changes follow)
+    """
+    since_seq, since_pk = decode_sync_cursor(since) if since else (None, None)
+    queryset = queryset.order_by(*CHANGES_ORDERING)
+    if since_pk is not None:
+        queryset = queryset.filter(Q(change_seq__gt=since_seq) | Q(change_seq=since_seq, id__gt=since_pk))
+    elif since_seq is not None:
+        queryset = queryset.filter(change_seq__gt=since_seq)
+
+    rows = list(queryset[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if key is None:
+        key = lambda row: (row.change_seq, row.pk)
+    if has_more:
+        return rows, encode_sync_cursor(*key(rows[-1])), True
+    # Everything up to the last row's change_seq (or the feed version, if higher) has been delivered:
+    # a change_seq is only visible once all lower ones are
+    last_seq = key(rows[-1])[0] if rows else 0
+    return rows, encode_sync_cursor(max(last_seq, feed_version, since_seq or 0)), False
@@ -0,0 +1,136 @@
+"""
+Projection-based serialization for job posting lists.
+
+Rows are fetched as tuples of just the serialized columns (values_list), zipped into dicts and
+encoded to bytes in one call, instead of building a JobPosting instance and a hand-written dict
+per row. orjson encodes datetimes and UUIDs natively; without it, those columns are converted
+column by column and the stdlib encoder is used.
+
+Clients can ask for a subset of the columns (a sparse fieldset) with the `fields` query parameter:
+a preset name from FIELD_PRESETS and/or field names, comma-separated. Only those columns are
+selected and returned.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Columns returned for each job posting, in output order (the keys match the model fields)
+JOB_POSTING_FIELDS = (
+    'job_uuid',
+    'title',
+    'company_name',
+    'location',
+    'salary',
+    'job_type',
+    'date_posted',
+    'application_deadline',
+    'benefits',
+    'summary',
+    'experience_level',
+    'industries',
+    'skills',
+    'job_description_snippet',
+    'status',
+    'employment_type',
+    'company_url',
+    'company_logo_url',
+    'job_url',
+    'match_score',
+    'source',
+    'gmail_message_id',
+    'gmail_thread_id',
+    'fetched_at',
+    'created_at',
+    'updated_at',
+)
+# Named fieldsets for the `fields` query parameter
+FIELD_PRESETS = {
+    # What the frontend's job list cards show
+    'card': ('job_uuid', 'title', 'company_name', 'location', 'salary', 'job_type', 'fetched_at'),
+    'full': JOB_POSTING_FIELDS,
+}
+DATETIME_FIELDS = frozenset(['date_posted', 'application_deadline', 'fetched_at', 'created_at', 'updated_at', 'deleted_at'])
+UUID_FIELDS = frozenset(['job_uuid'])
+# Columns the keyset cursor needs (see pagination.py), fetched after the serialized ones
+CURSOR_COLUMNS = ('fetched_at', 'id')
+# Columns delta sync needs: its cursor, then what tells live rows from tombstones
+CHANGES_COLUMNS = ('change_seq', 'id', 'is_deleted', 'job_uuid', 'deleted_at')
+TOMBSTONE_FIELDS = ('job_uuid', 'deleted_at')
+
+
+def parse_fields(value):
+    """
+    Returns the fields to serialize for a `fields` query parameter (all of them if empty), in
+    JOB_POSTING_FIELDS order. Raises ValueError for unknown field or preset names.
+    """
+    if not value:
+        return JOB_POSTING_FIELDS
+    requested = set()
+    for name in filter(None, (name.strip() for name in value.split(','))):
+        if name in FIELD_PRESETS:
+            requested.update(FIELD_PRESETS[name])
+        elif name in JOB_POSTING_FIELDS:
+            requested.add(name)
+        else:
+            raise ValueError(f"Unknown field: {name}")
+    if not requested:
+        raise ValueError("No fields requested")
+    return tuple(name for name in JOB_POSTING_FIELDS if name in requested)
+
+
+def get_projection(queryset, fields=JOB_POSTING_FIELDS, cursor_columns=CURSOR_COLUMNS):
+    """
+    Returns (values_list queryset, cursor key function) for serializing `fields` of `queryset`.
+    `cursor_columns` are appended after `fields`, so they are fetched even if not serialized; the
+    key function returns the first two of them.
+    """
+    columns = (*fields, *cursor_columns)
+    cursor_index = len(fields)
+    return (
+        queryset.values_list(*columns),
+        lambda row: (row[cursor_index], row[cursor_index + 1]),
+    )
+
+
+def split_changes(rows, fields):
+    """
+    Splits rows projected with CHANGES_COLUMNS into (live rows, tombstone rows of TOMBSTONE_FIELDS).
+    """
+    is_deleted_index = len(fields) + CHANGES_COLUMNS.index('is_deleted')
+    tombstone_indexes = [len(fields) + CHANGES_COLUMNS.index(name) for name in TOMBSTONE_FIELDS]
+    live_rows = []
+    tombstones = []
+    for row in rows:
+        if row[is_deleted_index]:
+            tombstones.append(tuple(row[index] for index in tombstone_indexes))
+        else:
+            live_rows.append(row)
+    return live_rows, tombstones
+
+
+def serialize_rows(rows, fields=JOB_POSTING_FIELDS):
+    """
+    Turns values_list rows (extra trailing columns are ignored) into dicts keyed by `fields`.
+    Without orjson, datetime and UUID columns are converted to strings here.
+    """
+    if orjson is None and rows:
+        columns = list(zip(*rows))
+        for index, name in enumerate(fields):
+            if name in DATETIME_FIELDS:
+                columns[index] = [value.isoformat() if value is not None else None for value in columns[index]]
+            elif name in UUID_FIELDS:
+                columns[index] = [str(value) if value is not None else None for value in columns[index]]
+        rows = zip(*columns)
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def dumps(data):
+    """
+    Encodes `data` to JSON bytes.
+    """
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
@@ -0,0 +1,172 @@
+import hashlib
+import logging
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils.http import quote_etag
+from .models import JobPosting, JobPostingFeedState
+
+logger = logging.getLogger('job_postings')
+
+DEFAULT_SAVE_BATCH_SIZE = 500
+# Fields refreshed when an alert brings in a job the user already has
+UPSERT_UPDATE_FIELDS = [
+    'title',
+    'company_name',
+    'location',
+    'salary',
+    'job_url',
+    'job_description_snippet',
+    'job_type',
+    'experience_level',
+]
+
+
+def _job_key(job):
+    """
+    Dedup key of a ParsedJob: its canonical job ID if it has one, else (gmail_message_id, job_url).
+    """
+    if job.canonical_job_id:
+        return ('job', job.source, job.canonical_job_id)
+    return ('message', job.gmail_message_id, job.job_url)
+
+
+def save_parsed_jobs(user, jobs, batch_size=None):
+    """
+    Inserts new jobs and refreshes the ones the user already has, with a constant number of queries:
+    one lookup of the existing rows, then batched INSERT ... ON CONFLICT statements.
+    Jobs must already have their source and canonical_job_id assigned (see canonical.assign_job_identity).
+    Args:
+        user (User): Owner of the job postings.
+        jobs (list of ParsedJob): Jobs with gmail_message_id and fetched_at set.
+        batch_size (int): Rows per INSERT (settings.JOB_POSTINGS_SAVE_BATCH_SIZE).
+    Returns:
+        dict: Counts of 'inserted', 'updated' and 'skipped' jobs.
+    """
+    if batch_size is None:
+        batch_size = getattr(settings, 'JOB_POSTINGS_SAVE_BATCH_SIZE', DEFAULT_SAVE_BATCH_SIZE)
+
+    # Drop repeats within the request, keeping the first occurrence
+    unique_jobs = {}
+    for job in jobs:
+        unique_jobs.setdefault(_job_key(job), job)
+    skipped = len(jobs) - len(unique_jobs)
+
+    canonical_jobs = [job for job in unique_jobs.values() if job.canonical_job_id]
+    legacy_jobs = [job for job in unique_jobs.values() if not job.canonical_job_id]
+    lookup = Q(pk__in=[])
+    if canonical_jobs:
+        # Served by the (user, source, canonical_job_id) unique index
+        lookup |= Q(
+            source__in={job.source for job in canonical_jobs},
+            canonical_job_id__in={job.canonical_job_id for job in canonical_jobs},
+        )
+    if legacy_jobs:
+        lookup |= Q(
+            canonical_job_id__isnull=True,
+            is_deleted=False,
+            gmail_message_id__in={job.gmail_message_id for job in legacy_jobs},
+            job_url__in={job.job_url for job in legacy_jobs},
+        )
+
+    existing = {}
+    if canonical_jobs or legacy_jobs:
+        columns = ['source', 'canonical_job_id', 'gmail_message_id', 'is_deleted', *UPSERT_UPDATE_FIELDS]
+        # Deleted postings count as existing, so a dismissed job isn't saved again
+        for row in JobPosting.all_objects.filter(lookup, user=user).values(*columns):
+            if row['canonical_job_id']:
+                key = ('job', row['source'], row['canonical_job_id'])
+            else:
+                key = ('message', row['gmail_message_id'], row['job_url'])
+            existing[key] = row
+
+    new_postings = []
+    changed_postings = []
+    for key, job in unique_jobs.items():
+        row = existing.get(key)
+        if row is None:
+            new_postings.append(job.to_model(user, title=job.title or "No Title", source=job.source or "Unknown"))
+        elif key[0] == 'job' and not row['is_deleted'] and any(
+            getattr(job, field) is not None and getattr(job, field) != row[field] for field in UPSERT_UPDATE_FIELDS
+        ):
+            # Keep stored values the new alert doesn't have
+            values = {field: getattr(job, field) if getattr(job, field) is not None else row[field] for field in UPSERT_UPDATE_FIELDS}
+            changed_postings.append(job.to_model(user, **values))
+        else:
+            # Already saved and unchanged, or deleted by the user
+            skipped += 1
+
+    with transaction.atomic():
+        if new_postings or changed_postings:
+            # Taken first: the bump's row lock orders this user's concurrent saves by commit
+            change_seq = bump_feed_versions([user.pk])[user.pk]
+            for posting in (*new_postings, *changed_postings):
+                posting.change_seq = change_seq
+        # A concurrent save may have inserted the same job since the lookup; the constraint drops it
+        JobPosting.objects.bulk_create(new_postings, batch_size=batch_size, ignore_conflicts=True)
+        dropped = _count_dropped_postings(new_postings, batch_size)
+        JobPosting.objects.bulk_create(
+            changed_postings,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['user', 'source', 'canonical_job_id'],
+            update_fields=[*UPSERT_UPDATE_FIELDS, 'updated_at', 'change_seq'],
+        )
+
+    counts = {'inserted': len(new_postings) - dropped, 'updated': len(changed_postings), 'skipped': skipped + dropped}
+    logger.info(f"Saved job postings for user {user.pk}: {counts}")
+    return counts
+
+
+def _count_dropped_postings(postings, batch_size):
+    """
+    Returns how many of `postings` an INSERT ... ON CONFLICT DO NOTHING left out. bulk_create() doesn't
+    report it, but each posting carries the job_uuid generated for it, so the ones missing were dropped.
+    Only postings with a canonical job ID can conflict.
+    """
+    job_uuids = [posting.job_uuid for posting in postings if posting.canonical_job_id]
+    saved = 0
+    for start in range(0, len(job_uuids), batch_size):
+        saved += JobPosting.all_objects.filter(job_uuid__in=job_uuids[start:start + batch_size]).count()
+    return len(job_uuids) - saved
+
+
+def bump_feed_versions(user_ids):
+    """
+    Marks the job postings feeds of `user_ids` as changed (new ETag for their lists) and returns
+    {user_id: new version}. Call it in the same transaction as the change, before writing the
+    rows, and set their change_seq to the user's new version.
+    """
+    if not user_ids:
+        return {}
+    with transaction.atomic():
+        JobPostingFeedState.objects.bulk_create(
+            [JobPostingFeedState(user_id=user_id) for user_id in user_ids],
+            ignore_conflicts=True,
+        )
+        # F() increment, so concurrent bumps aren't lost
+        JobPostingFeedState.objects.filter(user_id__in=user_ids).update(version=F('version') + 1)
+        return dict(JobPostingFeedState.objects.filter(user_id__in=user_ids).values_list('user_id', 'version'))
+
+
+def get_feed_version(user):
+    """
+    Returns the current version of `user`'s job postings feed (one primary key lookup).
+    """
+    # No state row: the feed hasn't changed since feed versions were introduced
+    return JobPostingFeedState.objects.filter(user=user).values_list('version', flat=True).first() or 0
+
+
+def get_feed_etag(user, version, params=''):
+    """
+    Returns the ETag of a list response of `user`'s job postings at feed `version`, so no query
+    on the postings table is needed to answer conditional requests.
+    There is no Last-Modified: HTTP dates have whole-second precision, so a change in the same
+    second as the previous response would get a stale 304 from If-Modified-Since.
+    Args:
+        user (User): Owner of the job postings.
+        version (int): Feed version (see get_feed_version).
+        params (str): Query string of the request; responses with different parameters get different ETags.
+    """
+    digest = hashlib.md5(params.encode('utf-8'), usedforsecurity=False).hexdigest()[:16]
+    return quote_etag(f"{user.pk}-{version}-{digest}")
@@ -1,3 +1,397 @@
+import json
+import uuid
+from datetime import datetime, timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
 from django.test import TestCase
+from django.utils import timezone
+from gmail_integration.canonical import assign_job_identity
+from gmail_integration.records import ParsedJob
+from users.models import User
+from . import serializers
+from .feed_cache import get_feed_cache
+from .models import JobPosting
+from .serializers import FIELD_PRESETS, JOB_POSTING_FIELDS, dumps, get_projection, parse_fields, serialize_rows
+from .services import save_parsed_jobs
 
-# Create your tests here.
+
+def indeed_job(job_key, title="Senior Python Developer", **fields):
+    job = ParsedJob(
+        title=title,
+        job_url=f"https://ca.indeed.com/rc/clk/dl?jk={job_key}&from=ja",
+        gmail_message_id="message",
+        fetched_at=timezone.now(),
+        **fields,
+    )
+    return assign_job_identity(job, "Indeed")
+
+
+class SaveParsedJobsTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username="jobs", email="jobs@example.com")
+
+    def test_counts(self):
+        counts = save_parsed_jobs(self.user, [indeed_job("a1"), indeed_job("b2"), indeed_job("a1")])
+        self.assertEqual(counts, {'inserted': 2, 'updated': 0, 'skipped': 1})
+
+        counts = save_parsed_jobs(self.user, [indeed_job("a1", title="Staff Python Developer"), indeed_job("b2"), indeed_job("c3")])
+        self.assertEqual(counts, {'inserted': 1, 'updated': 1, 'skipped': 1})
+        self.assertEqual(JobPosting.objects.get(canonical_job_id="a1").title, "Staff Python Developer")
+
+    def test_same_job_from_two_alert_emails_is_one_row(self):
+        first = assign_job_identity(ParsedJob(
+            title="Senior Python Developer",
+            job_url="https://ca.indeed.com/rc/clk/dl?jk=5E2F1A&from=ja&tk=first",
+            gmail_message_id="monday-alert",
+            fetched_at=timezone.now(),
+        ))
+        second = assign_job_identity(ParsedJob(
+            title="Senior Python Developer",
+            job_url="https://www.indeed.com/viewjob?vjk=5e2f1a&from=ja&tk=second",
+            salary="$120,000 a year",
+            gmail_message_id="tuesday-alert",
+            fetched_at=timezone.now(),
+        ))
+        save_parsed_jobs(self.user, [first])
+        counts = save_parsed_jobs(self.user, [second])
+        self.assertEqual(counts, {'inserted': 0, 'updated': 1, 'skipped': 0})
+        posting = JobPosting.objects.get(user=self.user)
+        self.assertEqual((posting.canonical_job_id, posting.gmail_message_id, posting.salary), ("5e2f1a", "monday-alert", "$120,000 a year"))
+
+    def test_rows_inserted_by_a_concurrent_save_are_not_counted(self):
+        bulk_create = JobPosting.objects.bulk_create
+
+        def concurrent_bulk_create(postings, **kwargs):
+            if kwargs.get('ignore_conflicts'):
+                # Another request saves the same job between the lookup and the insert
+                JobPosting.all_objects.bulk_create([indeed_job("a1").to_model(self.user)])
+            return bulk_create(postings, **kwargs)
+
+        with mock.patch.object(JobPosting.objects, 'bulk_create', side_effect=concurrent_bulk_create):
+            counts = save_parsed_jobs(self.user, [indeed_job("a1"), indeed_job("b2")])
+        self.assertEqual(counts, {'inserted': 1, 'updated': 0, 'skipped': 1})
+        self.assertEqual(JobPosting.objects.filter(user=self.user).count(), 2)
+
+
+class SaveJobPostingsViewTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username="client", email="client@example.com")
+
+    def post(self, jobs):
+        payload = {"user_email": self.user.email, "job_postings": jobs}
+        return self.client.post("/api/job-postings/save-job-postings/", payload, content_type="application/json")
+
+    def job_dict(self, job_key, **fields):
+        """
+        Returns the JSON a client posts for an Indeed job, with `fields` replaced.
+        """
+        data = indeed_job(job_key).to_dict()
+        data.update(fields)
+        return data
+
+    def test_client_identity_fields_are_ignored(self):
+        save_parsed_jobs(self.user, [indeed_job("k1", title="Original")])
+        jobs = [
+            # Would overwrite k1 through the (user, source, canonical_job_id) constraint
+            self.job_dict("k2", title="Forged", canonical_job_id="k1"),
+            # Longer than the 64 character column
+            self.job_dict("k3", source="Indeed" * 20, canonical_job_id="x" * 100),
+        ]
+        response = self.post(jobs)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["inserted"], 2)
+        self.assertEqual(
+            dict(JobPosting.objects.filter(user=self.user).values_list('canonical_job_id', 'title')),
+            {"k1": "Original", "k2": "Forged", "k3": "Senior Python Developer"},
+        )
+        self.assertEqual(set(JobPosting.objects.filter(user=self.user).values_list('source', flat=True)), {"Indeed"})
+
+    def test_impossible_dates_do_not_fail_the_batch(self):
+        jobs = [
+            self.job_dict("k1", date_posted="2024-02-30T00:00:00Z"),
+            self.job_dict("k2", fetched_at="2024-02-30T00:00:00Z"),
+            self.job_dict("k3", application_deadline=20240301),
+        ]
+        response = self.post(jobs)
+        self.assertEqual(response.status_code, 201)
+        # A job without a valid fetched_at is skipped; the others are saved without the bad dates
+        self.assertEqual((response.json()["inserted"], response.json()["skipped"]), (2, 1))
+        self.assertEqual(JobPosting.objects.get(canonical_job_id="k1").date_posted, None)
+
+
+class SerializationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="serialize", email="serialize@example.com")
+        save_parsed_jobs(cls.user, [
+            indeed_job(
+                "a1",
+                company_name="Société Générale",
+                salary="$120,000 a year",
+                date_posted=timezone.now() - timedelta(days=2),
+                benefits="Dental, RRSP match",
+                skills=["python", "django"],
+                match_score=0.875,
+            ),
+            indeed_job("b2", title="Développeur \"Python\" <Senior>"),
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.client.defaults['HTTP_AUTHORIZATION'] = "Bearer token"
+
+    def encode(self, fields, use_orjson=True):
+        rows, _ = get_projection(JobPosting.objects.filter(user=self.user).order_by('id'), fields)
+        with mock.patch.object(serializers, 'orjson', serializers.orjson if use_orjson else None):
+            return json.loads(dumps(serialize_rows(list(rows), fields)))
+
+    def model_dicts(self, fields):
+        """
+        What the list used to return: each posting's model fields as JSON values.
+        """
+        def json_value(value):
+            if isinstance(value, datetime):
+                return value.isoformat()
+            if isinstance(value, uuid.UUID):
+                return str(value)
+            return value
+
+        return [
+            {name: json_value(getattr(posting, name)) for name in fields}
+            for posting in JobPosting.objects.filter(user=self.user).order_by('id')
+        ]
+
+    def test_orjson_and_stdlib_encoders_agree(self):
+        self.assertIsNotNone(serializers.orjson, "orjson is not installed")
+        expected = self.model_dicts(JOB_POSTING_FIELDS)
+        for use_orjson in (True, False):
+            with self.subTest(orjson=use_orjson):
+                self.assertEqual(self.encode(JOB_POSTING_FIELDS, use_orjson), expected)
+
+    def test_sparse_fieldsets_are_a_projection_of_the_full_output(self):
+        full = self.encode(JOB_POSTING_FIELDS)
+        for value in ["card", "title,salary", "salary,title", "card,skills", "full"]:
+            fields = parse_fields(value)
+            with self.subTest(fields=value):
+                self.assertEqual(self.encode(fields), [{name: job[name] for name in fields} for job in full])
+        self.assertEqual(parse_fields("salary, title,salary"), ("title", "salary"))
+        self.assertEqual(parse_fields("card"), FIELD_PRESETS['card'])
+
+    def test_fields_parameter(self):
+        response = self.client.get("/api/job-postings/", {"user_email": self.user.email, "fields": "card,match_score"})
+        self.assertEqual(response.status_code, 200)
+        for job in response.json()["job_postings"]:
+            self.assertEqual(list(job), [name for name in JOB_POSTING_FIELDS if name in {*FIELD_PRESETS['card'], 'match_score'}])
+
+        for value in ["salary,password", ",", "Card"]:
+            with self.subTest(fields=value):
+                response = self.client.get("/api/job-postings/", {"user_email": self.user.email, "fields": value})
+                self.assertEqual(response.status_code, 400)
+
+
+class JobPostingIndexTests(TestCase):
+    """
+    EXPLAIN checks that the feed and dedup queries are served by their indexes on a seeded dataset.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.users = [User.objects.create(username=f"index{i}", email=f"index{i}@example.com") for i in range(3)]
+        JobPosting.all_objects.bulk_create([
+            JobPosting(
+                user=user,
+                title=f"Job {i}",
+                job_url=f"https://example.com/jobs/{i}",
+                gmail_message_id=f"message{i // 10}",
+                fetched_at=now - timedelta(minutes=i),
+                is_deleted=i % 9 == 0,
+            )
+            for user in cls.users
+            for i in range(400)
+        ])
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute("ANALYZE")
+            elif connection.vendor == 'postgresql':
+                cursor.execute("ANALYZE job_postings_jobposting")
+                # Small tables are cheaper to scan; check that the index *can* serve the query
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, plan)
+
+    def test_feed_page_uses_feed_index(self):
+        user = self.users[1]
+        queryset = JobPosting.objects.filter(user=user).order_by('-fetched_at', '-id')
+        self.assertUsesIndex(queryset[:51], 'job_posting_feed_idx')
+
+        # Later pages start after the keyset cursor
+        fetched_at, pk = queryset.values_list('fetched_at', 'id')[100]
+        page = queryset.filter(Q(fetched_at__lt=fetched_at) | Q(fetched_at=fetched_at, id__lt=pk))
+        self.assertUsesIndex(page[:51], 'job_posting_feed_idx')
+
+    def test_dedup_lookup_uses_message_index(self):
+        # The lookup save_parsed_jobs runs for jobs without a canonical job ID
+        queryset = JobPosting.all_objects.filter(
+            Q(pk__in=[]) | Q(
+                canonical_job_id__isnull=True,
+                is_deleted=False,
+                gmail_message_id__in=['message3', 'message4'],
+                job_url__in=['https://example.com/jobs/30', 'https://example.com/jobs/41'],
+            ),
+            user=self.users[2],
+        )
+        self.assertUsesIndex(queryset, 'job_posting_message_idx')
+
+    def test_delta_sync_uses_changes_index(self):
+        queryset = JobPosting.all_objects.filter(user=self.users[0], change_seq__gt=3).order_by('change_seq', 'id')
+        self.assertUsesIndex(queryset[:51], 'job_posting_changes_idx')
+
+
+class ConditionalGetTests(TestCase):
+
+    def setUp(self):
+        # Cached responses are keyed by user ID and feed version, which repeat across tests
+        cache.clear()
+        self.user = User.objects.create(username="poll", email="poll@example.com")
+        save_parsed_jobs(self.user, [indeed_job("a1"), indeed_job("b2")])
+        self.client.defaults['HTTP_AUTHORIZATION'] = "Bearer token"
+
+    def get(self, **headers):
+        return self.client.get("/api/job-postings/", {"user_email": self.user.email}, headers=headers)
+
+    def test_unchanged_list_is_not_modified(self):
+        etag = self.get()["ETag"]
+        with self.assertNumQueries(2):
+            # The user and their feed version; the postings table isn't queried
+            response = self.get(if_none_match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_delete_in_the_same_second_changes_the_response(self):
+        response = self.get()
+        self.assertNotIn("Last-Modified", response)
+        job_uuid = JobPosting.objects.filter(user=self.user).values_list('job_uuid', flat=True).first()
+        self.client.delete(f"/api/job-postings/delete-job-posting/{job_uuid}/")
+
+        response = self.get(if_none_match=response["ETag"], if_modified_since="Fri, 01 Jan 2100 00:00:00 GMT")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["job_postings"]), 1)
+
+
+class FeedCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        get_feed_cache().reset_stats()
+        self.user = User.objects.create(username="cached", email="cached@example.com")
+        save_parsed_jobs(self.user, [indeed_job("a1", title="Job A"), indeed_job("b2", title="Job B")])
+        self.client.defaults['HTTP_AUTHORIZATION'] = "Bearer token"
+
+    def titles(self):
+        response = self.client.get("/api/job-postings/", {"user_email": self.user.email, "fields": "title"})
+        return sorted(job["title"] for job in response.json()["job_postings"])
+
+    def assertStats(self, hits, misses):
+        stats = get_feed_cache().stats()
+        self.assertEqual((stats['hits'], stats['misses']), (hits, misses))
+
+    def test_saves_and_deletes_invalidate_cached_pages(self):
+        self.assertEqual(self.titles(), ["Job A", "Job B"])
+        self.assertEqual(self.titles(), ["Job A", "Job B"])
+        self.assertStats(hits=1, misses=1)
+
+        save_parsed_jobs(self.user, [indeed_job("c3", title="Job C")])
+        self.assertEqual(self.titles(), ["Job A", "Job B", "Job C"])
+        self.assertStats(hits=1, misses=2)
+
+        save_parsed_jobs(self.user, [indeed_job("a1", title="Job A (updated)")])
+        self.assertEqual(self.titles(), ["Job A (updated)", "Job B", "Job C"])
+
+        job_uuid = JobPosting.objects.get(canonical_job_id="b2").job_uuid
+        self.client.delete(f"/api/job-postings/delete-job-posting/{job_uuid}/")
+        self.assertEqual(self.titles(), ["Job A (updated)", "Job C"])
+        self.assertStats(hits=1, misses=4)
+
+    def test_stats_are_staff_only(self):
+        self.titles()
+        self.assertEqual(self.client.get("/api/job-postings/feed-cache-stats/").status_code, 403)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get("/api/job-postings/feed-cache-stats/").status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save(update_fields=['is_staff'])
+        response = self.client.get("/api/job-postings/feed-cache-stats/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['misses'], 1)
+        self.assertEqual(self.client.post("/api/job-postings/feed-cache-stats/").status_code, 405)
+
+
+class DeltaSyncTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="delta", email="delta@example.com")
+        self.client.defaults['HTTP_AUTHORIZATION'] = "Bearer token"
+
+    def get(self, **params):
+        response = self.client.get("/api/job-postings/", {"user_email": self.user.email, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def sync(self, since, limit=50):
+        """
+        Follows next_since until has_more is false; returns (titles, deleted job_uuids, next_since).
+        """
+        titles = []
+        deleted = []
+        while True:
+            page = self.get(since=since, limit=limit, fields="title")
+            titles += [job["title"] for job in page["job_postings"]]
+            deleted += [tombstone["job_uuid"] for tombstone in page["deleted"]]
+            since = page["next_since"]
+            if not page["has_more"]:
+                return titles, deleted, since
+
+    def test_changes_and_tombstones_since_the_first_page(self):
+        save_parsed_jobs(self.user, [indeed_job(f"k{i}", title=f"Job {i}") for i in range(5)])
+        since = self.get()["sync_cursor"]
+        self.assertEqual(self.sync(since)[:2], ([], []))
+
+        save_parsed_jobs(self.user, [indeed_job("k1", title="Job 1 (updated)"), indeed_job("k9", title="Job 9")])
+        job_uuid = str(JobPosting.objects.get(canonical_job_id="k3").job_uuid)
+        self.client.delete(f"/api/job-postings/delete-job-posting/{job_uuid}/")
+
+        titles, deleted, since = self.sync(since)
+        self.assertEqual(sorted(titles), ["Job 1 (updated)", "Job 9"])
+        self.assertEqual(deleted, [job_uuid])
+        self.assertEqual(self.sync(since)[:2], ([], []))
+
+    def test_full_sync_pages_every_row_once(self):
+        for batch in range(3):
+            save_parsed_jobs(self.user, [indeed_job(f"k{batch}-{i}", title=f"Job {batch}-{i}") for i in range(7)])
+        titles, deleted, _ = self.sync("", limit=4)
+        self.assertEqual(len(titles), 21)
+        self.assertEqual(len(set(titles)), 21)
+
+    def test_cursor_does_not_depend_on_updated_at(self):
+        save_parsed_jobs(self.user, [indeed_job("k1", title="Job 1")])
+        since = self.sync("")[2]
+
+        # A slow save whose timestamps predate changes a reader has already seen
+        save_parsed_jobs(self.user, [indeed_job("k2", title="Job 2")])
+        JobPosting.objects.filter(canonical_job_id="k2").update(updated_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(self.sync(since)[0], ["Job 2"])
+
+    def test_invalid_since(self):
+        response = self.client.get("/api/job-postings/", {"user_email": self.user.email, "since": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
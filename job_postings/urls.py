@@ -1,9 +1,10 @@
 from django.urls import path
-from .views import get_job_postings, save_job_postings, delete_job_posting
+from .views import get_job_postings, save_job_postings, delete_job_posting, feed_cache_stats_view
 
 urlpatterns = [
     path('', get_job_postings, name='get_job_postings'),
     path('save-job-postings/', save_job_postings, name='save_job_postings'),  
     path('delete-job-posting/<uuid:job_uuid>/', delete_job_posting, name='delete_job_posting'),
+    path('feed-cache-stats/', feed_cache_stats_view, name='feed_cache_stats'),
     # TODO: path('api/job-postings/<str:emailId>/', save_job_posting, name='save_job_posting'),
 ]
\ No newline at end of file
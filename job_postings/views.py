@@ -1,19 +1,48 @@
 import json
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.timezone import now
+from .feed_cache import get_feed_cache
 from .models import JobPosting
+from .pagination import encode_sync_cursor, paginate, paginate_changes, parse_page_size
+from .serializers import (
+    CHANGES_COLUMNS, TOMBSTONE_FIELDS, dumps, get_projection, parse_fields, serialize_rows, split_changes,
+)
+from .services import bump_feed_versions, get_feed_etag, get_feed_version, save_parsed_jobs
+from gmail_integration.canonical import assign_job_identity
+from gmail_integration.records import ParsedJob
 from users.models import User
-from django.http import JsonResponse
-from django.utils.dateparse import parse_datetime
+from django.db import transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
 import logging
 from django.utils import timezone
 
 logger = logging.getLogger('job_postings')
 
+
+def set_feed_etag(response, etag):
+    """
+    Adds the ETag to a list response and makes clients revalidate before reusing it.
+    """
+    response.headers["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
 @csrf_exempt
 def get_job_postings(request):
     """
-    API endpoint to retrieve job postings for a user.
+    API endpoint to retrieve job postings for a user, newest first, one page at a time.
+    Supports conditional requests (If-None-Match): unchanged lists get a 304.
+    Response bodies are cached per user, feed version and query string (see feed_cache.py).
+    Query parameters:
+        limit: Page size (settings.JOB_POSTINGS_PAGE_SIZE by default).
+        cursor: next_cursor from the previous page.
+        since: Delta sync instead of the list: next_since of the previous sync (or sync_cursor of a first
+               list page; empty for everything). Returns the postings changed after it, oldest change
+               first, and tombstones (job_uuid, deleted_at) of the ones deleted since.
+        fields: Comma-separated field names and/or presets ('card', 'full'); all fields by default.
+        include_total: Also return the user's total number of postings (costs a COUNT query).
     """
     if request.method == "GET":
         auth_header = request.META.get("HTTP_AUTHORIZATION")
@@ -37,53 +66,88 @@ def get_job_postings(request):
             logger.error(f'Error fetching user: {str(e)}')
             return JsonResponse({"error": "Error fetching user"}, status=500)
 
-        # Retrieve job postings that are not deleted, ordered by most recent
-        job_postings = JobPosting.objects.filter(user=user, is_deleted=False).order_by('-fetched_at')
-        logger.info(f'Retrieved {job_postings.count()} job postings for user {user_email}')
-
-        # Serialize job postings with all relevant fields
-        serialized_jobs = []
-        for job in job_postings:
-            try:
-                serialized_job = {
-                    "job_uuid": str(job.job_uuid),
-                    "title": job.title,
-                    "company_name": job.company_name,
-                    "location": job.location,
-                    "salary": job.salary,
-                    "job_type": job.job_type,
-                    "date_posted": job.date_posted.isoformat() if job.date_posted else None,
-                    "application_deadline": job.application_deadline.isoformat() if job.application_deadline else None,
-                    "benefits": job.benefits,
-                    "summary": job.summary,
-                    "experience_level": job.experience_level,
-                    "industries": job.industries,
-                    "skills": job.skills,
-                    "job_description_snippet": job.job_description_snippet,
-                    "status": job.status,
-                    "employment_type": job.employment_type,
-                    "company_url": job.company_url,
-                    "company_logo_url": job.company_logo_url,
-                    "job_url": job.job_url if hasattr(job, 'job_url') else None,  # Safe access
-                    "match_score": job.match_score,
-                    "source": job.source,
-                    "gmail_message_id": job.gmail_message_id,
-                    "gmail_thread_id": job.gmail_thread_id,
-                    "fetched_at": job.fetched_at.isoformat(),
-                    "created_at": job.created_at.isoformat(),
-                    "updated_at": job.updated_at.isoformat(),
-                }
-                serialized_jobs.append(serialized_job)
-            except AttributeError as ae:
-                logger.error(f"AttributeError while serializing job {job.id}: {str(ae)}")
-            except Exception as e:
-                logger.error(f"Unexpected error while serializing job {job.id}: {str(e)}")
+        try:
+            limit = parse_page_size(request.GET.get("limit"))
+        except ValueError:
+            return JsonResponse({"error": "Invalid limit"}, status=400)
 
-        return JsonResponse({"job_postings": serialized_jobs}, status=200)
+        try:
+            fields = parse_fields(request.GET.get("fields"))
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+        # Answer polls of an unchanged list from the feed version, before querying the postings
+        feed_version = get_feed_version(user)
+        etag = get_feed_etag(user, feed_version, request.GET.urlencode())
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return set_feed_etag(not_modified, etag)
+
+        feed_cache = get_feed_cache()
+        cache_key = feed_cache.make_key(etag)
+        content = feed_cache.get(cache_key)
+        if content is None:
+            if "since" in request.GET:
+                try:
+                    response = build_changes_response(user, fields, limit, request.GET["since"], feed_version)
+                except ValueError:
+                    return JsonResponse({"error": "Invalid since cursor"}, status=400)
+            else:
+                # Retrieve job postings that are not deleted (default manager), ordered by most recent
+                queryset = JobPosting.objects.filter(user=user)
+                rows_queryset, cursor_key = get_projection(queryset, fields)
+                try:
+                    rows, next_cursor = paginate(rows_queryset, limit, request.GET.get("cursor"), key=cursor_key)
+                except ValueError:
+                    return JsonResponse({"error": "Invalid cursor"}, status=400)
+                logger.info(f'Retrieved {len(rows)} job postings for user {user_email}')
+
+                # Serialize only the fetched columns, straight to JSON bytes
+                response = {"job_postings": serialize_rows(rows, fields), "next_cursor": next_cursor}
+                if not request.GET.get("cursor"):
+                    # Where a later delta sync (since=) of this client starts: the version read before the
+                    # page query, so changes committed since then are delivered by the sync
+                    response["sync_cursor"] = encode_sync_cursor(feed_version)
+                if request.GET.get("include_total", "").lower() in ("1", "true", "yes"):
+                    response["total"] = queryset.count()
+            content = dumps(response)
+            # The key holds the feed version, so saves and deletes make it unreachable
+            feed_cache.set(cache_key, content)
+        return set_feed_etag(HttpResponse(content, content_type="application/json", status=200), etag)
     else:
         logger.warning(f"Received invalid request method: {request.method}")
         return JsonResponse({"error": "Method not allowed"}, status=405)
 
+def build_changes_response(user, fields, limit, since, feed_version):
+    """
+    Returns a delta sync response: up to `limit` postings changed after the `since` cursor, split into
+    live postings (serialized `fields`) and tombstones. `feed_version` is the user's feed version, read
+    before the query. Raises ValueError if `since` is malformed.
+    """
+    # Soft-deleted rows included: deleting stamps change_seq (served by job_posting_changes_idx)
+    queryset = JobPosting.all_objects.filter(user=user)
+    rows_queryset, changes_key = get_projection(queryset, fields, CHANGES_COLUMNS)
+    rows, next_since, has_more = paginate_changes(rows_queryset, limit, since or None, feed_version, key=changes_key)
+    live_rows, tombstones = split_changes(rows, fields)
+    logger.info(f'Synced {len(live_rows)} changed and {len(tombstones)} deleted job postings for user {user.pk}')
+    return {
+        "job_postings": serialize_rows(live_rows, fields),
+        "deleted": serialize_rows(tombstones, TOMBSTONE_FIELDS),
+        "next_since": next_since,
+        "has_more": has_more,
+    }
+
+def feed_cache_stats_view(request):
+    """
+    Returns the job postings feed cache's hit/miss counters for this process. Staff users only.
+    """
+    if request.method == "GET":
+        if not (request.user.is_authenticated and request.user.is_staff):
+            return JsonResponse({"error": "Staff access required"}, status=403)
+        return JsonResponse(get_feed_cache().stats(), status=200)
+
+    return JsonResponse({"error": "Method not allowed"}, status=405)
+
 @csrf_exempt
 def save_job_postings(request):
     if request.method == "POST":
@@ -106,66 +170,29 @@ def save_job_postings(request):
                 logger.error(f'Error fetching user: {str(e)}')
                 return JsonResponse({"error": "Error fetching user"}, status=500)
 
-            new_jobs = []
-            for job in job_postings:
-                gmail_id = job.get("gmail_message_id")
-                job_url = job.get("job_url")
-                if not gmail_id:
+            jobs = []
+            skipped = 0
+            for job in map(ParsedJob.from_dict, job_postings):
+                if not job.gmail_message_id:
                     # logger.warning(f'Skipping job posting without gmail_message_id: {job}')
+                    skipped += 1
                     continue
 
-                # Check for existing job posting with the same gmail_id and job_url
-                if JobPosting.objects.filter(gmail_message_id=gmail_id, job_url=job_url, is_deleted=False).exists():
-                    # logger.info(f"JobPosting with gmail_message_id {gmail_id} and job_url {job_url} already exists; skipping.")
+                if not job.fetched_at:
+                    logger.warning(f'Invalid fetched_at for job posting from message {job.gmail_message_id}')
+                    skipped += 1
                     continue
 
-                fetched_at_str = job.get("fetched_at")
-                fetched_at = parse_datetime(fetched_at_str)
-                if not fetched_at:
-                    logger.warning(f'Invalid fetched_at format: {fetched_at_str}')
-                    continue
+                # The source and canonical job ID always come from the link, not the client
+                jobs.append(assign_job_identity(job))
 
-                date_posted_str = job.get("date_posted")
-                date_posted = parse_datetime(date_posted_str) if date_posted_str else None
-
-                application_deadline_str = job.get("application_deadline")
-                application_deadline = parse_datetime(application_deadline_str) if application_deadline_str else None
-
-                new_job = JobPosting(
-                    user=user,
-                    title=job.get("title", "No Title"),
-                    company_name=job.get("company_name", "N/A"),
-                    company_url=job.get("company_url"),
-                    company_logo_url=job.get("company_logo_url"),
-                    location=job.get("location", "N/A"),
-                    employment_type=job.get("employment_type"),
-                    job_type=job.get("job_type"),
-                    date_posted=date_posted,
-                    application_deadline=application_deadline,
-                    salary=job.get("salary"),
-                    benefits=job.get("benefits"),
-                    summary=job.get("summary"),
-                    experience_level=job.get("experience_level"),
-                    industries=job.get("industries"),
-                    skills=job.get("skills"),
-                    job_description_snippet=job.get("job_description_snippet"),
-                    status=job.get("status"),
-                    match_score=job.get("match_score"),
-                    fetched_at=fetched_at,
-                    source=job.get("source", "Unknown"),
-                    gmail_message_id=gmail_id,
-                    gmail_thread_id=job.get("gmail_thread_id"),
-                    job_url=job_url,
-                )
-                new_jobs.append(new_job)
-                # logger.debug(f"Prepared new job posting: {new_job}")
-
-            # Bulk create all new job postings
-            JobPosting.objects.bulk_create(new_jobs)
-            saved_count = len(new_jobs)
+            # Dedup against existing postings in one query, then batched upserts
+            counts = save_parsed_jobs(user, jobs)
+            counts['skipped'] += skipped
+            saved_count = counts['inserted']
             logger.info(f"Total job postings saved: {saved_count}")
 
-            return JsonResponse({"success": True, "saved_count": saved_count}, status=201)
+            return JsonResponse({"success": True, "saved_count": saved_count, **counts}, status=201)
         
         except json.JSONDecodeError:
             logger.error('Invalid JSON received')
@@ -187,7 +214,7 @@ def delete_job_posting(request, job_uuid):
         logger.info(f"DELETE request received for job_uuid: {job_uuid}")
         try:
             # Retrieve the JobPosting object by job_uuid
-            job_posting = JobPosting.objects.get(job_uuid=job_uuid, is_deleted=False)
+            job_posting = JobPosting.objects.get(job_uuid=job_uuid)
         except JobPosting.DoesNotExist:
             logger.warning(f"JobPosting with job_uuid {job_uuid} does not exist.")
             return JsonResponse({'success': False, 'error': 'Job posting not found.'}, status=404)
@@ -199,7 +226,9 @@ def delete_job_posting(request, job_uuid):
             # Soft delete the JobPosting
             job_posting.is_deleted = True
             job_posting.deleted_at = timezone.now()
-            job_posting.save()
+            with transaction.atomic():
+                job_posting.change_seq = bump_feed_versions([job_posting.user_id])[job_posting.user_id]
+                job_posting.save()
             logger.info(f"JobPosting with job_uuid {job_uuid} marked as deleted.")
             return JsonResponse({'success': True, 'job_uuid': job_uuid}, status=200)
         except Exception as e:
@@ -40,9 +40,46 @@ LOGGING = {
             'handlers': ['console'],
             'level': 'DEBUG',
         },
+        'gmail_integration': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
     },
 }
 
+# Gmail integration
+GMAIL_BATCH_SIZE = 50  # messages per Gmail batch HTTP request (Gmail caps this at 100)
+GMAIL_FETCH_MAX_WORKERS = 4  # senders fetched concurrently per request
+GMAIL_HTTP_TIMEOUT = 30  # seconds, per Gmail HTTP call
+GMAIL_BATCH_RETRIES = 2  # extra batch rounds for messages that hit rate limiting (429) or Gmail 5xx errors
+GMAIL_BATCH_RETRY_DELAY = 1.0  # seconds before the first retry round, doubled on each round
+GMAIL_FULL_SYNC_MAX_RESULTS = 50  # messages per sync: the latest ones without a valid history cursor, else the next ones in the history
+GMAIL_HTML_PARSER = 'lxml'  # 'html.parser' or 'lxml' (falls back to 'html.parser' if lxml is missing)
+GMAIL_STREAMING_PARSERS = False  # use the constant-memory tokenizer extractors instead of BeautifulSoup
+GMAIL_TEMPLATE_PLANS = False  # parse known alert template variants with compiled extraction plans
+GMAIL_PARSE_WORKERS = None  # parse pool processes (None uses the CPU count)
+GMAIL_PARSE_CHUNK_SIZE = 8  # email bodies per parse pool task
+GMAIL_PARSE_POOL_MIN_BATCH = 16  # smaller batches are parsed in-process
+GMAIL_PARSE_CACHE_SIZE = 512  # parse results kept in each process's LRU (0 disables it)
+GMAIL_PARSE_CACHE_ALIAS = None  # Django cache alias for a shared parse cache tier (None disables it)
+GMAIL_PARSE_CACHE_TIMEOUT = 7 * 24 * 60 * 60  # seconds entries live in the shared tier
+GMAIL_FULL_SYNC_NEWER_THAN_DAYS = 30  # only backfill alerts from the last N days (None for no limit)
+
+# Job postings
+JOB_POSTINGS_SAVE_BATCH_SIZE = 500  # rows per INSERT ... ON CONFLICT statement when saving job postings
+JOB_POSTINGS_PAGE_SIZE = 50  # job postings per page when the client sends no limit
+JOB_POSTINGS_MAX_PAGE_SIZE = 200  # largest page a client can ask for
+JOB_POSTINGS_FEED_CACHE_ALIAS = "default"  # Django cache alias for cached job posting list responses (None disables it)
+JOB_POSTINGS_FEED_CACHE_TIMEOUT = 10 * 60  # seconds a cached list response lives
+
+# Cache (per-process locmem; point "default" at a shared backend such as Redis to share entries across workers)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "jobai-backend",
+    }
+}
+
 # Application definition
 
 INSTALLED_APPS = [